@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Tuple
+
+from fastapi import APIRouter, Depends, Query
+
+from analytics_utils import compute_trends
+from auth import get_current_user
+from cache_utils import LRUCache
+from database import db
+
+router = APIRouter()
+
+# Results keyed by user and window; stale once a newer entry is written.
+_trend_cache = LRUCache(maxsize=2048)
+
+
+async def _latest_entry_stamp(user_id: str) -> Tuple[Any, Any]:
+    latest = []
+    for collection in (db.mood_entries, db.sleep_entries):
+        doc = await collection.find_one(
+            {"user_id": user_id}, {"_id": 0, "date": 1}, sort=[("date", -1)]
+        )
+        latest.append(doc["date"] if doc else None)
+    return tuple(latest)
+
+
+async def _load_series(user_id: str, since: datetime) -> Dict[str, Any]:
+    query = {"user_id": user_id, "date": {"$gte": since}}
+    mood_dates, mood_levels, labels, scores = [], [], [], []
+    cursor = db.mood_entries.find(
+        query,
+        {"_id": 0, "date": 1, "mood_level": 1, "note": 1, "analysis.label": 1, "analysis.score": 1},
+    ).sort("date", 1)
+    async for doc in cursor:
+        mood_dates.append(doc["date"])
+        mood_levels.append(doc.get("mood_level", float("nan")))
+        analysis = doc.get("analysis") or {}
+        labels.append(analysis.get("label", "neutral"))
+        # Entries without a note carry no sentiment signal.
+        scores.append(analysis.get("score", 0.0) if doc.get("note") else float("nan"))
+
+    sleep_dates, hours, quality = [], [], []
+    cursor = db.sleep_entries.find(
+        query, {"_id": 0, "date": 1, "hours": 1, "quality": 1}
+    ).sort("date", 1)
+    async for doc in cursor:
+        sleep_dates.append(doc["date"])
+        hours.append(doc.get("hours", float("nan")))
+        quality.append(doc.get("quality", float("nan")))
+
+    return {
+        "mood_dates": mood_dates,
+        "mood_levels": mood_levels,
+        "sentiment_labels": labels,
+        "sentiment_scores": scores,
+        "sleep_dates": sleep_dates,
+        "sleep_hours": hours,
+        "sleep_quality": quality,
+    }
+
+
+@router.get("/api/analytics/trends")
+async def get_trends(
+    days: int = Query(365, ge=7, le=3650), current_user=Depends(get_current_user)
+):
+    user_id = current_user["user_id"]
+    stamp = await _latest_entry_stamp(user_id)
+    cached = _trend_cache.get((user_id, days))
+    if cached and cached[0] == stamp:
+        return cached[1]
+    since = datetime.utcnow() - timedelta(days=days)
+    series = await _load_series(user_id, since)
+    trends = compute_trends(**series)
+    _trend_cache.set((user_id, days), (stamp, trends))
+    return trends
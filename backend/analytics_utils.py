@@ -0,0 +1,143 @@
+"""Vectorized trend calculations for per-user mood, sentiment and sleep series."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+NEGATIVE_LABELS = ("negative", "neg", "sad", "angry")
+POSITIVE_LABELS = ("positive", "pos", "happy")
+
+MOOD_MIN = 1
+MOOD_MAX = 5
+
+
+def signed_sentiment(labels: Sequence[str], scores: Sequence[float]) -> np.ndarray:
+    """Map ``analysis`` label/score pairs to a signed score in ``[-1, 1]``."""
+    lowered = np.char.lower(np.asarray(labels, dtype=str))
+    sign = np.zeros(lowered.shape, dtype=float)
+    for label in POSITIVE_LABELS:
+        sign[np.char.startswith(lowered, label)] = 1.0
+    for label in NEGATIVE_LABELS:
+        sign[np.char.startswith(lowered, label)] = -1.0
+    return sign * np.asarray(scores, dtype=float)
+
+
+def normalize_mood(mood: np.ndarray) -> np.ndarray:
+    """Rescale ``mood_level`` from the 1-5 scale to ``[-1, 1]``."""
+    midpoint = (MOOD_MAX + MOOD_MIN) / 2
+    return (mood - midpoint) / (MOOD_MAX - midpoint)
+
+
+def to_daily(dates: Sequence[datetime], values: np.ndarray, start: np.datetime64, n_days: int) -> np.ndarray:
+    """Average values per calendar day onto a dense axis; missing days are NaN."""
+    if n_days <= 0:
+        return np.empty(0)
+    if len(dates) == 0:
+        return np.full(n_days, np.nan)
+    day_idx = (np.asarray(dates, dtype="datetime64[D]") - start).astype(int)
+    valid = ~np.isnan(values)
+    sums = np.bincount(day_idx[valid], weights=values[valid], minlength=n_days)
+    counts = np.bincount(day_idx[valid], minlength=n_days)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` days, skipping NaN gaps."""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    csum = np.concatenate(([0.0], np.cumsum(filled)))
+    ccount = np.concatenate(([0], np.cumsum(present)))
+    idx = np.arange(1, len(values) + 1)
+    lo = np.maximum(idx - window, 0)
+    sums = csum[idx] - csum[lo]
+    counts = ccount[idx] - ccount[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def slope(values: np.ndarray) -> Optional[float]:
+    """Least-squares slope per day over the non-missing points."""
+    x = np.nonzero(~np.isnan(values))[0].astype(float)
+    if len(x) < 2:
+        return None
+    y = values[x.astype(int)]
+    x_centered = x - x.mean()
+    denom = float(np.dot(x_centered, x_centered))
+    if denom == 0:
+        return None
+    return float(np.dot(x_centered, y - y.mean()) / denom)
+
+
+def volatility(values: np.ndarray) -> Optional[float]:
+    """Standard deviation of changes between consecutive recorded days."""
+    recorded = values[~np.isnan(values)]
+    if len(recorded) < 3:
+        return None
+    return float(np.std(np.diff(recorded), ddof=1))
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), 4) for v in values]
+
+
+def _summary(values: np.ndarray, window: int = 30) -> Dict[str, Any]:
+    recent = values[-window:]
+    return {
+        "values": _to_list(values),
+        "rolling_7": _to_list(rolling_mean(values, 7)),
+        "rolling_30": _to_list(rolling_mean(values, 30)),
+        "slope": slope(values),
+        f"slope_{window}d": slope(recent),
+        "volatility": volatility(values),
+    }
+
+
+def _divergence(mood: np.ndarray, sentiment: np.ndarray) -> Dict[str, Any]:
+    both = ~np.isnan(mood) & ~np.isnan(sentiment)
+    if not both.any():
+        return {"mean_abs": None, "recent_7": None, "correlation": None}
+    diff = normalize_mood(mood[both]) - sentiment[both]
+    correlation = None
+    if both.sum() >= 3 and np.std(mood[both]) > 0 and np.std(sentiment[both]) > 0:
+        correlation = float(np.corrcoef(mood[both], sentiment[both])[0, 1])
+    return {
+        "mean_abs": float(np.mean(np.abs(diff))),
+        "recent_7": float(np.mean(diff[-7:])),
+        "correlation": correlation,
+    }
+
+
+def compute_trends(
+    mood_dates: Sequence[datetime],
+    mood_levels: Sequence[float],
+    sentiment_labels: Sequence[str],
+    sentiment_scores: Sequence[float],
+    sleep_dates: Sequence[datetime],
+    sleep_hours: Sequence[float],
+    sleep_quality: Sequence[float],
+) -> Dict[str, Any]:
+    """Build daily mood, sentiment and sleep trends from raw entry columns."""
+    all_dates = list(mood_dates) + list(sleep_dates)
+    if not all_dates:
+        return {"days": [], "mood": None, "sentiment": None, "sleep": None, "divergence": None}
+    days = np.asarray(all_dates, dtype="datetime64[D]")
+    start, end = days.min(), days.max()
+    n_days = int((end - start).astype(int)) + 1
+
+    mood = to_daily(mood_dates, np.asarray(mood_levels, dtype=float), start, n_days)
+    sentiment = to_daily(
+        mood_dates, signed_sentiment(sentiment_labels, sentiment_scores), start, n_days
+    )
+    hours = to_daily(sleep_dates, np.asarray(sleep_hours, dtype=float), start, n_days)
+    quality = to_daily(sleep_dates, np.asarray(sleep_quality, dtype=float), start, n_days)
+
+    axis = start + np.arange(n_days)
+    return {
+        "days": [str(d) for d in axis],
+        "mood": _summary(mood),
+        "sentiment": _summary(sentiment),
+        "sleep": {"hours": _summary(hours), "quality": _summary(quality)},
+        "divergence": _divergence(mood, sentiment),
+    }
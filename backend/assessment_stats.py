@@ -0,0 +1,157 @@
+"""Population statistics for assessments, served from score histograms."""
+
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pymongo import UpdateOne
+
+from assessments_utils import instrument_registry
+from auth import require_admin
+from database import db
+from indexes import INDEXES
+import research_utils
+from stats_utils import build_rebuild_pipeline, build_stats_updates, group_stats
+
+router = APIRouter()
+
+STATS_STAGING = "assessment_stats_rebuild"
+
+# Metric -> (cut-offs, level labels) for each instrument.
+METRIC_BANDS = {plan.id: plan.metric_bands() for plan in instrument_registry}
+STATS_METRICS = {kind: tuple(bands) for kind, bands in METRIC_BANDS.items()}
+
+
+async def _add_to_stats(
+    collection,
+    user: Mapping[str, Any],
+    assessment_type: str,
+    results: Mapping[str, Any],
+    completed_at: Optional[datetime],
+) -> None:
+    cell = {
+        "assessment_type": assessment_type,
+        "month": research_utils.month_key(completed_at),
+        "student_level": user.get("student_level") or "unknown",
+        "age_band": research_utils.age_band(user.get("age")),
+    }
+    updates = build_stats_updates(cell, results, STATS_METRICS.get(assessment_type, ()))
+    if updates:
+        await collection.bulk_write(
+            [UpdateOne(query, update, upsert=True) for query, update in updates],
+            ordered=False,
+        )
+
+
+async def record_assessment_stats(
+    user: Mapping[str, Any],
+    assessment_type: str,
+    results: Mapping[str, Any],
+    completed_at: datetime,
+) -> None:
+    """Add one submission to its histogram cells in a single round trip."""
+    await _add_to_stats(db.assessment_stats, user, assessment_type, results, completed_at)
+
+
+async def _replay_submissions(id_filter: Mapping[str, Any]) -> Optional[ObjectId]:
+    """Add the assessments matching ``id_filter`` to the staging cells.
+
+    Returns the last ``_id`` replayed, or None when nothing matched.
+    """
+    last = None
+    users: Dict[str, Mapping[str, Any]] = {}
+    cursor = db.assessments.find(
+        {"_id": dict(id_filter), "assessment_type": {"$in": list(STATS_METRICS)}},
+        {"_id": 1, "user_id": 1, "assessment_type": 1, "results": 1, "completed_at": 1},
+    ).sort("_id", 1)
+    async for doc in cursor:
+        user_id = doc.get("user_id")
+        if user_id not in users:
+            users[user_id] = (
+                await db.users.find_one({"user_id": user_id}, {"_id": 0, "age": 1, "student_level": 1})
+                or {}
+            )
+        await _add_to_stats(
+            db[STATS_STAGING],
+            users[user_id],
+            doc["assessment_type"],
+            doc.get("results") or {},
+            doc.get("completed_at"),
+        )
+        last = doc["_id"]
+    return last
+
+
+async def rebuild_assessment_stats() -> int:
+    """Recompute every cell from ``assessments`` and swap the collection in.
+
+    Assessments stored before the rebuild started are aggregated into a
+    staging collection, so submissions keep incrementing the live cells
+    meanwhile. Those submissions are then replayed into the staging cells
+    until a pass finds nothing new, and only then is staging renamed over
+    ``assessment_stats``. A submission counted between the last pass and
+    the rename (one round trip) still lands in the replaced collection;
+    the next rebuild picks it up.
+
+    Cohorts come from each user's current profile, which may differ from
+    the one recorded incrementally at submission time.
+    """
+    started = ObjectId.from_datetime(datetime.utcnow())
+    staging = db[STATS_STAGING]
+    await staging.drop()
+    # $out keeps the target's indexes, and the rename carries them over.
+    await staging.create_indexes(INDEXES["assessment_stats"])
+    pipeline = build_rebuild_pipeline(
+        STATS_METRICS, research_utils.AGE_BANDS, out=STATS_STAGING, before=started
+    )
+    await db.assessments.aggregate(pipeline).to_list(length=None)
+    id_filter = {"$gte": started}
+    while True:
+        last = await _replay_submissions(id_filter)
+        if last is None:
+            break
+        id_filter = {"$gt": last}
+    await staging.rename("assessment_stats", dropTarget=True)
+    return await db.assessment_stats.count_documents({})
+
+
+@router.get("/api/admin/assessment-stats/{assessment_type}")
+async def assessment_statistics(
+    assessment_type: str,
+    group_by: str = Query("none", pattern="^(none|month|student_level|age_band)$"),
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    student_level: Optional[str] = None,
+    age_band: Optional[str] = None,
+    _: Any = Depends(require_admin),
+):
+    """Score percentiles and severity distribution per metric and group.
+
+    ``start`` and ``end`` are inclusive months (``YYYY-MM``).
+    """
+    bands = METRIC_BANDS.get(assessment_type)
+    if bands is None:
+        raise HTTPException(status_code=404, detail="نوع ارزیابی نامعتبر است")
+    query: Dict[str, Any] = {"assessment_type": assessment_type}
+    if start or end:
+        query["month"] = {}
+        if start:
+            query["month"]["$gte"] = start
+        if end:
+            query["month"]["$lte"] = end
+    if student_level:
+        query["student_level"] = student_level
+    if age_band:
+        query["age_band"] = age_band
+    cells = await db.assessment_stats.find(query, {"_id": 0}).to_list(length=None)
+    return {
+        "assessment_type": assessment_type,
+        "group_by": group_by,
+        "metrics": group_stats(cells, group_by, bands),
+    }
+
+
+@router.post("/api/admin/assessment-stats/rebuild")
+async def rebuild_statistics(_: Any = Depends(require_admin)):
+    return {"cells": await rebuild_assessment_stats()}
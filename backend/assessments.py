@@ -1,278 +1,239 @@
 from datetime import datetime
+import os
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-
-from auth import award_xp, get_current_user
+from pymongo import UpdateOne
+
+from assessment_stats import record_assessment_stats
+from assessments_utils import (
+    BATCH_SCORERS,
+    HISTORY_COMPACT_PROJECTION,
+    HISTORY_SORT,
+    InstrumentPlan,
+    attach_deltas,
+    history_cursor,
+    history_cursor_filter,
+    instrument_registry,
+)
+from auth import award_xp, get_current_user, require_admin
+from badges import record_assessment_completed
+from concurrency_utils import run_concurrently
 from database import db
+from export_utils import (
+    EXPORT_MEDIA_TYPES,
+    EXPORT_PROJECTION,
+    build_export_query,
+    csv_columns,
+    stream_export,
+)
+
+RESCORE_CHUNK_SIZE = int(os.getenv("RESCORE_CHUNK_SIZE", "5000"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CSV_COLUMNS = csv_columns(instrument_registry)
 
 router = APIRouter()
 
 
-class DASS21Response(BaseModel):
-    responses: Dict[int, int]
-
-
-class PHQ9Response(BaseModel):
+class AssessmentSubmission(BaseModel):
     responses: Dict[int, int]
 
 
-# ----- DASS-21 utilities -----
-
-
-def generate_ai_analysis(
-    dep_score, anx_score, stress_score, dep_level, anx_level, stress_level
-):
-    analysis = "بر اساس تجزیه و تحلیل پاسخ‌های شما: "
-    if dep_level == "عادی" and anx_level == "عادی" and stress_level == "عادی":
-        analysis += "نتایج شما در محدوده طبیعی قرار دارد. شما وضعیت روحی مناسبی دارید."
-    elif any(
-        level in ["شدید", "بسیار شدید"]
-        for level in [dep_level, anx_level, stress_level]
-    ):
-        analysis += "نتایج نشان می‌دهد که شما در حال حاضر با چالش‌های قابل توجه سلامت روان مواجه هستید. توصیه می‌شود با یک متخصص مشورت کنید."
-    else:
-        analysis += "نتایج نشان می‌دهد که شما نیاز به توجه بیشتر به سلامت روان خود دارید. با اعمال تکنیک‌های مدیریت استرس می‌توانید بهبود یابید."
-    return analysis
-
-
-def generate_recommendations(dep_level, anx_level, stress_level):
-    recommendations = []
-    if dep_level != "عادی":
-        recommendations.extend(
-            [
-                "تمرین روزانه تنفس عمیق و مدیتیشن",
-                "حفظ برنامه خواب منظم (7-8 ساعت)",
-                "فعالیت بدنی منظم، حداقل 30 دقیقه در روز",
-            ]
-        )
-    if anx_level != "عادی":
-        recommendations.extend(
-            [
-                "تکنیک‌های آرام‌سازی عضلانی",
-                "محدود کردن کافئین و مواد محرک",
-                "تمرین ذهن‌آگاهی (Mindfulness)",
-            ]
-        )
-    if stress_level != "عادی":
-        recommendations.extend(
-            [
-                "مدیریت زمان و اولویت‌بندی کارها",
-                "ایجاد تعادل بین کار و زندگی",
-                "استفاده از تکنیک‌های حل مسئله",
-            ]
-        )
-    if all(level == "عادی" for level in [dep_level, anx_level, stress_level]):
-        recommendations = [
-            "ادامه سبک زندگی سالم فعلی",
-            "حفظ روابط اجتماعی مثبت",
-            "ارزیابی دوره‌ای سلامت روان",
-        ]
-    return recommendations[:5]
-
-
-def calculate_dass_scores(responses: Dict[int, int]) -> Dict[str, Any]:
-    depression_questions = [3, 5, 10, 13, 16, 17, 21]
-    anxiety_questions = [2, 4, 7, 9, 15, 19, 20]
-    stress_questions = [1, 6, 8, 11, 12, 14, 18]
-
-    depression_score = sum(responses.get(q, 0) for q in depression_questions) * 2
-    anxiety_score = sum(responses.get(q, 0) for q in anxiety_questions) * 2
-    stress_score = sum(responses.get(q, 0) for q in stress_questions) * 2
-
-    def get_depression_level(score):
-        if score <= 9:
-            return "عادی"
-        elif score <= 13:
-            return "خفیف"
-        elif score <= 20:
-            return "متوسط"
-        elif score <= 27:
-            return "شدید"
-        else:
-            return "بسیار شدید"
-
-    def get_anxiety_level(score):
-        if score <= 7:
-            return "عادی"
-        elif score <= 9:
-            return "خفیف"
-        elif score <= 14:
-            return "متوسط"
-        elif score <= 19:
-            return "شدید"
-        else:
-            return "بسیار شدید"
-
-    def get_stress_level(score):
-        if score <= 14:
-            return "عادی"
-        elif score <= 18:
-            return "خفیف"
-        elif score <= 25:
-            return "متوسط"
-        elif score <= 33:
-            return "شدید"
-        else:
-            return "بسیار شدید"
-
-    depression_level = get_depression_level(depression_score)
-    anxiety_level = get_anxiety_level(anxiety_score)
-    stress_level = get_stress_level(stress_score)
-
-    ai_analysis = generate_ai_analysis(
-        depression_score,
-        anxiety_score,
-        stress_score,
-        depression_level,
-        anxiety_level,
-        stress_level,
-    )
-
-    recommendations = generate_recommendations(
-        depression_level, anxiety_level, stress_level
+async def rescore_assessments(chunk_size: int = RESCORE_CHUNK_SIZE) -> Dict[str, int]:
+    """Re-score every stored assessment with the current scoring tables.
+
+    Assessments are read in chunks, scored as a matrix per type and only
+    those whose ``results`` changed are written back, one ``bulk_write``
+    per chunk, so memory stays bounded by ``chunk_size``.
+    """
+    counts = {"scanned": 0, "updated": 0}
+
+    async def flush(chunk: List[Dict[str, Any]]) -> None:
+        updates = []
+        for assessment_type, scorer in BATCH_SCORERS.items():
+            docs = [doc for doc in chunk if doc.get("assessment_type") == assessment_type]
+            if not docs:
+                continue
+            scored = scorer([doc.get("responses") or {} for doc in docs])
+            updates.extend(
+                UpdateOne({"_id": doc["_id"]}, {"$set": {"results": results}})
+                for doc, results in zip(docs, scored)
+                if doc.get("results") != results
+            )
+        if updates:
+            await db.assessments.bulk_write(updates, ordered=False)
+        counts["scanned"] += len(chunk)
+        counts["updated"] += len(updates)
+
+    chunk: List[Dict[str, Any]] = []
+    cursor = db.assessments.find(
+        {"assessment_type": {"$in": list(BATCH_SCORERS)}},
+        {"_id": 1, "assessment_type": 1, "responses": 1, "results": 1},
+    ).batch_size(chunk_size)
+    async for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= chunk_size:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+    return counts
+
+
+async def _submit(plan: InstrumentPlan, responses: Dict[int, int], current_user) -> Dict[str, Any]:
+    error = plan.validation_error(responses)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    results = plan.score(responses)
+    assessment_doc = {
+        "assessment_id": str(uuid.uuid4()),
+        "user_id": current_user["user_id"],
+        "assessment_type": plan.id,
+        "responses": {str(k): v for k, v in responses.items()},
+        "results": results,
+        "completed_at": datetime.utcnow(),
+    }
+    await db.assessments.insert_one(assessment_doc)
+    # Once the assessment is stored, its statistics, XP and badges are independent.
+    await run_concurrently(
+        record_assessment_stats(
+            current_user, plan.id, results, assessment_doc["completed_at"]
+        ),
+        award_xp(current_user["user_id"], plan.xp_amount, plan.xp_source),
+        record_assessment_completed(current_user["user_id"]),
+        cancel_on_error=False,
     )
+    return results
 
-    return {
-        "depression_score": depression_score,
-        "anxiety_score": anxiety_score,
-        "stress_score": stress_score,
-        "depression_level": depression_level,
-        "anxiety_level": anxiety_level,
-        "stress_level": stress_level,
-        "ai_analysis": ai_analysis,
-        "recommendations": recommendations,
-    }
 
+@router.get("/api/instruments")
+async def list_instruments():
+    return [
+        {
+            "id": plan.id,
+            "title": plan.title,
+            "item_count": plan.item_count,
+            "response_range": list(plan.response_range),
+        }
+        for plan in instrument_registry
+    ]
 
-# ----- PHQ-9 utilities -----
-
-
-def generate_phq9_analysis(total_score, severity_level):
-    if severity_level == "حداقل":
-        return "علائم افسردگی شما در سطح حداقل است. این وضعیت طبیعی محسوب می‌شود."
-    elif severity_level == "خفیف":
-        return "علائم افسردگی خفیفی دارید. با تکنیک‌های خودمراقبتی می‌توانید این وضعیت را بهبود بخشید."
-    elif severity_level == "متوسط":
-        return (
-            "علائم افسردگی متوسطی دارید. توصیه می‌شود با یک مشاور یا روان‌شناس صحبت کنید."
-        )
-    elif severity_level == "نسبتاً شدید":
-        return "علائم افسردگی نسبتاً شدیدی دارید. مراجعه به متخصص ضروری است."
-    else:
-        return "علائم افسردگی شدیدی دارید. فوراً با یک روان‌پزشک یا متخصص سلامت روان تماس بگیرید."
-
-
-def generate_phq9_recommendations(severity_level):
-    if severity_level == "حداقل":
-        return ["ادامه فعالیت‌های مثبت فعلی", "حفظ روابط اجتماعی", "ورزش منظم"]
-    elif severity_level == "خفیف":
-        return [
-            "افزایش فعالیت‌های لذت‌بخش",
-            "برقراری ارتباط با دوستان و خانواده",
-            "تمرین ذهن‌آگاهی",
-            "نظم در خواب و تغذیه",
-        ]
-    elif severity_level == "متوسط":
-        return [
-            "مشورت با روان‌شناس یا مشاور",
-            "شرکت در گروه‌های حمایتی",
-            "تمرین تکنیک‌های درمان شناختی-رفتاری",
-            "نظارت بر علائم",
-        ]
-    else:
-        return [
-            "مراجعه فوری به متخصص",
-            "درنظرگیری درمان دارویی",
-            "حمایت خانوادگی",
-            "مراقبت ویژه از خود",
-        ]
-
-
-def calculate_phq9_score(responses: Dict[int, int]) -> Dict[str, Any]:
-    total_score = sum(responses.values())
-
-    def get_severity_level(score):
-        if score <= 4:
-            return "حداقل"
-        elif score <= 9:
-            return "خفیف"
-        elif score <= 14:
-            return "متوسط"
-        elif score <= 19:
-            return "نسبتاً شدید"
-        else:
-            return "شدید"
-
-    severity_level = get_severity_level(total_score)
-    analysis = generate_phq9_analysis(total_score, severity_level)
-    recommendations = generate_phq9_recommendations(severity_level)
 
-    return {
-        "total_score": total_score,
-        "severity_level": severity_level,
-        "analysis": analysis,
-        "recommendations": recommendations,
-    }
+@router.post("/api/assessments/{instrument_id}")
+async def submit_assessment(
+    instrument_id: str, submission: AssessmentSubmission, current_user=Depends(get_current_user)
+):
+    plan = instrument_registry.get(instrument_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="پرسشنامه یافت نشد")
+    return await _submit(plan, submission.responses, current_user)
 
 
 @router.post("/api/submit-dass21")
 async def submit_dass21(
-    dass_data: DASS21Response, current_user=Depends(get_current_user)
+    dass_data: AssessmentSubmission, current_user=Depends(get_current_user)
 ):
-    if len(dass_data.responses) != 21:
-        raise HTTPException(
-            status_code=400, detail="باید به تمام 21 سوال پاسخ داده شود"
-        )
-    results = calculate_dass_scores(dass_data.responses)
-    responses_str_keys = {str(k): v for k, v in dass_data.responses.items()}
-    assessment_doc = {
-        "assessment_id": str(uuid.uuid4()),
-        "user_id": current_user["user_id"],
-        "assessment_type": "DASS-21",
-        "responses": responses_str_keys,
-        "results": results,
-        "completed_at": datetime.utcnow(),
-    }
-    await db.assessments.insert_one(assessment_doc)
-    await award_xp(current_user["user_id"], 10)
-    return results
+    return await _submit(instrument_registry["DASS-21"], dass_data.responses, current_user)
 
 
 @router.post("/api/submit-phq9")
-async def submit_phq9(phq_data: PHQ9Response, current_user=Depends(get_current_user)):
-    if len(phq_data.responses) != 9:
-        raise HTTPException(status_code=400, detail="باید به تمام 9 سوال پاسخ داده شود")
-    results = calculate_phq9_score(phq_data.responses)
-    responses_str_keys = {str(k): v for k, v in phq_data.responses.items()}
-    assessment_doc = {
-        "assessment_id": str(uuid.uuid4()),
-        "user_id": current_user["user_id"],
-        "assessment_type": "PHQ-9",
-        "responses": responses_str_keys,
-        "results": results,
-        "completed_at": datetime.utcnow(),
-    }
-    await db.assessments.insert_one(assessment_doc)
-    await award_xp(current_user["user_id"], 10)
-    return results
+async def submit_phq9(phq_data: AssessmentSubmission, current_user=Depends(get_current_user)):
+    return await _submit(instrument_registry["PHQ-9"], phq_data.responses, current_user)
+
+
+async def _previous_of_type(
+    user_id: str, assessment_type: str, before: datetime
+) -> Optional[Dict[str, Any]]:
+    return await db.assessments.find_one(
+        {"user_id": user_id, "assessment_type": assessment_type, "completed_at": {"$lt": before}},
+        {"_id": 0, "assessment_type": 1, "results": 1},
+        sort=[("completed_at", -1)],
+    )
 
 
 @router.get("/api/assessments")
-async def get_user_assessments(current_user=Depends(get_current_user)):
-    assessments = (
-        await db.assessments.find({"user_id": current_user["user_id"]}, {"_id": 0})
-        .sort("completed_at", -1)
-        .to_list(length=10)
+async def get_user_assessments(
+    assessment_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    compact: bool = False,
+    current_user=Depends(get_current_user),
+):
+    """Newest-first history with per-type score deltas.
+
+    Pass ``next_cursor`` back as ``cursor`` for the next page; it is null
+    on the last page.
+    """
+    user_id = current_user["user_id"]
+    query: Dict[str, Any] = {"user_id": user_id}
+    if assessment_type:
+        query["assessment_type"] = assessment_type
+    if cursor:
+        try:
+            query.update(history_cursor_filter(cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="نشانگر صفحه نامعتبر است")
+    projection = HISTORY_COMPACT_PROJECTION if compact else {"_id": 0}
+    rows = (
+        await db.assessments.find(query, projection)
+        .sort(HISTORY_SORT)
+        .to_list(length=limit + 1)
+    )
+    page, extra = rows[:limit], rows[limit:]
+
+    oldest: Dict[str, Dict[str, Any]] = {}
+    for item in page:
+        oldest[item.get("assessment_type")] = item
+    older: Dict[str, Optional[Dict[str, Any]]] = {}
+    if extra and extra[0].get("assessment_type") in oldest:
+        older[extra[0]["assessment_type"]] = extra[0]
+    missing = [kind for kind in oldest if kind not in older]
+    found = await run_concurrently(
+        *(_previous_of_type(user_id, kind, oldest[kind]["completed_at"]) for kind in missing)
     )
-    return assessments
+    older.update(zip(missing, found))
+
+    return {
+        "items": attach_deltas(page, older),
+        "next_cursor": history_cursor(page[-1]) if extra else None,
+    }
+
+
+async def _export_batches(query: Dict[str, Any], batch_size: int):
+    batch: List[Dict[str, Any]] = []
+    cursor = db.assessments.find(query, EXPORT_PROJECTION).sort("_id", 1).batch_size(batch_size)
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 @router.get("/api/admin/export-data")
-async def export_research_data():
-    assessments = await db.assessments.find(
-        {}, {"_id": 0, "user_id": 0, "assessment_id": 0}
-    ).to_list(length=None)
-    return {"data": assessments, "count": len(assessments)}
+async def export_research_data(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    assessment_type: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[str] = None,
+    _: Any = Depends(require_admin),
+):
+    """Stream assessments in ``_id`` order; resume with ``after=<last cursor>``."""
+    try:
+        query = build_export_query(assessment_type, start, end, after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="نشانگر ادامه خروجی نامعتبر است")
+    filename = f"assessments.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(
+            _export_batches(query, EXPORT_BATCH_SIZE), format, gzip, EXPORT_CSV_COLUMNS
+        ),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
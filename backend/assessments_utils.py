@@ -0,0 +1,321 @@
+"""Table-driven scoring for questionnaires such as DASS-21 and PHQ-9.
+
+Instruments are declared as data in ``data/instruments.json``: items,
+subscales with their items, weight and band cut-offs, and the analysis and
+recommendation texts chosen by rules over the resulting levels. Each is
+compiled once into an ``InstrumentPlan`` holding index tuples, cut-off
+tuples for ``bisect`` and a table of texts for every combination of levels,
+so scoring a submission is a few sums and lookups. The same plan scores
+many stored submissions at once with NumPy for rescoring.
+"""
+
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime
+from functools import lru_cache
+from itertools import product
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+INSTRUMENTS_PATH = os.getenv(
+    "INSTRUMENTS_PATH", os.path.join(os.path.dirname(__file__), "data", "instruments.json")
+)
+
+
+def band(score: int, bounds: Sequence[int]) -> int:
+    """Index of the first level whose upper bound is at least ``score``."""
+    return bisect_left(bounds, score)
+
+
+# ----- Batch scoring -----
+
+
+@lru_cache(maxsize=None)
+def _columns(question_count: int) -> Dict[Any, int]:
+    columns: Dict[Any, int] = {}
+    for q in range(1, question_count + 1):
+        columns[q] = columns[str(q)] = q
+    return columns
+
+
+def response_matrix(
+    batch: Sequence[Mapping[Any, int]], question_count: int
+) -> np.ndarray:
+    """Stack stored responses into an ``(n, question_count + 1)`` int matrix.
+
+    Column ``q`` holds the answer to question ``q``; column 0 collects the
+    answers stored under any other key so row totals still equal the sum
+    of all stored values, as ``calculate_phq9_score`` computes them. Keys
+    may be ints or the string keys used in stored documents.
+    """
+    width = question_count + 1
+    columns = _columns(question_count)
+    sizes = np.fromiter((len(r) for r in batch), dtype=np.int64, count=len(batch))
+    cells = np.repeat(np.arange(len(batch), dtype=np.int64) * width, sizes)
+    cells += np.fromiter(
+        (columns.get(key, 0) for r in batch for key in r), dtype=np.int64, count=cells.size
+    )
+    values = np.fromiter(
+        (value for r in batch for value in r.values()), dtype=np.int64, count=cells.size
+    )
+    matrix = np.zeros(len(batch) * width, dtype=np.int64)
+    np.add.at(matrix, cells, values)
+    return matrix.reshape(len(batch), width)
+
+
+# ----- Instruments -----
+
+
+class Subscale:
+    def __init__(self, spec: Mapping[str, Any], item_count: int) -> None:
+        self.name: str = spec["name"]
+        self.score_field: str = spec["score_field"]
+        self.level_field: str = spec["level_field"]
+        self.weight: int = spec.get("weight", 1)
+        items = spec["items"]
+        # "all" sums every submitted answer rather than a fixed item list.
+        self.items: Optional[Tuple[int, ...]] = None if items == "all" else tuple(items)
+        if self.items is not None and not all(1 <= q <= item_count for q in self.items):
+            raise ValueError(f"{self.name}: items must be between 1 and {item_count}")
+        bands = spec["bands"]
+        self.bounds: Tuple[int, ...] = tuple(b["max"] for b in bands[:-1])
+        self.labels: Tuple[str, ...] = tuple(b["label"] for b in bands)
+        if "max" in bands[-1] or list(self.bounds) != sorted(set(self.bounds)):
+            raise ValueError(f"{self.name}: band maxima must increase and the last band is open")
+
+    def score(self, responses: Mapping[int, int]) -> int:
+        if self.items is None:
+            return sum(responses.values()) * self.weight
+        return sum(responses.get(q, 0) for q in self.items) * self.weight
+
+
+def _condition(when: Mapping[str, Any], subscales: Sequence[Subscale]):
+    """Compile a rule condition into a predicate over a tuple of levels."""
+    names = [s.name for s in subscales]
+    if not when:
+        return lambda levels: True
+    if "all_in" in when:
+        allowed = set(when["all_in"])
+        return lambda levels: all(level in allowed for level in levels)
+    if "any_in" in when:
+        allowed = set(when["any_in"])
+        return lambda levels: any(level in allowed for level in levels)
+    if when.get("subscale") not in names:
+        raise ValueError(f"Unknown subscale in rule: {when.get('subscale')}")
+    index = names.index(when["subscale"])
+    if "in" in when:
+        allowed = set(when["in"])
+        return lambda levels: levels[index] in allowed
+    excluded = set(when["not_in"])
+    return lambda levels: levels[index] not in excluded
+
+
+class InstrumentPlan:
+    """One instrument compiled for scoring."""
+
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self.id: str = spec["id"]
+        self.title: str = spec.get("title", self.id)
+        self.item_count: int = spec["item_count"]
+        self.response_range: Tuple[int, int] = tuple(spec["response_range"])
+        self.xp_amount: int = spec.get("xp", {}).get("amount", 0)
+        self.xp_source: str = spec.get("xp", {}).get("source", "api")
+        self.subscales = tuple(Subscale(s, self.item_count) for s in spec["subscales"])
+        self.analysis_field: str = spec["analysis"]["field"]
+        self.outcomes = self._compile_outcomes(spec["analysis"], spec["recommendations"])
+
+    def _compile_outcomes(
+        self, analysis: Mapping[str, Any], recommendations: Mapping[str, Any]
+    ) -> Dict[Tuple[int, ...], Tuple[str, Tuple[str, ...]]]:
+        """Analysis text and recommendations for every combination of levels."""
+        text_rules = [(_condition(r.get("when", {}), self.subscales), r["text"]) for r in analysis["rules"]]
+        item_rules = [
+            (_condition(r.get("when", {}), self.subscales), tuple(r["items"]))
+            for r in recommendations["rules"]
+        ]
+        collect = recommendations.get("mode", "first") == "all"
+        limit = recommendations.get("limit")
+        outcomes = {}
+        for codes in product(*(range(len(s.labels)) for s in self.subscales)):
+            levels = tuple(s.labels[c] for s, c in zip(self.subscales, codes))
+            text = next((t for matches, t in text_rules if matches(levels)), None)
+            if text is None:
+                raise ValueError(f"{self.id}: no analysis rule matches {levels}")
+            items: Tuple[str, ...] = ()
+            for matches, rule_items in item_rules:
+                if matches(levels):
+                    items += rule_items
+                    if not collect:
+                        break
+            outcomes[codes] = (analysis.get("prefix", "") + text, items[:limit])
+        return outcomes
+
+    @property
+    def score_fields(self) -> Tuple[str, ...]:
+        return tuple(s.score_field for s in self.subscales)
+
+    @property
+    def level_fields(self) -> Tuple[str, ...]:
+        return tuple(s.level_field for s in self.subscales)
+
+    def metric_bands(self) -> Dict[str, Tuple[Tuple[int, ...], Tuple[str, ...]]]:
+        """Score field -> (cut-offs, level labels)."""
+        return {s.score_field: (s.bounds, s.labels) for s in self.subscales}
+
+    def validation_error(self, responses: Mapping[int, int]) -> Optional[str]:
+        """Persian message describing why ``responses`` is invalid, if it is."""
+        if len(responses) != self.item_count:
+            return f"باید به تمام {self.item_count} سوال پاسخ داده شود"
+        if not all(1 <= q <= self.item_count for q in responses):
+            return f"شماره سوال‌ها باید بین 1 و {self.item_count} باشد"
+        low, high = self.response_range
+        if not all(low <= v <= high for v in responses.values()):
+            return f"پاسخ‌ها باید بین {low} و {high} باشد"
+        return None
+
+    def _result(self, scores: Sequence[int], codes: Tuple[int, ...]) -> Dict[str, Any]:
+        analysis, recommendations = self.outcomes[codes]
+        result: Dict[str, Any] = {}
+        for subscale, score in zip(self.subscales, scores):
+            result[subscale.score_field] = score
+        for subscale, code in zip(self.subscales, codes):
+            result[subscale.level_field] = subscale.labels[code]
+        result[self.analysis_field] = analysis
+        result["recommendations"] = list(recommendations)
+        return result
+
+    def score(self, responses: Mapping[int, int]) -> Dict[str, Any]:
+        scores = [s.score(responses) for s in self.subscales]
+        codes = tuple(band(score, s.bounds) for s, score in zip(self.subscales, scores))
+        return self._result(scores, codes)
+
+    def score_batch(self, batch: Sequence[Mapping[Any, int]]) -> List[Dict[str, Any]]:
+        """``score`` for many stored response dicts at once."""
+        matrix = response_matrix(batch, self.item_count)
+        scores = []
+        codes = []
+        for subscale in self.subscales:
+            if subscale.items is None:
+                sums = matrix.sum(axis=1)
+            else:
+                sums = matrix[:, list(subscale.items)].sum(axis=1)
+            sums = sums * subscale.weight
+            scores.append(sums.tolist())
+            codes.append(np.searchsorted(subscale.bounds, sums, side="left").tolist())
+        return [self._result(row, tuple(row_codes)) for row, row_codes in zip(zip(*scores), zip(*codes))]
+
+
+class InstrumentRegistry:
+    def __init__(self, specs: Sequence[Mapping[str, Any]]) -> None:
+        self.plans: Dict[str, InstrumentPlan] = {}
+        for spec in specs:
+            if spec["id"] in self.plans:
+                raise ValueError(f"Duplicate instrument id: {spec['id']}")
+            self.plans[spec["id"]] = InstrumentPlan(spec)
+
+    @classmethod
+    def from_file(cls, path: str = INSTRUMENTS_PATH) -> "InstrumentRegistry":
+        with open(path, encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def get(self, instrument_id: str) -> Optional[InstrumentPlan]:
+        return self.plans.get(instrument_id)
+
+    def __getitem__(self, instrument_id: str) -> InstrumentPlan:
+        return self.plans[instrument_id]
+
+    def __iter__(self) -> Iterator[InstrumentPlan]:
+        return iter(self.plans.values())
+
+
+instrument_registry = InstrumentRegistry.from_file()
+DASS_QUESTION_COUNT = instrument_registry["DASS-21"].item_count
+PHQ9_QUESTION_COUNT = instrument_registry["PHQ-9"].item_count
+
+
+def calculate_dass_scores(responses: Dict[int, int]) -> Dict[str, Any]:
+    return instrument_registry["DASS-21"].score(responses)
+
+
+def calculate_phq9_score(responses: Dict[int, int]) -> Dict[str, Any]:
+    return instrument_registry["PHQ-9"].score(responses)
+
+
+def score_dass_batch(batch: Sequence[Mapping[Any, int]]) -> List[Dict[str, Any]]:
+    return instrument_registry["DASS-21"].score_batch(batch)
+
+
+def score_phq9_batch(batch: Sequence[Mapping[Any, int]]) -> List[Dict[str, Any]]:
+    return instrument_registry["PHQ-9"].score_batch(batch)
+
+
+BATCH_SCORERS = {plan.id: plan.score_batch for plan in instrument_registry}
+
+
+# ----- History -----
+
+SCORE_FIELDS = {plan.id: plan.score_fields for plan in instrument_registry}
+# Drops the raw answers and the long analysis and recommendation texts.
+HISTORY_COMPACT_PROJECTION = {
+    "_id": 0,
+    "responses": 0,
+    **{f"results.{plan.analysis_field}": 0 for plan in instrument_registry},
+    "results.recommendations": 0,
+}
+
+
+# Newest first; ``assessment_id`` orders submissions with the same timestamp.
+HISTORY_SORT = [("completed_at", -1), ("assessment_id", -1)]
+
+
+def history_cursor(doc: Mapping[str, Any]) -> str:
+    """Opaque position of ``doc`` in ``HISTORY_SORT`` order."""
+    return f"{doc['completed_at'].isoformat()}|{doc.get('assessment_id', '')}"
+
+
+def history_cursor_filter(cursor: str) -> Dict[str, Any]:
+    """Filter for the rows after ``cursor`` in ``HISTORY_SORT`` order."""
+    try:
+        stamp, assessment_id = cursor.split("|", 1)
+        completed_at = datetime.fromisoformat(stamp)
+    except ValueError:
+        raise ValueError(f"Invalid history cursor: {cursor!r}")
+    return {
+        "$or": [
+            {"completed_at": {"$lt": completed_at}},
+            {"completed_at": completed_at, "assessment_id": {"$lt": assessment_id}},
+        ]
+    }
+
+
+def score_delta(
+    current: Mapping[str, Any], previous: Optional[Mapping[str, Any]]
+) -> Optional[Dict[str, int]]:
+    """Score changes since ``previous``, an older assessment of the same type."""
+    if previous is None:
+        return None
+    now = current.get("results") or {}
+    before = previous.get("results") or {}
+    return {
+        field: now[field] - before[field]
+        for field in SCORE_FIELDS.get(current.get("assessment_type"), ())
+        if isinstance(now.get(field), int) and isinstance(before.get(field), int)
+    }
+
+
+def attach_deltas(
+    items: List[Dict[str, Any]], older: Mapping[str, Optional[Mapping[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """Set ``delta`` on newest-first ``items``.
+
+    ``older`` maps each type to the assessment preceding the oldest item of
+    that type in ``items`` (or ``None`` when there is none).
+    """
+    previous: Dict[str, Optional[Mapping[str, Any]]] = dict(older)
+    for item in reversed(items):
+        kind = item.get("assessment_type")
+        item["delta"] = score_delta(item, previous.get(kind))
+        previous[kind] = item
+    return items
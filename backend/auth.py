@@ -1,22 +1,26 @@
-from datetime import datetime, timedelta
-import os
+from datetime import datetime
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-import bcrypt
 import jwt
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, EmailStr
+from pymongo import ReturnDocument, UpdateOne
 
+from badges import grant_badges
 from database import db
-from gamification_utils import calculate_level_and_badges
+from events import publish_gamification
+from gamification_utils import build_award_pipeline
+from leaderboard import leaderboard
+from passwords import PasswordHasherBusy, hash_password, needs_rehash, verify_password
+from sessions import create_session, revoke_session, rotate_session
+from tokens import create_access_token as issue_access_token, decode_access_token
+from user_cache import user_cache
+from user_memory import create_user_memory, get_user_memory
+from xp_ledger import record_xp_event
 
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
-SECRET_KEY = os.getenv("SECRET_KEY")
-if not SECRET_KEY:
-    raise RuntimeError("SECRET_KEY environment variable is required")
 
 security = HTTPBearer()
 
@@ -40,67 +44,93 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: Dict[str, Any]
+    refresh_token: Optional[str] = None
 
 
-router = APIRouter()
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+class RefreshedToken(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
 
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+router = APIRouter()
+
+
+def hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="سرور مشغول است، لطفاً دوباره تلاش کنید",
+    )
 
 
 def create_access_token(data: Dict[str, Any]) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return issue_access_token(data, ACCESS_TOKEN_EXPIRE_MINUTES)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-):
+async def user_from_token(token: str):
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-            )
-        user = await db.users.find_one({"user_id": user_id})
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-            )
-        return user
+        payload = decode_access_token(token)
     except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    user = await user_cache.get(user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+    return user
 
 
-async def award_xp(user_id: str, amount: int):
-    user = await db.users.find_one({"user_id": user_id})
-    if not user:
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    return await user_from_token(credentials.credentials)
+
+
+async def require_admin(current_user=Depends(get_current_user)):
+    if not current_user.get("is_admin"):
+        raise HTTPException(status_code=403, detail="دسترسی غیرمجاز")
+    return current_user
+
+
+async def award_xp(user_id: str, amount: int, source: str = "manual"):
+    principal = await user_cache.get(user_id)
+    if principal is None:
         return
-    xp = user.get("xp", 0) + amount
-    level, badges = calculate_level_and_badges(xp)
-    await db.users.update_one(
+    # The ledger is the source of truth, so the event is stored first: if
+    # the counter update below fails, ``recompute_xp`` restores the award.
+    await record_xp_event(user_id, amount, source, principal.get("student_level"))
+    user = await db.users.find_one_and_update(
         {"user_id": user_id},
-        {"$set": {"xp": xp, "level": level, "badges": badges}},
+        build_award_pipeline(amount),
+        projection={"_id": 0, "xp": 1, "level": 1, "badges": 1},
+        return_document=ReturnDocument.AFTER,
     )
-    return {"xp": xp, "level": level, "badges": badges}
+    if not user:
+        return
+    badges = user.get("badges", [])
+    badges = badges + await grant_badges(user_id, "xp", user["xp"], badges)
+    await leaderboard.update(user_id, user["xp"])
+    await user_cache.invalidate(user_id)
+    state = {"xp": user["xp"], "level": user["level"], "badges": badges}
+    await publish_gamification(user_id, state)
+    return state
 
 
 @router.post("/api/register", response_model=Token)
-async def register_user(user_data: UserRegister):
+async def register_user(user_data: UserRegister, request: Request):
     if not user_data.consentGiven:
         raise HTTPException(status_code=400, detail="رضایت‌نامه باید تایید شود")
     if user_data.password != user_data.confirmPassword:
@@ -111,7 +141,10 @@ async def register_user(user_data: UserRegister):
             status_code=400, detail="کاربری با این ایمیل قبلاً ثبت‌نام کرده است"
         )
     user_id = str(uuid.uuid4())
-    hashed_password = hash_password(user_data.password)
+    try:
+        hashed_password = await hash_password(user_data.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
     user_doc = {
         "user_id": user_id,
         "email": user_data.email,
@@ -124,10 +157,10 @@ async def register_user(user_data: UserRegister):
         "last_login": datetime.utcnow(),
         "xp": 0,
         "level": 1,
-        "memory": {},
         "badges": [],
     }
     await db.users.insert_one(user_doc)
+    await create_user_memory(user_id)
     access_token = create_access_token(data={"sub": user_id})
     user_response = {
         "user_id": user_id,
@@ -140,17 +173,43 @@ async def register_user(user_data: UserRegister):
         "memory": {},
         "badges": [],
     }
-    return {"access_token": access_token, "token_type": "bearer", "user": user_response}
+    refresh_token = await create_session(user_id, request.headers.get("user-agent"))
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "user": user_response,
+    }
 
 
 @router.post("/api/login", response_model=Token)
-async def login_user(user_data: UserLogin):
+async def login_user(user_data: UserLogin, request: Request):
     user = await db.users.find_one({"email": user_data.email})
-    if not user or not verify_password(user_data.password, user["password"]):
+    try:
+        valid = user is not None and await verify_password(
+            user_data.password, user["password"]
+        )
+        rehashed = (
+            await hash_password(user_data.password)
+            if valid and needs_rehash(user["password"])
+            else None
+        )
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    if not valid:
         raise HTTPException(status_code=400, detail="ایمیل یا رمز عبور اشتباه است")
-    await db.users.update_one(
-        {"user_id": user["user_id"]}, {"$set": {"last_login": datetime.utcnow()}}
-    )
+    updates = [UpdateOne({"user_id": user["user_id"]}, {"$set": {"last_login": datetime.utcnow()}})]
+    if rehashed:
+        # Transparently upgrade hashes when BCRYPT_ROUNDS changes; matching
+        # the old hash never overwrites a concurrent password change.
+        updates.append(
+            UpdateOne(
+                {"user_id": user["user_id"], "password": user["password"]},
+                {"$set": {"password": rehashed}},
+            )
+        )
+    await db.users.bulk_write(updates, ordered=False)
+    await user_cache.invalidate(user["user_id"])
     access_token = create_access_token(data={"sub": user["user_id"]})
     user_response = {
         "user_id": user["user_id"],
@@ -160,10 +219,43 @@ async def login_user(user_data: UserLogin):
         "student_level": user["student_level"],
         "xp": user.get("xp", 0),
         "level": user.get("level", 1),
-        "memory": user.get("memory", {}),
+        "memory": await get_user_memory(user["user_id"]),
         "badges": user.get("badges", []),
     }
-    return {"access_token": access_token, "token_type": "bearer", "user": user_response}
+    refresh_token = await create_session(
+        user["user_id"], request.headers.get("user-agent")
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "user": user_response,
+    }
+
+
+@router.post("/api/token/refresh", response_model=RefreshedToken)
+async def refresh_access_token(data: RefreshRequest):
+    rotated = await rotate_session(data.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="نشست منقضی شده است"
+        )
+    user_id, refresh_token = rotated
+    if await user_cache.get(user_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+    return {
+        "access_token": create_access_token(data={"sub": user_id}),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post("/api/logout")
+async def logout(data: RefreshRequest):
+    await revoke_session(data.refresh_token)
+    return {"message": "خروج با موفقیت انجام شد"}
 
 
 @router.get("/api/profile")
@@ -176,6 +268,11 @@ async def get_profile(current_user=Depends(get_current_user)):
         "student_level": current_user["student_level"],
         "xp": current_user.get("xp", 0),
         "level": current_user.get("level", 1),
-        "memory": current_user.get("memory", {}),
+        "memory": await get_user_memory(current_user["user_id"]),
         "badges": current_user.get("badges", []),
     }
+
+
+@router.get("/api/admin/cache-stats")
+async def cache_stats(_: Any = Depends(require_admin)):
+    return {"user_cache": user_cache.stats()}
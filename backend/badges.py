@@ -0,0 +1,82 @@
+"""Grant badges from the data-driven rule catalog as progress changes.
+
+Each ``record_*`` helper updates the metric its trigger watches and checks
+only that trigger's rules; newly earned badges are added with ``$addToSet``
+so concurrent grants never rewrite or drop each other's badges.
+"""
+
+from datetime import datetime
+from typing import Iterable, List
+
+from pymongo import ReturnDocument
+
+from database import db
+from events import publish_gamification
+from gamification_utils import badge_catalog, calculate_streak
+from user_cache import user_cache
+
+
+async def grant_badges(
+    user_id: str, trigger: str, value: int, current: Iterable[str]
+) -> List[str]:
+    """Add the badges ``value`` has newly unlocked; return their ids."""
+    new = badge_catalog.new_badges(trigger, value, current)
+    if new:
+        await db.users.update_one(
+            {"user_id": user_id}, {"$addToSet": {"badges": {"$each": new}}}
+        )
+    return new
+
+
+async def _announce(user_id: str) -> None:
+    """Refresh caches and push the new badge list to open streams."""
+    await user_cache.invalidate(user_id)
+    user = await db.users.find_one(
+        {"user_id": user_id}, {"_id": 0, "xp": 1, "level": 1, "badges": 1}
+    )
+    if user:
+        await publish_gamification(user_id, user)
+
+
+async def _increment_and_grant(user_id: str, counter: str, trigger: str) -> List[str]:
+    user = await db.users.find_one_and_update(
+        {"user_id": user_id},
+        {"$inc": {f"stats.{counter}": 1}},
+        projection={"_id": 0, "stats": 1, "badges": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not user:
+        return []
+    new = await grant_badges(
+        user_id, trigger, user["stats"][counter], user.get("badges", [])
+    )
+    if new:
+        await _announce(user_id)
+    return new
+
+
+async def record_assessment_completed(user_id: str) -> List[str]:
+    return await _increment_and_grant(user_id, "assessments", "assessment")
+
+
+async def record_journey_completed(user_id: str) -> List[str]:
+    return await _increment_and_grant(user_id, "journeys_completed", "journey_completed")
+
+
+async def record_daily_entry(user_id: str) -> List[str]:
+    """Extend the daily check-in streak and grant streak badges."""
+    user = await db.users.find_one(
+        {"user_id": user_id}, {"_id": 0, "stats": 1, "badges": 1}
+    )
+    if not user:
+        return []
+    stats = user.get("stats", {})
+    streak = calculate_streak(stats.get("last_entry_at"), stats.get("streak", 0))
+    await db.users.update_one(
+        {"user_id": user_id},
+        {"$set": {"stats.streak": streak, "stats.last_entry_at": datetime.utcnow()}},
+    )
+    new = await grant_badges(user_id, "streak", streak, user.get("badges", []))
+    if new:
+        await _announce(user_id)
+    return new
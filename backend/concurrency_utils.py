@@ -0,0 +1,59 @@
+"""Structured concurrency for independent steps of a request handler.
+
+Steps that neither read nor depend on each other's writes (a lookup and
+CPU-bound text analysis, the XP award and badge counter that follow a
+stored submission) are awaited together, so a handler takes roughly as long
+as its slowest step rather than the sum of all of them. A write that the
+other steps depend on must be awaited on its own first.
+"""
+
+import asyncio
+from typing import Any, Awaitable, List
+
+
+async def _await(awaitable: Awaitable[Any]) -> Any:
+    return await awaitable
+
+
+def _first_error(group: BaseExceptionGroup) -> BaseException:
+    """The first failure in ``group``, preferring real errors to cancellations."""
+    leaves: List[BaseException] = []
+
+    def collect(exc: BaseException) -> None:
+        if isinstance(exc, BaseExceptionGroup):
+            for inner in exc.exceptions:
+                collect(inner)
+        else:
+            leaves.append(exc)
+
+    collect(group)
+    for exc in leaves:
+        if not isinstance(exc, asyncio.CancelledError):
+            return exc
+    return leaves[0]
+
+
+async def run_concurrently(*steps: Awaitable[Any], cancel_on_error: bool = True) -> List[Any]:
+    """Await ``steps`` concurrently and return their results in order.
+
+    If any step fails the others are cancelled, and the first failure is
+    re-raised as-is (not wrapped in an ``ExceptionGroup``) so that
+    ``HTTPException`` and friends still reach FastAPI's handlers. Wrap
+    blocking calls in ``asyncio.to_thread`` to run them alongside I/O.
+
+    With ``cancel_on_error=False`` every step runs to completion before the
+    first failure is raised; use it for side effects that must not be cut
+    off half-way (e.g. ``award_xp`` between its total and ledger writes).
+    """
+    if not cancel_on_error:
+        results = await asyncio.gather(*steps, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return list(results)
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(_await(step)) for step in steps]
+    except BaseExceptionGroup as exc:
+        raise _first_error(exc) from exc
+    return [task.result() for task in tasks]
@@ -6,6 +6,11 @@ load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "mental_health_db")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
 
-client = AsyncIOMotorClient(MONGO_URL)
+# One pooled client per process, shared by every router.
+client = AsyncIOMotorClient(
+    MONGO_URL, maxPoolSize=MONGO_MAX_POOL_SIZE, minPoolSize=MONGO_MIN_POOL_SIZE
+)
 db = client[DB_NAME]
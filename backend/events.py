@@ -0,0 +1,101 @@
+"""Per-user event pub/sub behind the gamification push stream.
+
+Publishers call ``publish``; stream handlers ``subscribe`` to a user's
+events. Without ``REDIS_URL`` events fan out to subscribers in this process
+only. With it every publish goes through Redis pub/sub and each process
+relays messages to its own subscribers, so awards made by any replica or
+service reach the connection wherever it is held.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from pubsub_utils import Subscriptions
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis backend is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+EVENTS_CHANNEL_PREFIX = "user-events:"
+
+
+class EventBroker:
+    def __init__(self) -> None:
+        self.local = Subscriptions()
+        self.redis = (
+            aioredis.from_url(REDIS_URL, decode_responses=True)
+            if aioredis and REDIS_URL
+            else None
+        )
+        self._listener: Optional["asyncio.Task[None]"] = None
+
+    async def publish(self, user_id: str, event: str, data: Dict[str, Any]) -> None:
+        message = {"event": event, "data": data}
+        if self.redis is not None:
+            try:
+                await self.redis.publish(
+                    EVENTS_CHANNEL_PREFIX + user_id, json.dumps(message, default=str)
+                )
+                return
+            except Exception:
+                logger.warning("Redis publish failed; delivering locally", exc_info=True)
+        self.local.fanout(user_id, message)
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        if self.redis is not None and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._relay())
+        return self.local.subscribe(user_id)
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        self.local.unsubscribe(user_id, queue)
+
+    async def _relay(self) -> None:
+        """Forward Redis messages to this process's subscribers."""
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.psubscribe(EVENTS_CHANNEL_PREFIX + "*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    user_id = message["channel"][len(EVENTS_CHANNEL_PREFIX):]
+                    self.local.fanout(user_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Redis event relay failed; reconnecting", exc_info=True)
+                await asyncio.sleep(1)
+
+
+broker = EventBroker()
+
+
+def require_shared_events() -> None:
+    """Refuse to start a split service whose events would stay in-process.
+
+    Awards made by the trackers, assessments or journeys services only reach
+    streams held by the gamification service through Redis pub/sub.
+    """
+    if broker.redis is None:
+        raise RuntimeError(
+            "REDIS_URL (and the redis package) is required when running split services"
+        )
+
+
+async def publish_gamification(user_id: str, state: Dict[str, Any]) -> None:
+    await broker.publish(
+        user_id,
+        "gamification",
+        {
+            "xp": state.get("xp", 0),
+            "level": state.get("level", 1),
+            "badges": state.get("badges", []),
+        },
+    )
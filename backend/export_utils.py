@@ -0,0 +1,134 @@
+"""Streaming encoders for the research export.
+
+Rows are encoded one cursor batch at a time into NDJSON or CSV, optionally
+gzip-compressed on the fly, so memory depends on the batch size and never
+on how many rows are exported. Every row carries an opaque ``cursor``;
+passing the last one received back as ``after`` resumes the export.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Identity fields are never exported.
+EXPORT_PROJECTION = {"user_id": 0, "assessment_id": 0}
+
+
+def csv_columns(plans: Iterable[Any]) -> Tuple[str, ...]:
+    """CSV header for the instrument ``plans``: each instrument's score and
+    level fields, in declaration order, between the fixed columns."""
+    results: Dict[str, None] = {}
+    for plan in plans:
+        results.update(dict.fromkeys(plan.score_fields + plan.level_fields))
+    return ("cursor", "assessment_type", "completed_at", *results, "responses")
+
+
+def parse_cursor(cursor: str) -> ObjectId:
+    try:
+        return ObjectId(cursor)
+    except (InvalidId, TypeError):
+        raise ValueError(f"Invalid export cursor: {cursor!r}")
+
+
+def build_export_query(
+    assessment_type: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Filter for one export page; ``end`` is exclusive."""
+    query: Dict[str, Any] = {}
+    if assessment_type:
+        query["assessment_type"] = assessment_type
+    if start or end:
+        query["completed_at"] = {}
+        if start:
+            query["completed_at"]["$gte"] = start
+        if end:
+            query["completed_at"]["$lt"] = end
+    if after:
+        query["_id"] = {"$gt": parse_cursor(after)}
+    return query
+
+
+def export_record(doc: Dict[str, Any]) -> Dict[str, Any]:
+    record = {"cursor": str(doc["_id"])}
+    record.update((key, value) for key, value in doc.items() if key != "_id")
+    return record
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_ndjson(docs: List[Dict[str, Any]]) -> str:
+    return "".join(
+        json.dumps(export_record(doc), ensure_ascii=False, default=_json_default) + "\n"
+        for doc in docs
+    )
+
+
+def csv_header(columns: Sequence[str]) -> str:
+    return ",".join(columns) + "\r\n"
+
+
+def encode_csv(docs: List[Dict[str, Any]], columns: Sequence[str]) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for doc in docs:
+        results = doc.get("results") or {}
+        completed_at = doc.get("completed_at")
+        row = {
+            "cursor": str(doc["_id"]),
+            "assessment_type": doc.get("assessment_type"),
+            "completed_at": completed_at.isoformat()
+            if isinstance(completed_at, datetime)
+            else completed_at,
+            "responses": json.dumps(doc.get("responses") or {}, sort_keys=True),
+        }
+        writer.writerow(
+            [row[c] if c in row else results.get(c) for c in columns]
+        )
+    return out.getvalue()
+
+
+async def stream_export(
+    batches: AsyncIterable[List[Dict[str, Any]]],
+    fmt: str = "ndjson",
+    compress: bool = False,
+    columns: Sequence[str] = (),
+) -> AsyncIterator[bytes]:
+    """Encode document batches into response chunks; CSV needs ``columns``."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == "csv" and not columns:
+        raise ValueError("CSV export needs its columns")
+
+    def encode(docs: List[Dict[str, Any]]) -> str:
+        return encode_csv(docs, columns) if fmt == "csv" else encode_ndjson(docs)
+
+    # wbits=31 writes a gzip header and trailer.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    if fmt == "csv":
+        yield emit(csv_header(columns))
+    async for docs in batches:
+        chunk = emit(encode(docs))
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 from auth import award_xp, get_current_user
-from database import db
+from gamification_utils import PERIOD_FORMATS, badge_catalog
+from leaderboard import leaderboard, period_rank, period_top
 
 
 router = APIRouter()
@@ -15,32 +16,72 @@ class AwardRequest(BaseModel):
 
 @router.post("/api/gamification/award")
 async def award_endpoint(request: AwardRequest, current_user=Depends(get_current_user)):
-    return await award_xp(current_user["user_id"], request.xp)
+    return await award_xp(current_user["user_id"], request.xp, "api")
 
 
 @router.get("/api/gamification")
 async def get_gamification(current_user=Depends(get_current_user)):
-    user = await db.users.find_one({"user_id": current_user["user_id"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
     return {
-        "xp": user.get("xp", 0),
-        "level": user.get("level", 1),
-        "badges": user.get("badges", []),
+        "xp": current_user.get("xp", 0),
+        "level": current_user.get("level", 1),
+        "badges": current_user.get("badges", []),
     }
 
 
 @router.get("/api/gamification/leaderboard")
-async def leaderboard() -> List[dict]:
-    users = (
-        await db.users.find({}, {"_id": 0, "user_id": 1, "xp": 1})
-        .sort("xp", -1)
-        .limit(10)
-        .to_list(length=10)
-    )
-    return users
+async def get_leaderboard(
+    page: int = Query(1, ge=1), page_size: int = Query(10, ge=1, le=100)
+) -> List[dict]:
+    return await leaderboard.top((page - 1) * page_size, page_size)
+
+
+@router.get("/api/gamification/leaderboard/me")
+async def my_rank(
+    radius: int = Query(2, ge=0, le=25), current_user=Depends(get_current_user)
+):
+    user_id = current_user["user_id"]
+    return {
+        "user_id": user_id,
+        "rank": await leaderboard.rank(user_id),
+        "total": await leaderboard.size(),
+        "xp": current_user.get("xp", 0),
+        "neighbors": await leaderboard.around(user_id, radius),
+    }
 
 
 @router.get("/api/gamification/badges")
-async def badges_catalog() -> List[str]:
-    return ["Novice", "Expert"]
+async def badges_catalog() -> List[dict]:
+    return badge_catalog.rules
+
+
+def _check_period(period: str) -> None:
+    if period not in PERIOD_FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown leaderboard period")
+
+
+@router.get("/api/gamification/leaderboard/{period}")
+async def get_period_leaderboard(
+    period: str,
+    bucket: Optional[str] = None,
+    student_level: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+) -> List[dict]:
+    _check_period(period)
+    return await period_top(
+        period, (page - 1) * page_size, page_size, bucket, student_level
+    )
+
+
+@router.get("/api/gamification/leaderboard/{period}/me")
+async def my_period_rank(
+    period: str,
+    bucket: Optional[str] = None,
+    cohort: bool = False,
+    current_user=Depends(get_current_user),
+):
+    _check_period(period)
+    student_level = current_user.get("student_level") if cohort else None
+    result = await period_rank(current_user["user_id"], period, bucket, student_level)
+    result["student_level"] = student_level
+    return result
@@ -1,16 +1,315 @@
-from datetime import datetime
-from typing import Optional, Tuple, List
+import json
+import os
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+XP_PER_LEVEL = 100
+BADGE_CATALOG_PATH = os.getenv(
+    "BADGE_CATALOG_PATH", os.path.join(os.path.dirname(__file__), "data", "badges.json")
+)
+TRIGGERS = ("xp", "streak", "assessment", "journey_completed")
+
+
+# Rules live in data/badges.json: each is a threshold on one trigger metric
+# (xp, streak, assessment, journey_completed). Grouping by trigger means an
+# award only evaluates the rules it can change, via a binary search.
+class BadgeCatalog:
+    def __init__(self, rules: Iterable[Dict[str, Any]]) -> None:
+        self.rules: List[Dict[str, Any]] = []
+        seen = set()
+        for rule in rules:
+            if rule["trigger"] not in TRIGGERS:
+                raise ValueError(f"Unknown badge trigger: {rule['trigger']}")
+            if rule["id"] in seen:
+                raise ValueError(f"Duplicate badge id: {rule['id']}")
+            if int(rule["threshold"]) < 1:
+                raise ValueError(f"Badge threshold must be positive: {rule['id']}")
+            seen.add(rule["id"])
+            self.rules.append(dict(rule))
+        self.thresholds: Dict[str, List[int]] = {}
+        self.names: Dict[str, List[str]] = {}
+        for trigger in TRIGGERS:
+            ordered = sorted(
+                (rule for rule in self.rules if rule["trigger"] == trigger),
+                key=lambda rule: rule["threshold"],
+            )
+            self.thresholds[trigger] = [int(rule["threshold"]) for rule in ordered]
+            self.names[trigger] = [rule["id"] for rule in ordered]
+
+    @classmethod
+    def from_file(cls, path: str = BADGE_CATALOG_PATH) -> "BadgeCatalog":
+        with open(path, encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def earned(self, trigger: str, value: int) -> List[str]:
+        """Badges of ``trigger`` whose threshold ``value`` has reached."""
+        thresholds = self.thresholds.get(trigger, [])
+        return self.names.get(trigger, [])[: bisect_right(thresholds, value)]
+
+    def new_badges(self, trigger: str, value: int, current: Iterable[str]) -> List[str]:
+        owned = set(current)
+        return [name for name in self.earned(trigger, value) if name not in owned]
+
+
+badge_catalog = BadgeCatalog.from_file()
 
 
 def calculate_level_and_badges(xp: int) -> Tuple[int, List[str]]:
     """Return level and list of badges based on XP."""
-    level = xp // 100 + 1
-    badges: List[str] = []
-    if xp >= 100:
-        badges.append("Novice")
-    if xp >= 500:
-        badges.append("Expert")
-    return level, badges
+    return xp // XP_PER_LEVEL + 1, badge_catalog.earned("xp", xp)
+
+
+def level_stage() -> Dict[str, Any]:
+    """``$set`` stage deriving ``level`` from ``$xp`` server-side."""
+    return {
+        "$set": {
+            "level": {
+                "$toInt": {"$add": [{"$floor": {"$divide": ["$xp", XP_PER_LEVEL]}}, 1]}
+            }
+        }
+    }
+
+
+def xp_badges_expr() -> Dict[str, Any]:
+    """Aggregation expression listing the XP badges ``$xp`` has reached."""
+    return {
+        "$concatArrays": [
+            {"$cond": [{"$gte": ["$xp", threshold]}, [name], []]}
+            for threshold, name in zip(
+                badge_catalog.thresholds["xp"], badge_catalog.names["xp"]
+            )
+        ]
+    }
+
+
+def build_award_pipeline(amount: int) -> List[Dict[str, Any]]:
+    """Update pipeline adding ``amount`` XP and deriving the level server-side.
+
+    The XP and level change is a single atomic ``find_one_and_update``;
+    badges are added separately with ``$addToSet`` only when one is earned.
+    """
+    return [
+        {"$set": {"xp": {"$add": [{"$ifNull": ["$xp", 0]}, amount]}}},
+        level_stage(),
+    ]
+
+
+def period_buckets(timestamp: datetime) -> Dict[str, str]:
+    """Return the ISO-week and calendar-month bucket keys for a timestamp."""
+    iso = timestamp.isocalendar()
+    return {
+        "week": f"{iso[0]}-W{iso[1]:02d}",
+        "month": timestamp.strftime("%Y-%m"),
+    }
+
+
+# ``$dateToString`` formats producing the same keys as ``period_buckets``.
+PERIOD_FORMATS = {"week": "%G-W%V", "month": "%Y-%m"}
+
+# Days a period bucket is kept after the period ends before the TTL index
+# removes it.
+BUCKET_RETENTION_DAYS = {
+    "week": int(os.getenv("XP_WEEK_BUCKET_RETENTION_DAYS", "56")),
+    "month": int(os.getenv("XP_MONTH_BUCKET_RETENTION_DAYS", "400")),
+}
+
+
+def period_end(timestamp: datetime, period: str) -> datetime:
+    """Start of the week (Monday) or month following ``timestamp``."""
+    day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        return day + timedelta(days=7 - day.weekday())
+    if day.month == 12:
+        return day.replace(year=day.year + 1, month=1, day=1)
+    return day.replace(month=day.month + 1, day=1)
+
+
+def bucket_expiry(timestamp: datetime, period: str) -> datetime:
+    return period_end(timestamp, period) + timedelta(days=BUCKET_RETENTION_DAYS[period])
+
+
+def fold_xp_events(
+    events: Iterable[Dict[str, Any]],
+) -> Tuple[Dict[str, int], Dict[Tuple[str, str, str], Dict[str, Any]]]:
+    """Sum ledger events into per-user totals and per-period buckets.
+
+    Bucket keys are ``(user_id, period, bucket)``; each value carries the
+    summed ``xp``, the user's latest ``student_level`` cohort and the
+    bucket's ``expires_at``.
+    """
+    totals: Dict[str, int] = defaultdict(int)
+    buckets: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for event in sorted(events, key=lambda event: event["created_at"]):
+        user_id, amount = event["user_id"], event["amount"]
+        totals[user_id] += amount
+        for period, bucket in period_buckets(event["created_at"]).items():
+            entry = buckets.setdefault(
+                (user_id, period, bucket),
+                {"xp": 0, "expires_at": bucket_expiry(event["created_at"], period)},
+            )
+            entry["xp"] += amount
+            entry["student_level"] = event.get("student_level")
+    return dict(totals), buckets
+
+
+# Batch ids remembered on each total/bucket so a retried fold is a no-op.
+FOLD_BATCH_MEMORY = 50
+
+Upsert = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+def build_fold_updates(
+    totals: Dict[str, int],
+    buckets: Dict[Tuple[str, str, str], Dict[str, Any]],
+    batch_id: str,
+    now: datetime,
+) -> Tuple[List[Upsert], List[Upsert]]:
+    """``(filter, update)`` upserts applying one folded batch exactly once.
+
+    Each target records the batch in ``folded_batches``; re-applying the
+    same batch matches nothing, and its upsert fails with a duplicate key
+    on the target's unique index, which the caller treats as done.
+    """
+    def applied_once(update: Dict[str, Any]) -> Dict[str, Any]:
+        update["$push"] = {
+            "folded_batches": {"$each": [batch_id], "$slice": -FOLD_BATCH_MEMORY}
+        }
+        return update
+
+    total_updates = [
+        (
+            {"user_id": user_id, "folded_batches": {"$ne": batch_id}},
+            applied_once({"$inc": {"xp": amount}, "$set": {"updated_at": now}}),
+        )
+        for user_id, amount in totals.items()
+    ]
+    bucket_updates = [
+        (
+            {
+                "period": period,
+                "bucket": bucket,
+                "user_id": user_id,
+                "folded_batches": {"$ne": batch_id},
+            },
+            applied_once(
+                {
+                    "$inc": {"xp": entry["xp"]},
+                    "$set": {
+                        "student_level": entry["student_level"],
+                        "expires_at": entry["expires_at"],
+                        "updated_at": now,
+                    },
+                }
+            ),
+        )
+        for (user_id, period, bucket), entry in buckets.items()
+    ]
+    return total_updates, bucket_updates
+
+
+def build_recompute_users_pipeline() -> List[Dict[str, Any]]:
+    """Aggregate the whole ledger into ``users.xp``/``level`` and XP badges."""
+    return [
+        {"$group": {"_id": "$user_id", "xp": {"$sum": "$amount"}}},
+        level_stage(),
+        {"$set": {"badges": xp_badges_expr()}},
+        {"$project": {"_id": 0, "user_id": "$_id", "xp": 1, "level": 1, "badges": 1}},
+        {
+            "$merge": {
+                "into": "users",
+                "on": "user_id",
+                # Keep badges from other triggers; append missing XP badges.
+                "whenMatched": [
+                    {
+                        "$set": {
+                            "xp": "$$new.xp",
+                            "level": "$$new.level",
+                            "badges": {
+                                "$concatArrays": [
+                                    {"$ifNull": ["$badges", []]},
+                                    {
+                                        "$filter": {
+                                            "input": "$$new.badges",
+                                            "cond": {
+                                                "$not": [
+                                                    {"$in": ["$$this", {"$ifNull": ["$badges", []]}]}
+                                                ]
+                                            },
+                                        }
+                                    },
+                                ]
+                            },
+                        }
+                    }
+                ],
+                "whenNotMatched": "discard",
+            }
+        },
+    ]
+
+
+def _expiry_expr(period: str) -> Dict[str, Any]:
+    end = {
+        "$dateAdd": {
+            "startDate": {
+                "$dateTrunc": {"date": "$created_at", "unit": period, "startOfWeek": "monday"}
+            },
+            "unit": period,
+            "amount": 1,
+        }
+    }
+    return {"$dateAdd": {"startDate": end, "unit": "day", "amount": BUCKET_RETENTION_DAYS[period]}}
+
+
+def build_recompute_buckets_pipeline() -> List[Dict[str, Any]]:
+    """Aggregate the whole ledger into one document per user and period bucket."""
+    return [
+        {
+            "$project": {
+                "user_id": 1,
+                "amount": 1,
+                "created_at": 1,
+                "student_level": 1,
+                "periods": [
+                    {
+                        "period": {"$literal": period},
+                        "bucket": {"$dateToString": {"format": fmt, "date": "$created_at"}},
+                        "expires_at": _expiry_expr(period),
+                    }
+                    for period, fmt in PERIOD_FORMATS.items()
+                ],
+            }
+        },
+        {"$unwind": "$periods"},
+        {
+            "$group": {
+                "_id": {
+                    "user_id": "$user_id",
+                    "period": "$periods.period",
+                    "bucket": "$periods.bucket",
+                },
+                "xp": {"$sum": "$amount"},
+                "expires_at": {"$max": "$periods.expires_at"},
+                "student_level": {
+                    "$top": {"sortBy": {"created_at": -1}, "output": "$student_level"}
+                },
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "user_id": "$_id.user_id",
+                "period": "$_id.period",
+                "bucket": "$_id.bucket",
+                "student_level": 1,
+                "expires_at": 1,
+                "xp": 1,
+            }
+        },
+        {"$out": "xp_buckets"},
+    ]
 
 
 def calculate_streak(
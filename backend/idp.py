@@ -1,26 +1,17 @@
 import os
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
-import bcrypt
-import jwt
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 
-SECRET_KEY = os.getenv("IDP_SECRET", "changeme")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
+from database import db
+from passwords import PasswordHasherBusy, hash_password, needs_rehash, verify_password
+from tokens import create_access_token, public_jwks
 
-router = APIRouter()
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("IDP_ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-# In-memory user store for demonstration purposes
-fake_users_db: Dict[str, Dict[str, str]] = {
-    "alice": {
-        "username": "alice",
-        "hashed_password": bcrypt.hashpw(b"password", bcrypt.gensalt()).decode("utf-8"),
-    }
-}
+router = APIRouter()
 
 
 class Token(BaseModel):
@@ -28,30 +19,38 @@ class Token(BaseModel):
     token_type: str
 
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
-
-
-def authenticate_user(username: str, password: str) -> Optional[Dict[str, str]]:
-    user = fake_users_db.get(username)
+async def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
+    """Check credentials against the shared users collection (username is the email)."""
+    user = await db.users.find_one(
+        {"email": username}, {"_id": 0, "user_id": 1, "password": 1}
+    )
     if not user:
         return None
-    if not verify_password(password, user["hashed_password"]):
+    if not await verify_password(password, user["password"]):
         return None
+    if needs_rehash(user["password"]):
+        # Transparently upgrade hashes when BCRYPT_ROUNDS changes.
+        await db.users.update_one(
+            # Matching the old hash never overwrites a concurrent password change.
+            {"user_id": user["user_id"], "password": user["password"]},
+            {"$set": {"password": await hash_password(password)}},
+        )
     return user
 
 
-def create_access_token(data: Dict[str, str]) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-
-
 @router.post("/token", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
-    user = authenticate_user(form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(form_data.username, form_data.password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Password service busy, retry later")
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
-    token = create_access_token({"sub": user["username"]})
+    # Same claims as /api/login, so every service validates it locally.
+    token = create_access_token({"sub": user["user_id"]}, ACCESS_TOKEN_EXPIRE_MINUTES)
     return Token(access_token=token, token_type="bearer")
+
+
+@router.get("/.well-known/jwks.json")
+async def jwks() -> Dict[str, Any]:
+    return public_jwks()
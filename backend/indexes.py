@@ -0,0 +1,303 @@
+"""Declared MongoDB indexes and a query-plan check for the API's query shapes.
+
+``ensure_indexes`` is idempotent and runs at service startup; the
+``scripts/manage_indexes.py`` CLI runs it or the ``explain()`` check on demand.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique"),
+    ],
+    "user_memory": [
+        IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique"),
+    ],
+    "sessions": [
+        IndexModel([("token_hash", ASCENDING)], unique=True, name="token_hash_unique"),
+        IndexModel([("previous_hash", ASCENDING)], name="previous_hash"),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    # ``date`` serves the archival job's ``date < cutoff`` scans. Chat history
+    # is only written and archived; its TTL index on ``timestamp`` (installed
+    # while archival runs) serves that scan.
+    "mood_entries": [
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING)], name="user_date"),
+        IndexModel([("date", ASCENDING)], name="date"),
+    ],
+    "sleep_entries": [
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING)], name="user_date"),
+        IndexModel([("date", ASCENDING)], name="date"),
+    ],
+    "reflections": [
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING)], name="user_date"),
+        IndexModel([("date", ASCENDING)], name="date"),
+    ],
+    "assessments": [
+        IndexModel(
+            [("user_id", ASCENDING), ("completed_at", DESCENDING), ("assessment_id", DESCENDING)],
+            name="user_completed_at_id",
+        ),
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("assessment_type", ASCENDING),
+                ("completed_at", DESCENDING),
+                ("assessment_id", DESCENDING),
+            ],
+            name="user_type_completed_at_id",
+        ),
+    ],
+    "assessment_stats": [
+        IndexModel(
+            [
+                ("assessment_type", ASCENDING),
+                ("month", ASCENDING),
+                ("metric", ASCENDING),
+                ("student_level", ASCENDING),
+                ("age_band", ASCENDING),
+            ],
+            unique=True,
+            name="cell_unique",
+        ),
+    ],
+    "journey_progress": [
+        IndexModel([("user_id", ASCENDING), ("journey_id", ASCENDING)], unique=True, name="user_journey_unique"),
+    ],
+    "search_index": [
+        IndexModel(
+            [("user_id", ASCENDING), ("source", ASCENDING), ("entry_id", ASCENDING)],
+            unique=True,
+            name="user_source_entry_unique",
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("terms", ASCENDING), ("date", DESCENDING)],
+            name="user_terms_date",
+        ),
+    ],
+    "xp_events": [
+        IndexModel([("batch_id", ASCENDING), ("_id", ASCENDING)], name="batch_id"),
+        IndexModel([("folded_at", ASCENDING), ("claimed_at", ASCENDING)], name="folded_claimed_at"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+    ],
+    "xp_totals": [
+        IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique"),
+    ],
+    "xp_buckets": [
+        IndexModel(
+            [("period", ASCENDING), ("bucket", ASCENDING), ("user_id", ASCENDING)],
+            unique=True,
+            name="period_bucket_user_unique",
+        ),
+        IndexModel(
+            [("period", ASCENDING), ("bucket", ASCENDING), ("xp", DESCENDING), ("user_id", ASCENDING)],
+            name="period_bucket_xp",
+        ),
+        IndexModel(
+            [
+                ("period", ASCENDING),
+                ("bucket", ASCENDING),
+                ("student_level", ASCENDING),
+                ("xp", DESCENDING),
+                ("user_id", ASCENDING),
+            ],
+            name="period_bucket_level_xp",
+        ),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+}
+
+
+# Indexes no query uses any more; dropped by ``ensure_indexes``.
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    "chat_history": ["user_timestamp"],
+    "assessments": ["user_completed_at", "user_type_completed_at"],
+    "search_index": ["user_terms"],
+}
+
+
+def _query_shapes() -> List[Dict[str, Any]]:
+    """Representative filters and sorts used by the endpoints."""
+    day = datetime(2000, 1, 1)
+    day_range = {"$gte": day, "$lt": day + timedelta(days=1)}
+    shapes: List[Dict[str, Any]] = [
+        {"name": "login by email", "collection": "users", "filter": {"email": "probe@example.com"}},
+        {"name": "principal by user_id", "collection": "users", "filter": {"user_id": "probe"}},
+        {"name": "memory", "collection": "user_memory", "filter": {"user_id": "probe"}},
+        {"name": "refresh token", "collection": "sessions", "filter": {"token_hash": "probe"}},
+        {"name": "rotated token reuse", "collection": "sessions", "filter": {"previous_hash": "probe"}},
+        {
+            "name": "assessment history",
+            "collection": "assessments",
+            "filter": {"user_id": "probe"},
+            "sort": [("completed_at", DESCENDING), ("assessment_id", DESCENDING)],
+            "limit": 11,
+        },
+        {
+            "name": "assessment history by type",
+            "collection": "assessments",
+            "filter": {"user_id": "probe", "assessment_type": "probe", "completed_at": {"$lt": day}},
+            "sort": [("completed_at", DESCENDING)],
+            "limit": 11,
+        },
+        {
+            "name": "assessment statistics",
+            "collection": "assessment_stats",
+            "filter": {"assessment_type": "probe", "month": {"$gte": "2024-01", "$lte": "2024-12"}},
+        },
+        {
+            "name": "journey progress",
+            "collection": "journey_progress",
+            "filter": {"user_id": "probe", "journey_id": "probe"},
+        },
+        {
+            "name": "all journey progress",
+            "collection": "journey_progress",
+            "filter": {"user_id": "probe"},
+        },
+        {
+            "name": "search",
+            "collection": "search_index",
+            "filter": {"user_id": "probe", "terms": {"$in": ["probe"]}},
+            "sort": [("date", DESCENDING)],
+            "limit": 500,
+        },
+        {
+            "name": "unfolded xp events",
+            "collection": "xp_events",
+            "filter": {"batch_id": None},
+            "sort": [("_id", ASCENDING)],
+            "limit": 100,
+        },
+        {
+            "name": "stale xp claims",
+            "collection": "xp_events",
+            "filter": {"folded_at": None, "claimed_at": {"$lt": day}},
+        },
+        {
+            "name": "weekly leaderboard",
+            "collection": "xp_buckets",
+            "filter": {"period": "week", "bucket": "probe"},
+            "sort": [("xp", DESCENDING), ("user_id", ASCENDING)],
+            "limit": 10,
+        },
+        {
+            "name": "weekly cohort leaderboard",
+            "collection": "xp_buckets",
+            "filter": {"period": "week", "bucket": "probe", "student_level": "probe"},
+            "sort": [("xp", DESCENDING), ("user_id", ASCENDING)],
+            "limit": 10,
+        },
+        {
+            "name": "weekly rank",
+            "collection": "xp_buckets",
+            "filter": {
+                "period": "week",
+                "bucket": "probe",
+                "$or": [{"xp": {"$gt": 5}}, {"xp": 5, "user_id": {"$lt": "probe"}}],
+            },
+        },
+    ]
+    for collection in ("mood_entries", "sleep_entries", "reflections"):
+        shapes.append(
+            {"name": f"{collection} today", "collection": collection, "filter": {"user_id": "probe", "date": day_range}}
+        )
+        shapes.append(
+            {
+                "name": f"{collection} history",
+                "collection": collection,
+                "filter": {"user_id": "probe"},
+                "sort": [("date", DESCENDING)],
+                "limit": 30,
+            }
+        )
+        shapes.append(
+            {
+                "name": f"{collection} archival",
+                "collection": collection,
+                "filter": {"date": {"$lt": day}},
+                "sort": [("date", ASCENDING)],
+                "limit": 5000,
+            }
+        )
+    return shapes
+
+
+QUERY_SHAPES = _query_shapes()
+
+
+def plan_stages(plan: Any) -> Iterator[str]:
+    """Yield every ``stage`` name found anywhere in an explain() plan tree."""
+    if isinstance(plan, dict):
+        stage = plan.get("stage")
+        if isinstance(stage, str):
+            yield stage
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+def winning_plan(explain: Dict[str, Any]) -> Dict[str, Any]:
+    planner = explain.get("queryPlanner", {})
+    plan = planner.get("winningPlan", {})
+    # Slot-based engine nests the classic plan tree under ``queryPlan``.
+    return plan.get("queryPlan", plan)
+
+
+async def drop_retired_indexes(db, collections: Optional[List[str]] = None) -> None:
+    for collection, names in RETIRED_INDEXES.items():
+        if collections and collection not in collections:
+            continue
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+
+
+async def ensure_indexes(db, collections: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    created = {}
+    for collection, models in INDEXES.items():
+        if collections and collection not in collections:
+            continue
+        created[collection] = await db[collection].create_indexes(models)
+    await drop_retired_indexes(db, collections)
+    return created
+
+
+async def ensure_indexes_safely(db) -> None:
+    """Startup variant: log failures (e.g. duplicate emails) instead of crashing."""
+    for collection in {**INDEXES, **RETIRED_INDEXES}:
+        try:
+            await ensure_indexes(db, [collection])
+        except Exception:
+            logger.exception("Could not create indexes for %s", collection)
+
+
+async def check_query_plans(db) -> List[Dict[str, Any]]:
+    """Explain every declared query shape and report its winning plan stages."""
+    report = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        if shape.get("limit"):
+            cursor = cursor.limit(shape["limit"])
+        stages = list(plan_stages(winning_plan(await cursor.explain())))
+        report.append(
+            {
+                "name": shape["name"],
+                "collection": shape["collection"],
+                "stages": stages,
+                "collection_scan": "COLLSCAN" in stages,
+            }
+        )
+    return report
@@ -1,39 +1,114 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict
+from datetime import datetime
+from typing import Any
 
-from auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pymongo import ReturnDocument
+
+from auth import get_current_user, require_admin
+from badges import record_journey_completed
 from database import db
-from journeys_utils import get_default_journeys
+from journeys_utils import journey_catalog, summarize_progress
 
+JOURNEY_CACHE_CONTROL = "public, max-age=300"
+PROGRESS_PROJECTION = {"_id": 0}
 
 router = APIRouter()
 
 
+def catalog_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve pre-encoded catalog bytes, or 304 when the client has them."""
+    headers = {"ETag": etag, "Cache-Control": JOURNEY_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/api/journeys")
-async def list_journeys() -> List[Dict[str, object]]:
-    return get_default_journeys()
+async def list_journeys(request: Request) -> Response:
+    catalog = journey_catalog.current()
+    return catalog_response(request, catalog.list_body, catalog.list_etag)
+
+
+@router.post("/api/admin/journeys/reload")
+async def reload_journeys(_: Any = Depends(require_admin)):
+    try:
+        catalog = journey_catalog.reload()
+    except (OSError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Journey catalog not reloaded: {exc}")
+    return {"journeys": len(catalog), "etag": catalog.list_etag}
+
+
+@router.get("/api/journeys/progress")
+async def list_progress(current_user=Depends(get_current_user)):
+    docs = await db.journey_progress.find(
+        {"user_id": current_user["user_id"]}, PROGRESS_PROJECTION
+    ).to_list(length=None)
+    return summarize_progress(journey_catalog.current(), docs)
 
 
 @router.get("/api/journeys/{journey_id}")
-async def get_journey(journey_id: str) -> Dict[str, object]:
-    for journey in get_default_journeys():
-        if journey["id"] == journey_id:
-            return journey
-    raise HTTPException(status_code=404, detail="Journey not found")
+async def get_journey(journey_id: str, request: Request) -> Response:
+    response = journey_catalog.current().item_responses.get(journey_id)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Journey not found")
+    return catalog_response(request, *response)
 
 
 @router.post("/api/journeys/{journey_id}/start")
 async def start_journey(journey_id: str, current_user=Depends(get_current_user)):
-    progress = {
-        "user_id": current_user["user_id"],
-        "journey_id": journey_id,
-        "current_step": 0,
-    }
-    await db.journey_progress.update_one(
+    if journey_catalog.current().get(journey_id) is None:
+        raise HTTPException(status_code=404, detail="Journey not found")
+    return await db.journey_progress.find_one_and_update(
         {"user_id": current_user["user_id"], "journey_id": journey_id},
-        {"$set": progress},
+        {
+            "$setOnInsert": {
+                "current_step": 0,
+                "completed_steps": [],
+                "completed_at": None,
+                "started_at": datetime.utcnow(),
+            }
+        },
+        projection=PROGRESS_PROJECTION,
         upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+@router.put("/api/journeys/{journey_id}/steps/{step}")
+async def complete_step(journey_id: str, step: int, current_user=Depends(get_current_user)):
+    journey = journey_catalog.current().get(journey_id)
+    if journey is None:
+        raise HTTPException(status_code=404, detail="Journey not found")
+    total = len(journey["tasks"])
+    if not 0 <= step < total:
+        raise HTTPException(status_code=404, detail="Step not found")
+    user_id = current_user["user_id"]
+    key = {"user_id": user_id, "journey_id": journey_id}
+    # The $ne guard makes a repeated completion a no-op instead of a double $inc.
+    progress = await db.journey_progress.find_one_and_update(
+        {**key, "completed_steps": {"$ne": step}},
+        {
+            "$addToSet": {"completed_steps": step},
+            "$inc": {"current_step": 1},
+            "$set": {"updated_at": datetime.utcnow()},
+        },
+        projection=PROGRESS_PROJECTION,
+        return_document=ReturnDocument.AFTER,
     )
+    if progress is None:
+        progress = await db.journey_progress.find_one(key, PROGRESS_PROJECTION)
+        if progress is None:
+            raise HTTPException(status_code=404, detail="Journey not started")
+        return progress
+    if len(progress["completed_steps"]) >= total and not progress.get("completed_at"):
+        completed_at = datetime.utcnow()
+        result = await db.journey_progress.update_one(
+            {**key, "completed_at": None}, {"$set": {"completed_at": completed_at}}
+        )
+        # Only the request that set completed_at counts the completion.
+        if result.modified_count:
+            progress["completed_at"] = completed_at
+            await record_journey_completed(user_id)
     return progress
 
 
@@ -41,7 +116,7 @@ async def start_journey(journey_id: str, current_user=Depends(get_current_user))
 async def get_progress(journey_id: str, current_user=Depends(get_current_user)):
     progress = await db.journey_progress.find_one(
         {"user_id": current_user["user_id"], "journey_id": journey_id},
-        {"_id": 0},
+        PROGRESS_PROJECTION,
     )
     if not progress:
         raise HTTPException(status_code=404, detail="Journey not started")
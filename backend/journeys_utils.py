@@ -1,39 +1,181 @@
-"""Utility functions for Fabulous-style habit-building journeys."""
+"""Utility functions for Fabulous-style habit-building journeys.
 
-from typing import List, Dict
+Journeys are content files under ``data/journeys`` (one JSON or YAML file
+per journey, served in file-name order). They are loaded once into an
+immutable, id-indexed ``JourneyCatalog`` that also holds the serialized
+response bodies and their ETags, so catalog endpoints never rebuild or
+re-encode anything per request.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+try:
+    import yaml
+except ImportError:  # YAML journey files are optional
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+JOURNEYS_DIR = os.getenv(
+    "JOURNEY_CATALOG_DIR", os.path.join(os.path.dirname(__file__), "data", "journeys")
+)
+JOURNEY_CATALOG_CHECK_SECONDS = float(os.getenv("JOURNEY_CATALOG_CHECK_SECONDS", "30"))
+JOURNEY_EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+def _journey_files(directory: str) -> List[str]:
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(JOURNEY_EXTENSIONS)
+    )
+
+
+def _read_journey(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as fh:
+        if path.endswith(".json"):
+            return json.load(fh)
+        if yaml is None:
+            raise ValueError(f"{path}: PyYAML is required for YAML journeys")
+        return yaml.safe_load(fh)
+
+
+def validate_journey(journey: Any, source: str = "journey") -> Dict[str, Any]:
+    if not isinstance(journey, dict):
+        raise ValueError(f"{source}: a journey must be an object")
+    for field in ("id", "name", "description"):
+        if not isinstance(journey.get(field), str) or not journey[field]:
+            raise ValueError(f"{source}: '{field}' must be a non-empty string")
+    tasks = journey.get("tasks")
+    if not isinstance(tasks, list) or not tasks or not all(isinstance(t, str) for t in tasks):
+        raise ValueError(f"{source}: 'tasks' must be a non-empty list of strings")
+    return journey
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _encode(value: Any) -> Tuple[bytes, str]:
+    body = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class JourneyCatalog:
+    """Immutable journey list with id lookup and pre-encoded responses."""
+
+    def __init__(self, journeys: List[Dict[str, Any]]) -> None:
+        seen = set()
+        for journey in journeys:
+            if journey["id"] in seen:
+                raise ValueError(f"Duplicate journey id: {journey['id']}")
+            seen.add(journey["id"])
+        self.journeys: Tuple[Mapping[str, Any], ...] = tuple(_freeze(j) for j in journeys)
+        self.by_id: Mapping[str, Mapping[str, Any]] = MappingProxyType(
+            {journey["id"]: journey for journey in self.journeys}
+        )
+        self.list_body, self.list_etag = _encode(journeys)
+        self.item_responses: Mapping[str, Tuple[bytes, str]] = MappingProxyType(
+            {journey["id"]: _encode(journey) for journey in journeys}
+        )
+
+    @classmethod
+    def from_directory(cls, directory: str = JOURNEYS_DIR) -> "JourneyCatalog":
+        return cls(
+            [validate_journey(_read_journey(path), path) for path in _journey_files(directory)]
+        )
+
+    def __len__(self) -> int:
+        return len(self.journeys)
+
+    def get(self, journey_id: str) -> Optional[Mapping[str, Any]]:
+        return self.by_id.get(journey_id)
+
+    def as_dicts(self) -> List[Dict[str, object]]:
+        """Mutable copies for callers that expect plain lists of dicts."""
+        return json.loads(self.list_body)
+
+
+def _directory_signature(directory: str) -> Tuple[Tuple[str, float], ...]:
+    return tuple((path, os.stat(path).st_mtime) for path in _journey_files(directory))
+
+
+class CatalogHolder:
+    """Current catalog plus reload, either on demand or when files change.
+
+    File modification times are checked at most every
+    ``JOURNEY_CATALOG_CHECK_SECONDS`` so every replica picks up edits
+    without a restart; a catalog that fails to load keeps the old one live.
+    """
+
+    def __init__(self, directory: str = JOURNEYS_DIR) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._signature: Tuple[Tuple[str, float], ...] = ()
+        self.catalog = self.reload()
+
+    def reload(self) -> JourneyCatalog:
+        with self._lock:
+            signature = _directory_signature(self.directory)
+            catalog = JourneyCatalog.from_directory(self.directory)
+            self.catalog, self._signature = catalog, signature
+            self._checked_at = time.monotonic()
+            return catalog
+
+    def current(self) -> JourneyCatalog:
+        if (
+            JOURNEY_CATALOG_CHECK_SECONDS > 0
+            and time.monotonic() - self._checked_at > JOURNEY_CATALOG_CHECK_SECONDS
+        ):
+            self._checked_at = time.monotonic()
+            try:
+                if _directory_signature(self.directory) != self._signature:
+                    self.reload()
+            except (OSError, ValueError):
+                logger.exception("Journey catalog reload failed; keeping previous")
+        return self.catalog
+
+
+journey_catalog = CatalogHolder()
+
+
+def summarize_progress(
+    catalog: JourneyCatalog, progress_docs: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Merge a user's progress documents into the catalog, in catalog order."""
+    by_journey = {doc["journey_id"]: doc for doc in progress_docs}
+    summary = []
+    for journey in catalog.journeys:
+        doc = by_journey.get(journey["id"])
+        total = len(journey["tasks"])
+        completed = sorted(doc.get("completed_steps", [])) if doc else []
+        summary.append(
+            {
+                "journey_id": journey["id"],
+                "name": journey["name"],
+                "total_steps": total,
+                "started": doc is not None,
+                "completed_steps": completed,
+                "current_step": doc.get("current_step", 0) if doc else 0,
+                "percent": round(100 * len(completed) / total) if total else 0,
+                "completed_at": doc.get("completed_at") if doc else None,
+            }
+        )
+    return summary
 
 
 def get_default_journeys() -> List[Dict[str, object]]:
     """Return a list of default habit-building journeys."""
-    return [
-        {
-            "id": "morning-routine",
-            "name": "Morning Routine Kickstart",
-            "description": "Simple steps to start your day energized",
-            "tasks": [
-                "Wake up at the same time each day",
-                "Drink a glass of water",
-                "Do 5 minutes of stretching or light exercise",
-            ],
-        },
-        {
-            "id": "mindfulness-master",
-            "name": "Mindfulness Master",
-            "description": "Daily practices for a calmer mind",
-            "tasks": [
-                "Practice 3 minutes of deep breathing",
-                "Record a short gratitude note",
-                "Take a mindful walk or body scan",
-            ],
-        },
-        {
-            "id": "sleep-champion",
-            "name": "Sleep Champion",
-            "description": "Improve sleep habits for better rest",
-            "tasks": [
-                "Set a consistent bedtime",
-                "Avoid screens 30 minutes before sleep",
-                "Create a relaxing pre-sleep ritual",
-            ],
-        },
-    ]
+    return journey_catalog.current().as_dicts()
@@ -0,0 +1,231 @@
+"""Materialized XP leaderboards with rank lookup and pagination.
+
+With ``REDIS_URL`` set the ranking lives in a Redis sorted set shared by all
+services. Otherwise each process keeps a ``SortedLeaderboard`` built from
+MongoDB, updated by awards made in that process and rebuilt in the background
+every ``LEADERBOARD_REFRESH_SECONDS`` to pick up awards made elsewhere.
+
+Weekly and monthly boards read the ``xp_buckets`` counters maintained by the
+XP ledger, optionally narrowed to a ``student_level`` cohort; both reads are
+index range scans, never a scan of ``users``. They trail awards by the
+ledger's ``XP_FOLD_DELAY_SECONDS``.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from database import db
+from gamification_utils import period_buckets
+from leaderboard_utils import SortedLeaderboard
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis backend is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+LEADERBOARD_KEY = os.getenv("LEADERBOARD_KEY", "leaderboard:xp")
+LEADERBOARD_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "300"))
+LEADERBOARD_LOAD_BATCH = 10000
+
+
+async def _scan_users():
+    cursor = db.users.find({}, {"_id": 0, "user_id": 1, "xp": 1}).batch_size(
+        LEADERBOARD_LOAD_BATCH
+    )
+    async for user in cursor:
+        yield user["user_id"], user.get("xp", 0)
+
+
+class LocalLeaderboard:
+    def __init__(self) -> None:
+        self.board = SortedLeaderboard()
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh: Optional["asyncio.Task[None]"] = None
+
+    async def rebuild(self) -> int:
+        entries = [entry async for entry in _scan_users()]
+        self.board.load(entries)
+        self.loaded_at = time.monotonic()
+        return len(self.board)
+
+    async def _ready(self) -> SortedLeaderboard:
+        if self.loaded_at is None:
+            async with self._lock:
+                if self.loaded_at is None:
+                    await self.rebuild()
+        elif (
+            time.monotonic() - self.loaded_at > LEADERBOARD_REFRESH_SECONDS
+            and (self._refresh is None or self._refresh.done())
+        ):
+            self._refresh = asyncio.create_task(self.rebuild())
+        return self.board
+
+    async def update(self, user_id: str, xp: int) -> None:
+        if self.loaded_at is not None:
+            self.board.update(user_id, xp)
+
+    async def top(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        return (await self._ready()).page(offset, limit)
+
+    async def rank(self, user_id: str) -> Optional[int]:
+        return (await self._ready()).rank(user_id)
+
+    async def around(self, user_id: str, radius: int) -> List[Dict[str, Any]]:
+        return (await self._ready()).around(user_id, radius)
+
+    async def size(self) -> int:
+        return len(await self._ready())
+
+
+class RedisLeaderboard:
+    """Sorted-set ranking; ``<key>:loaded`` marks that it was built from MongoDB.
+
+    The board key alone cannot tell a full load from one created by a single
+    ``update``, so a missing sentinel (fresh or flushed Redis) forces a rebuild.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.loaded = False
+        self.loaded_key = f"{LEADERBOARD_KEY}:loaded"
+        self._lock = asyncio.Lock()
+
+    async def rebuild(self) -> int:
+        staging = f"{LEADERBOARD_KEY}:rebuild"
+        await self.redis.delete(staging)
+        batch: Dict[str, int] = {}
+        async for user_id, xp in _scan_users():
+            batch[user_id] = xp
+            if len(batch) >= LEADERBOARD_LOAD_BATCH:
+                await self.redis.zadd(staging, batch)
+                batch = {}
+        if batch:
+            await self.redis.zadd(staging, batch)
+        if await self.redis.exists(staging):
+            await self.redis.rename(staging, LEADERBOARD_KEY)
+        await self.redis.set(self.loaded_key, datetime.utcnow().isoformat())
+        self.loaded = True
+        return await self.redis.zcard(LEADERBOARD_KEY)
+
+    async def _ready(self) -> None:
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                if await self.redis.exists(self.loaded_key):
+                    self.loaded = True
+                else:
+                    await self.rebuild()
+
+    async def update(self, user_id: str, xp: int) -> None:
+        try:
+            await self._ready()
+            # ``xp`` is the total after the award, so it is written as-is:
+            # deductions and recomputed totals may lower it.
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(LEADERBOARD_KEY, {user_id: xp})
+                pipe.exists(self.loaded_key)
+                _, loaded = await pipe.execute()
+            if not loaded:
+                # Redis was flushed since this process loaded the board.
+                self.loaded = False
+                await self._ready()
+        except Exception:
+            logger.warning("Redis leaderboard update failed", exc_info=True)
+
+    async def top(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        await self._ready()
+        rows = await self.redis.zrevrange(
+            LEADERBOARD_KEY, offset, offset + limit - 1, withscores=True
+        )
+        return [
+            {"rank": offset + index + 1, "user_id": user_id, "xp": int(xp)}
+            for index, (user_id, xp) in enumerate(rows)
+        ]
+
+    async def rank(self, user_id: str) -> Optional[int]:
+        await self._ready()
+        rank = await self.redis.zrevrank(LEADERBOARD_KEY, user_id)
+        return None if rank is None else rank + 1
+
+    async def around(self, user_id: str, radius: int) -> List[Dict[str, Any]]:
+        rank = await self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return await self.top(start, rank - start + radius)
+
+    async def size(self) -> int:
+        await self._ready()
+        return await self.redis.zcard(LEADERBOARD_KEY)
+
+
+leaderboard = (
+    RedisLeaderboard(REDIS_URL) if aioredis and REDIS_URL else LocalLeaderboard()
+)
+
+
+def _bucket_filter(
+    period: str, bucket: Optional[str], student_level: Optional[str]
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {
+        "period": period,
+        "bucket": bucket or period_buckets(datetime.utcnow())[period],
+    }
+    if student_level is not None:
+        query["student_level"] = student_level
+    return query
+
+
+async def period_top(
+    period: str,
+    offset: int,
+    limit: int,
+    bucket: Optional[str] = None,
+    student_level: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    rows = (
+        await db.xp_buckets.find(
+            _bucket_filter(period, bucket, student_level), {"_id": 0, "user_id": 1, "xp": 1}
+        )
+        .sort([("xp", -1), ("user_id", 1)])
+        .skip(offset)
+        .limit(limit)
+        .to_list(length=limit)
+    )
+    return [
+        {"rank": offset + index + 1, "user_id": row["user_id"], "xp": row["xp"]}
+        for index, row in enumerate(rows)
+    ]
+
+
+async def period_rank(
+    user_id: str,
+    period: str,
+    bucket: Optional[str] = None,
+    student_level: Optional[str] = None,
+) -> Dict[str, Any]:
+    """The user's bucket XP and rank, counting only entries ordered ahead."""
+    query = _bucket_filter(period, bucket, student_level)
+    entry = await db.xp_buckets.find_one({**query, "user_id": user_id}, {"_id": 0, "xp": 1})
+    result = {"period": period, "bucket": query["bucket"], "xp": 0, "rank": None}
+    if entry:
+        ahead = await db.xp_buckets.count_documents(
+            {
+                **query,
+                "$or": [
+                    {"xp": {"$gt": entry["xp"]}},
+                    {"xp": entry["xp"], "user_id": {"$lt": user_id}},
+                ],
+            }
+        )
+        result.update({"xp": entry["xp"], "rank": ahead + 1})
+    return result
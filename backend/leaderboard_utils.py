@@ -0,0 +1,57 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SortedLeaderboard:
+    """XP ranking kept as a sorted list of ``(-xp, user_id)`` keys.
+
+    Rank lookups are a dict read plus a binary search; updates move a single
+    key. Ties are broken by ``user_id`` so every user has a distinct rank.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, int]] = ()) -> None:
+        self.load(entries)
+
+    def load(self, entries: Iterable[Tuple[str, int]]) -> None:
+        self.scores: Dict[str, int] = dict(entries)
+        self.order: List[Tuple[int, str]] = sorted(
+            (-xp, user_id) for user_id, xp in self.scores.items()
+        )
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def update(self, user_id: str, xp: int) -> None:
+        old = self.scores.get(user_id)
+        if old == xp:
+            return
+        if old is not None:
+            del self.order[bisect_left(self.order, (-old, user_id))]
+        self.scores[user_id] = xp
+        insort(self.order, (-xp, user_id))
+
+    def remove(self, user_id: str) -> None:
+        old = self.scores.pop(user_id, None)
+        if old is not None:
+            del self.order[bisect_left(self.order, (-old, user_id))]
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based rank, or ``None`` for unknown users."""
+        xp = self.scores.get(user_id)
+        if xp is None:
+            return None
+        return bisect_left(self.order, (-xp, user_id)) + 1
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        return [
+            {"rank": offset + index + 1, "user_id": user_id, "xp": -neg_xp}
+            for index, (neg_xp, user_id) in enumerate(self.order[offset : offset + limit])
+        ]
+
+    def around(self, user_id: str, radius: int) -> List[Dict]:
+        """Entries within ``radius`` places of the user, including the user."""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return self.page(start, rank - start + radius)
@@ -0,0 +1,72 @@
+"""Helpers for validating and applying partial updates to chatbot memory."""
+
+import json
+import os
+from typing import Any, Dict, List
+
+MAX_MEMORY_KEYS = int(os.getenv("MAX_MEMORY_KEYS", "50"))
+MAX_MEMORY_KEY_LENGTH = int(os.getenv("MAX_MEMORY_KEY_LENGTH", "64"))
+MAX_MEMORY_VALUE_BYTES = int(os.getenv("MAX_MEMORY_VALUE_BYTES", "2048"))
+
+
+class MemoryValidationError(ValueError):
+    """Raised when a memory update breaks the key or size limits."""
+
+
+def validate_memory_key(key: str) -> None:
+    """Reject keys that cannot be used safely as a dotted Mongo path segment."""
+    if not key or len(key) > MAX_MEMORY_KEY_LENGTH:
+        raise MemoryValidationError(f"Invalid memory key length: {key!r}")
+    if "." in key or key.startswith("$") or "\x00" in key:
+        raise MemoryValidationError(f"Invalid memory key: {key!r}")
+
+
+def value_size(value: Any) -> int:
+    """Return the serialized size of a memory value in bytes."""
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def build_memory_update(changes: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Translate a partial memory update into ``$set``/``$unset`` operators.
+
+    Each key becomes its own ``memory.<key>`` path so only the changed keys are
+    written. A ``None`` value removes the key.
+    """
+    if len(changes) > MAX_MEMORY_KEYS:
+        raise MemoryValidationError("Too many memory keys in one update")
+    to_set: Dict[str, Any] = {}
+    to_unset: Dict[str, str] = {}
+    for key, value in changes.items():
+        validate_memory_key(key)
+        if value is None:
+            to_unset[f"memory.{key}"] = ""
+            continue
+        if value_size(value) > MAX_MEMORY_VALUE_BYTES:
+            raise MemoryValidationError(f"Memory value too large for key {key!r}")
+        to_set[f"memory.{key}"] = value
+    update: Dict[str, Dict[str, Any]] = {}
+    if to_set:
+        update["$set"] = to_set
+    if to_unset:
+        update["$unset"] = to_unset
+    return update
+
+
+def key_limit_expr(changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Return an ``$expr`` that only matches if the update keeps the key cap.
+
+    The resulting key set is computed server-side so the check and the write
+    happen atomically in the same ``update_one``.
+    """
+    set_keys: List[str] = sorted(k for k, v in changes.items() if v is not None)
+    unset_keys: List[str] = sorted(k for k, v in changes.items() if v is None)
+    existing_keys = {
+        "$map": {
+            "input": {"$objectToArray": {"$ifNull": ["$memory", {}]}},
+            "in": "$$this.k",
+        }
+    }
+    resulting_keys = {
+        "$setDifference": [{"$setUnion": [existing_keys, set_keys]}, unset_keys]
+    }
+    return {"$lte": [{"$size": resulting_keys}, MAX_MEMORY_KEYS]}
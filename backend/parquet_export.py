@@ -0,0 +1,106 @@
+"""Offline Parquet export job for researchers; see ``parquet_utils``."""
+
+import json
+import os
+import secrets
+from datetime import datetime
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from assessments_utils import instrument_registry
+from database import db
+from parquet_utils import (
+    MANIFEST_VERSION,
+    PartitionedWriter,
+    assessment_columns,
+    assessment_row,
+    build_schemas,
+    mood_row,
+    pseudonymize,
+    sleep_row,
+)
+from research_utils import age_band, month_key
+
+PARQUET_CHUNK_ROWS = int(os.getenv("PARQUET_CHUNK_ROWS", "50000"))
+# Keeps subject ids stable across exports; without it each export gets its own key.
+EXPORT_ID_KEY = os.getenv("EXPORT_ID_KEY")
+
+
+def _user_row(doc: Mapping[str, Any], subject: str) -> Dict[str, Any]:
+    return {
+        "subject": subject,
+        "age_band": age_band(doc.get("age")),
+        "student_level": doc.get("student_level") or "unknown",
+    }
+
+
+async def _export_collection(
+    collection,
+    projection: Dict[str, Any],
+    to_row: Callable[[Mapping[str, Any], str], Dict[str, Any]],
+    writer: PartitionedWriter,
+    key: bytes,
+) -> Dict[str, Any]:
+    cursor = collection.find({}, projection).batch_size(writer.chunk_size)
+    async for doc in cursor:
+        writer.write(to_row(doc, pseudonymize(doc["user_id"], key)))
+    return writer.close()
+
+
+async def export_parquet(
+    root: str, chunk_size: int = PARQUET_CHUNK_ROWS, id_key: Optional[str] = EXPORT_ID_KEY
+) -> Dict[str, Any]:
+    """Write every research table under ``root`` and return the manifest."""
+    key = (id_key or secrets.token_hex(32)).encode("utf-8")
+    columns = assessment_columns(instrument_registry)
+    schemas = build_schemas(columns)
+
+    def writer(table: str, partition_key=None, partition=None) -> PartitionedWriter:
+        return PartitionedWriter(
+            root, table, schemas[table], partition_key, partition, chunk_size
+        )
+
+    started = datetime.utcnow()
+    tables = {
+        "assessments": await _export_collection(
+            db.assessments,
+            {"_id": 0, "user_id": 1, "assessment_type": 1, "completed_at": 1, "results": 1, "responses": 1},
+            lambda doc, subject: assessment_row(doc, subject, columns),
+            writer(
+                "assessments",
+                "assessment_type",
+                lambda row: row["assessment_type"] or "unknown",
+            ),
+            key,
+        ),
+        "mood": await _export_collection(
+            db.mood_entries,
+            {"_id": 0, "user_id": 1, "date": 1, "mood_level": 1, "analysis.label": 1, "analysis.score": 1},
+            mood_row,
+            writer("mood", "month", lambda row: month_key(row["date"])),
+            key,
+        ),
+        "sleep": await _export_collection(
+            db.sleep_entries,
+            {"_id": 0, "user_id": 1, "date": 1, "hours": 1, "quality": 1},
+            sleep_row,
+            writer("sleep", "month", lambda row: month_key(row["date"])),
+            key,
+        ),
+        "users": await _export_collection(
+            db.users,
+            {"_id": 0, "user_id": 1, "age": 1, "student_level": 1},
+            _user_row,
+            writer("users"),
+            key,
+        ),
+    }
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "started_at": started.isoformat(),
+        "finished_at": datetime.utcnow().isoformat(),
+        "subject_ids": "stable" if id_key else "per-export",
+        "tables": tables,
+    }
+    with open(os.path.join(root, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
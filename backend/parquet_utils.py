@@ -0,0 +1,233 @@
+"""Columnar (Parquet) export of research data.
+
+Rows are flattened into fixed Arrow schemas, buffered per partition and
+written as record batches of at most ``chunk_size`` rows, so memory is
+bounded by the chunk size times the number of open partitions. User ids
+are replaced by keyed hashes; free-text fields are never exported.
+"""
+
+import hashlib
+import hmac
+import os
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+MANIFEST_VERSION = 1
+
+
+class AssessmentColumns(NamedTuple):
+    """Flat result and answer columns shared by every instrument."""
+
+    results: Tuple[str, ...]
+    levels: Tuple[str, ...]
+    responses: Tuple[str, ...]
+
+
+def assessment_columns(plans: Iterable[Any]) -> AssessmentColumns:
+    """Columns for the instrument ``plans`` (anything with ``score_fields``,
+    ``level_fields`` and ``item_count``), in declaration order."""
+    results: Dict[str, None] = {}
+    levels: Dict[str, None] = {}
+    item_count = 0
+    for plan in plans:
+        results.update(dict.fromkeys(plan.score_fields + plan.level_fields))
+        levels.update(dict.fromkeys(plan.level_fields))
+        item_count = max(item_count, plan.item_count)
+    return AssessmentColumns(
+        tuple(results), tuple(levels), tuple(f"q{q}" for q in range(1, item_count + 1))
+    )
+
+
+def pseudonymize(user_id: str, key: bytes) -> str:
+    """Stable, non-reversible subject id for ``user_id`` under ``key``."""
+    return hmac.new(key, user_id.encode("utf-8"), hashlib.sha256).hexdigest()[:24]
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def assessment_row(
+    doc: Mapping[str, Any], subject: str, columns: AssessmentColumns
+) -> Dict[str, Any]:
+    """One assessment with result fields and answers as flat columns."""
+    results = doc.get("results") or {}
+    responses = doc.get("responses") or {}
+    row: Dict[str, Any] = {
+        "subject": subject,
+        "assessment_type": doc.get("assessment_type"),
+        "completed_at": doc.get("completed_at"),
+    }
+    for field in columns.results:
+        value = results.get(field)
+        row[field] = value if field in columns.levels else _int(value)
+    for column in columns.responses:
+        row[column] = _int(responses.get(column[1:]))
+    return row
+
+
+def mood_row(doc: Mapping[str, Any], subject: str) -> Dict[str, Any]:
+    analysis = doc.get("analysis") or {}
+    return {
+        "subject": subject,
+        "date": doc.get("date"),
+        "mood_level": _int(doc.get("mood_level")),
+        "sentiment_label": analysis.get("label"),
+        "sentiment_score": _float(analysis.get("score")),
+    }
+
+
+def sleep_row(doc: Mapping[str, Any], subject: str) -> Dict[str, Any]:
+    return {
+        "subject": subject,
+        "date": doc.get("date"),
+        "hours": _float(doc.get("hours")),
+        "quality": _int(doc.get("quality")),
+    }
+
+
+def build_schemas(columns: AssessmentColumns) -> Dict[str, "pa.Schema"]:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Parquet export")
+    timestamp = pa.timestamp("ms")
+    return {
+        "assessments": pa.schema(
+            [
+                ("subject", pa.string()),
+                ("assessment_type", pa.string()),
+                ("completed_at", timestamp),
+                *[
+                    (f, pa.string() if f in columns.levels else pa.int16())
+                    for f in columns.results
+                ],
+                *[(c, pa.int8()) for c in columns.responses],
+            ]
+        ),
+        "mood": pa.schema(
+            [
+                ("subject", pa.string()),
+                ("date", timestamp),
+                ("mood_level", pa.int8()),
+                ("sentiment_label", pa.string()),
+                ("sentiment_score", pa.float64()),
+            ]
+        ),
+        "sleep": pa.schema(
+            [
+                ("subject", pa.string()),
+                ("date", timestamp),
+                ("hours", pa.float64()),
+                ("quality", pa.int8()),
+            ]
+        ),
+        "users": pa.schema(
+            [
+                ("subject", pa.string()),
+                ("age_band", pa.string()),
+                ("student_level", pa.string()),
+            ]
+        ),
+    }
+
+
+class PartitionedWriter:
+    """Hive-partitioned Parquet files for one table.
+
+    Rows go to ``<root>/<table>/<key>=<value>/part-00000.parquet`` (or
+    ``<root>/<table>/part-00000.parquet`` without a partition key).
+    """
+
+    def __init__(
+        self,
+        root: str,
+        table: str,
+        schema: "pa.Schema",
+        partition_key: Optional[str] = None,
+        partition: Optional[Callable[[Dict[str, Any]], str]] = None,
+        chunk_size: int = 10_000,
+        compression: str = "zstd",
+    ) -> None:
+        self.root = root
+        self.table = table
+        self.schema = schema
+        # The partition value lives in the directory name, as Hive readers expect.
+        self.file_schema = (
+            schema.remove(schema.get_field_index(partition_key))
+            if partition_key in schema.names
+            else schema
+        )
+        self.partition_key = partition_key
+        self.partition = partition
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._writers: Dict[str, Tuple[str, "pq.ParquetWriter"]] = {}
+        self.rows: Dict[str, int] = {}
+
+    def _path(self, value: str) -> str:
+        parts = [self.root, self.table]
+        if self.partition_key:
+            parts.append(f"{self.partition_key}={value}")
+        return os.path.join(*parts, "part-00000.parquet")
+
+    def write(self, row: Dict[str, Any]) -> None:
+        value = self.partition(row) if self.partition else ""
+        buffer = self._buffers.setdefault(value, [])
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self._flush(value)
+
+    def _flush(self, value: str) -> None:
+        rows = self._buffers.pop(value, [])
+        if not rows:
+            return
+        if value not in self._writers:
+            path = self._path(value)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._writers[value] = (
+                path,
+                pq.ParquetWriter(path, self.file_schema, compression=self.compression),
+            )
+        batch = pa.RecordBatch.from_pylist(rows, schema=self.file_schema)
+        self._writers[value][1].write_batch(batch)
+        self.rows[value] = self.rows.get(value, 0) + len(rows)
+
+    def close(self) -> Dict[str, Any]:
+        """Flush, close every file and return this table's manifest entry."""
+        for value in list(self._buffers):
+            self._flush(value)
+        files = []
+        for value, (path, writer) in sorted(self._writers.items()):
+            writer.close()
+            files.append(
+                {
+                    "path": os.path.relpath(path, self.root),
+                    "partition": {self.partition_key: value} if self.partition_key else {},
+                    "rows": self.rows[value],
+                    "bytes": os.path.getsize(path),
+                }
+            )
+        return {
+            "rows": sum(self.rows.values()),
+            "partition_key": self.partition_key,
+            "schema": [
+                {"name": field.name, "type": str(field.type)} for field in self.schema
+            ],
+            "files": files,
+        }
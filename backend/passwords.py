@@ -0,0 +1,65 @@
+"""bcrypt hashing run off the event loop on a bounded worker pool.
+
+bcrypt releases the GIL, so a small thread pool gives real parallelism while
+the event loop keeps serving other requests. A semaphore caps in-flight
+hashes; callers that wait longer than ``PASSWORD_HASH_QUEUE_TIMEOUT`` get
+``PasswordHasherBusy`` instead of piling up behind a login burst.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when no hashing slot frees up within the queue timeout."""
+
+
+def hash_password_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def verify_password_sync(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def hash_rounds(hashed: str) -> int:
+    """Return the cost factor encoded in a ``$2b$<cost>$...`` hash."""
+    return int(hashed.split("$")[2])
+
+
+def needs_rehash(hashed: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    return hash_rounds(hashed) != rounds
+
+
+async def _run_in_pool(func, *args):
+    try:
+        await asyncio.wait_for(_slots.acquire(), PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PasswordHasherBusy()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        _slots.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run_in_pool(hash_password_sync, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _run_in_pool(verify_password_sync, password, hashed)
@@ -0,0 +1,49 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, Dict, Set
+
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+class Subscriptions:
+    """Per-user fan-out of events to in-process subscriber queues.
+
+    Queues are bounded; a subscriber that stops reading loses its oldest
+    events rather than holding memory, which is fine for state snapshots
+    where only the latest one matters.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self.queues: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.queues[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self.queues.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.queues[user_id]
+
+    def fanout(self, user_id: str, event: Dict[str, Any]) -> int:
+        """Deliver ``event`` to every local subscriber of ``user_id``."""
+        queues = self.queues.get(user_id, ())
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+        return len(queues)
+
+    def __len__(self) -> int:
+        return sum(len(queues) for queues in self.queues.values())
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
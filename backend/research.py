@@ -0,0 +1,86 @@
+import asyncio
+import os
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends
+
+from analytics_utils import signed_sentiment
+from auth import require_admin
+from database import db
+from research_utils import ResearchAggregator, join_chunk
+
+router = APIRouter()
+
+# Users processed per chunk; bounds memory regardless of collection size.
+RESEARCH_CHUNK_USERS = int(os.getenv("RESEARCH_CHUNK_USERS", "500"))
+
+
+async def _load_chunk(user_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    query = {"user_id": {"$in": user_ids}}
+    moods, labels, scores = [], [], []
+    cursor = db.mood_entries.find(
+        query,
+        {"_id": 0, "user_id": 1, "date": 1, "mood_level": 1, "note": 1, "analysis.label": 1, "analysis.score": 1},
+    )
+    async for doc in cursor:
+        analysis = doc.get("analysis") or {}
+        labels.append(analysis.get("label", "neutral"))
+        scores.append(analysis.get("score", 0.0) if doc.get("note") else float("nan"))
+        moods.append({"user_id": doc["user_id"], "date": doc["date"], "mood_level": doc.get("mood_level")})
+    for mood, sentiment in zip(moods, signed_sentiment(labels, scores)):
+        mood["sentiment"] = sentiment
+
+    sleeps = await db.sleep_entries.find(
+        query, {"_id": 0, "user_id": 1, "date": 1, "hours": 1, "quality": 1}
+    ).to_list(length=None)
+
+    assessments = []
+    cursor = db.assessments.find(
+        query,
+        {
+            "_id": 0,
+            "user_id": 1,
+            "assessment_type": 1,
+            "results.total_score": 1,
+            "results.depression_score": 1,
+            "results.anxiety_score": 1,
+            "results.stress_score": 1,
+        },
+    )
+    async for doc in cursor:
+        assessments.append({"user_id": doc["user_id"], "assessment_type": doc.get("assessment_type"), **doc.get("results", {})})
+    return {"moods": moods, "sleeps": sleeps, "assessments": assessments}
+
+
+async def compute_research_statistics() -> Dict[str, Any]:
+    """Stream users in fixed-size chunks and fold each chunk into the aggregates.
+
+    The pandas/NumPy folding runs in a worker thread so other requests keep
+    being served while the statistics are computed.
+    """
+    aggregator = ResearchAggregator()
+    chunk: List[Dict[str, Any]] = []
+
+    def fold(users: List[Dict[str, Any]], data: Dict[str, List[Dict[str, Any]]]) -> None:
+        aggregator.add(*join_chunk(users, data["moods"], data["sleeps"], data["assessments"]))
+
+    async def flush() -> None:
+        data = await _load_chunk([u["user_id"] for u in chunk])
+        await asyncio.to_thread(fold, list(chunk), data)
+        chunk.clear()
+
+    cursor = db.users.find(
+        {}, {"_id": 0, "user_id": 1, "age": 1, "student_level": 1}
+    ).batch_size(RESEARCH_CHUNK_USERS)
+    async for user in cursor:
+        chunk.append(user)
+        if len(chunk) >= RESEARCH_CHUNK_USERS:
+            await flush()
+    if chunk:
+        await flush()
+    return await asyncio.to_thread(aggregator.result)
+
+
+@router.get("/api/admin/analytics/correlations")
+async def research_correlations(_: Any = Depends(require_admin)):
+    return await compute_research_statistics()
@@ -0,0 +1,228 @@
+"""Chunk-friendly accumulators for population-level research statistics."""
+
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+AGE_BANDS = ((0, 18, "<18"), (18, 22, "18-21"), (22, 26, "22-25"), (26, 31, "26-30"), (31, 200, "31+"))
+
+
+def age_band(age: Optional[int]) -> str:
+    if age is None:
+        return "unknown"
+    for low, high, label in AGE_BANDS:
+        if low <= age < high:
+            return label
+    return "unknown"
+
+
+def month_key(value: Optional[datetime]) -> str:
+    return value.strftime("%Y-%m") if isinstance(value, datetime) else "unknown"
+
+
+def _clean(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+class CorrelationAccumulator:
+    """Pairwise-complete Pearson correlations from running sufficient statistics.
+
+    Each ``update`` folds a chunk of rows (NaN for missing values) into
+    per-pair sums, so memory depends on the number of columns only.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        k = len(columns)
+        self.columns = list(columns)
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+
+    def update(self, rows: np.ndarray) -> None:
+        if rows.size == 0:
+            return
+        present = (~np.isnan(rows)).astype(float)
+        values = np.nan_to_num(rows)
+        # Entry [i, j] only counts rows where both column i and j are present.
+        self.n += present.T @ present
+        self.sx += values.T @ present
+        self.sxx += (values**2).T @ present
+        self.sxy += values.T @ values
+
+    def result(self) -> Dict[str, Any]:
+        n, sx, sxx, sxy = self.n, self.sx, self.sxx, self.sxy
+        sy, syy = sx.T, sxx.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = n * sxy - sx * sy
+            var = (n * sxx - sx**2) * (n * syy - sy**2)
+            corr = np.where((n >= 3) & (var > 0), cov / np.sqrt(var), np.nan)
+        return {
+            "columns": self.columns,
+            "matrix": [[_clean(v) for v in row] for row in corr],
+            "n": n.astype(int).tolist(),
+        }
+
+
+class GroupedSummary:
+    """Running count, mean and standard deviation per group and column."""
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        self._stats: Dict[Hashable, np.ndarray] = {}
+
+    def update(self, groups: Sequence[Hashable], rows: np.ndarray) -> None:
+        if rows.size == 0:
+            return
+        keys = np.asarray(groups, dtype=object)
+        present = ~np.isnan(rows)
+        values = np.nan_to_num(rows)
+        for key in set(keys.tolist()):
+            mask = keys == key
+            block = np.stack(
+                [
+                    present[mask].sum(axis=0),
+                    values[mask].sum(axis=0),
+                    (values[mask] ** 2).sum(axis=0),
+                ]
+            )
+            if key in self._stats:
+                self._stats[key] += block
+            else:
+                self._stats[key] = block.astype(float)
+
+    def result(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for key, (count, total, total_sq) in sorted(self._stats.items(), key=lambda kv: str(kv[0])):
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = total / count
+                var = (total_sq - count * mean**2) / (count - 1)
+            out[str(key)] = {
+                column: {
+                    "n": int(count[i]),
+                    "mean": _clean(mean[i]),
+                    "std": _clean(np.sqrt(var[i])) if count[i] > 1 else None,
+                }
+                for i, column in enumerate(self.columns)
+            }
+        return out
+
+
+class GroupedCorrelations:
+    """One ``CorrelationAccumulator`` per group key."""
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        self._groups: Dict[Hashable, CorrelationAccumulator] = {}
+
+    def update(self, groups: Sequence[Hashable], rows: np.ndarray) -> None:
+        keys = np.asarray(groups, dtype=object)
+        for key in set(keys.tolist()):
+            acc = self._groups.setdefault(key, CorrelationAccumulator(self.columns))
+            acc.update(rows[keys == key])
+
+    def result(self) -> Dict[str, Any]:
+        return {str(k): acc.result() for k, acc in sorted(self._groups.items(), key=lambda kv: str(kv[0]))}
+
+
+DAILY_COLUMNS = ["mood_level", "sentiment", "sleep_hours", "sleep_quality"]
+USER_COLUMNS = DAILY_COLUMNS + ["phq9_total", "dass_depression", "dass_anxiety", "dass_stress"]
+GROUPINGS = ("student_level", "age_band")
+
+
+def join_chunk(
+    users: List[Dict[str, Any]],
+    moods: List[Dict[str, Any]],
+    sleeps: List[Dict[str, Any]],
+    assessments: List[Dict[str, Any]],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Join one chunk of users' entries into per-day and per-user frames.
+
+    Mood rows carry a precomputed signed ``sentiment``; assessment rows carry
+    their flattened result scores.
+    """
+    user_df = pd.DataFrame(users, columns=["user_id", "age", "student_level"])
+    user_df["age_band"] = [age_band(a if pd.notna(a) else None) for a in user_df["age"]]
+    user_df["student_level"] = user_df["student_level"].fillna("unknown")
+    user_df = user_df.set_index("user_id")[list(GROUPINGS)]
+
+    mood_df = pd.DataFrame(moods, columns=["user_id", "date", "mood_level", "sentiment"])
+    sleep_df = pd.DataFrame(sleeps, columns=["user_id", "date", "hours", "quality"]).rename(
+        columns={"hours": "sleep_hours", "quality": "sleep_quality"}
+    )
+    for frame in (mood_df, sleep_df):
+        frame["day"] = pd.to_datetime(frame["date"]).dt.floor("D")
+    keys = ["user_id", "day"]
+    daily = pd.merge(
+        mood_df.groupby(keys)[["mood_level", "sentiment"]].mean(),
+        sleep_df.groupby(keys)[["sleep_hours", "sleep_quality"]].mean(),
+        how="outer",
+        left_index=True,
+        right_index=True,
+    ).reset_index()
+    daily = daily.join(user_df, on="user_id")
+
+    per_user = daily.groupby("user_id")[DAILY_COLUMNS].mean()
+    assess_df = pd.DataFrame(
+        assessments, columns=["user_id", "assessment_type", "total_score", "depression_score", "anxiety_score", "stress_score"]
+    )
+    phq = assess_df[assess_df["assessment_type"] == "PHQ-9"].groupby("user_id")[["total_score"]].mean()
+    dass = assess_df[assess_df["assessment_type"] == "DASS-21"].groupby("user_id")[
+        ["depression_score", "anxiety_score", "stress_score"]
+    ].mean()
+    per_user = (
+        user_df.join(per_user)
+        .join(phq.rename(columns={"total_score": "phq9_total"}))
+        .join(
+            dass.rename(
+                columns={
+                    "depression_score": "dass_depression",
+                    "anxiety_score": "dass_anxiety",
+                    "stress_score": "dass_stress",
+                }
+            )
+        )
+    )
+    return daily, per_user
+
+
+class ResearchAggregator:
+    """Fold joined chunks into overall and per-group correlations and summaries."""
+
+    def __init__(self) -> None:
+        self.daily = CorrelationAccumulator(DAILY_COLUMNS)
+        self.users = CorrelationAccumulator(USER_COLUMNS)
+        self.daily_groups = {g: GroupedCorrelations(DAILY_COLUMNS) for g in GROUPINGS}
+        self.user_groups = {g: GroupedCorrelations(USER_COLUMNS) for g in GROUPINGS}
+        self.summaries = {g: GroupedSummary(USER_COLUMNS) for g in GROUPINGS}
+        self.user_count = 0
+        self.day_count = 0
+
+    def add(self, daily: pd.DataFrame, per_user: pd.DataFrame) -> None:
+        daily_rows = daily[DAILY_COLUMNS].to_numpy(dtype=float)
+        user_rows = per_user[USER_COLUMNS].to_numpy(dtype=float)
+        self.daily.update(daily_rows)
+        self.users.update(user_rows)
+        for group in GROUPINGS:
+            self.daily_groups[group].update(daily[group].tolist(), daily_rows)
+            self.user_groups[group].update(per_user[group].tolist(), user_rows)
+            self.summaries[group].update(per_user[group].tolist(), user_rows)
+        self.user_count += len(per_user)
+        self.day_count += len(daily)
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "users": self.user_count,
+            "user_days": self.day_count,
+            "daily": {
+                "overall": self.daily.result(),
+                "groups": {g: acc.result() for g, acc in self.daily_groups.items()},
+            },
+            "per_user": {
+                "overall": self.users.result(),
+                "groups": {g: acc.result() for g, acc in self.user_groups.items()},
+            },
+            "summaries": {g: acc.result() for g, acc in self.summaries.items()},
+        }
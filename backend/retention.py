@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends
+from pymongo import DeleteMany, ReplaceOne
+from pymongo.errors import OperationFailure
+
+from auth import require_admin
+from database import db
+from retention_utils import (
+    ARCHIVE_DIR,
+    RETENTION_POLICIES,
+    load_manifest,
+    manifest_entry,
+    partition_path,
+    partitions_for_user,
+    read_partition,
+    save_batch_manifest,
+    search_index_deletes,
+    validate_policy,
+    write_partition,
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "0"))
+REHYDRATED_TTL_DAYS = int(os.getenv("REHYDRATED_TTL_DAYS", "7"))
+
+router = APIRouter()
+
+# Serialize archive runs within a process. Runs on other replicas may archive
+# the same batch twice; each batch has its own manifest file and rehydration
+# de-duplicates on ``_id``, so nothing is lost.
+_archive_lock = asyncio.Lock()
+_archival_task: Optional["asyncio.Task[None]"] = None
+
+
+async def _ensure_ttl_index(collection: str, field: str, seconds: int) -> None:
+    name = f"{field}_ttl"
+    try:
+        await db[collection].create_index(field, name=name, expireAfterSeconds=seconds)
+    except OperationFailure:
+        # Index exists with a different TTL; change it in place.
+        await db.command(
+            "collMod", collection, index={"name": name, "expireAfterSeconds": seconds}
+        )
+
+
+async def _drop_ttl_index(collection: str, field: str) -> None:
+    try:
+        await db[collection].drop_index(f"{field}_ttl")
+    except OperationFailure:
+        pass  # never installed
+
+
+async def ensure_retention_indexes() -> None:
+    """Install TTL backstops, but only while documents are archived before expiry.
+
+    Without periodic archival a TTL would delete data that was never
+    archived, so any existing TTL index is dropped instead.
+    """
+    for collection, policy in RETENTION_POLICIES.items():
+        validate_policy(collection, policy)
+        archived = policy["archive_after_days"] and ARCHIVE_INTERVAL_HOURS > 0
+        if policy["expire_after_days"] and archived:
+            await _ensure_ttl_index(
+                collection, policy["time_field"], policy["expire_after_days"] * 86400
+            )
+        elif policy["expire_after_days"]:
+            await _drop_ttl_index(collection, policy["time_field"])
+    await _ensure_ttl_index(
+        "archive_rehydrated", "rehydrated_at", REHYDRATED_TTL_DAYS * 86400
+    )
+
+
+async def archive_collection(
+    collection: str, policy: Dict[str, Any], root: str = ARCHIVE_DIR
+) -> int:
+    """Move documents older than the policy cut-off into date-partitioned files.
+
+    Files and the manifest are written before the documents are deleted, so a
+    crash can at worst archive a batch twice (rehydration de-duplicates on
+    ``_id``) but never lose it.
+    """
+    if not policy["archive_after_days"]:
+        return 0
+    time_field = policy["time_field"]
+    cutoff = datetime.utcnow() - timedelta(days=policy["archive_after_days"])
+    archived = 0
+    while True:
+        batch = (
+            await db[collection]
+            .find({time_field: {"$lt": cutoff}})
+            .sort(time_field, 1)
+            .to_list(length=ARCHIVE_BATCH_SIZE)
+        )
+        if not batch:
+            return archived
+        by_day: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for doc in batch:
+            by_day[doc[time_field].strftime("%Y-%m-%d")].append(doc)
+        entries = []
+        for day, docs in by_day.items():
+            path = partition_path(root, collection, day)
+            await asyncio.to_thread(write_partition, path, docs)
+            entries.append(manifest_entry(root, collection, day, path, docs))
+        await asyncio.to_thread(save_batch_manifest, root, entries)
+        # Search entries go first so a crash never leaves hits for archived documents.
+        deletes = search_index_deletes(collection, batch)
+        if deletes:
+            await db.search_index.bulk_write(
+                [DeleteMany(query) for query in deletes], ordered=False
+            )
+        await db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        archived += len(batch)
+
+
+async def archive_all(root: str = ARCHIVE_DIR) -> Dict[str, int]:
+    async with _archive_lock:
+        results = {}
+        for collection, policy in RETENTION_POLICIES.items():
+            results[collection] = await archive_collection(collection, policy, root)
+        return results
+
+
+async def rehydrate_user(
+    user_id: str, collections: Optional[List[str]] = None, root: str = ARCHIVE_DIR
+) -> Dict[str, int]:
+    """Load a user's archived documents into ``archive_rehydrated``.
+
+    Rehydrated copies carry their source ``collection`` and expire after
+    ``REHYDRATED_TTL_DAYS`` so they are not re-archived or kept forever.
+    """
+    manifest = await asyncio.to_thread(load_manifest, root)
+    counts: Dict[str, int] = defaultdict(int)
+    now = datetime.utcnow()
+    for entry in partitions_for_user(manifest, user_id, collections or ()):
+        path = os.path.join(root, entry["path"])
+        ops = []
+        docs = await asyncio.to_thread(lambda: list(read_partition(path)))
+        for doc in docs:
+            if doc.get("user_id") != user_id:
+                continue
+            doc["collection"] = entry["collection"]
+            doc["rehydrated_at"] = now
+            ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+        if ops:
+            await db.archive_rehydrated.bulk_write(ops, ordered=False)
+            counts[entry["collection"]] += len(ops)
+    return dict(counts)
+
+
+async def archival_loop() -> None:
+    while True:
+        try:
+            results = await archive_all()
+            logger.info("Archived documents: %s", results)
+        except Exception:
+            logger.exception("Archival run failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
+
+
+async def start_retention() -> None:
+    """Create TTL indexes and start the periodic archival job if enabled."""
+    global _archival_task
+    await ensure_retention_indexes()
+    if ARCHIVE_INTERVAL_HOURS > 0 and _archival_task is None:
+        _archival_task = asyncio.create_task(archival_loop())
+
+
+@router.post("/api/admin/archive/run")
+async def run_archive(_: Any = Depends(require_admin)):
+    return await archive_all()
+
+
+@router.post("/api/admin/archive/rehydrate/{user_id}")
+async def rehydrate(user_id: str, _: Any = Depends(require_admin)):
+    counts = await rehydrate_user(user_id)
+    return {"user_id": user_id, "rehydrated": counts}
+
+
+@router.get("/api/admin/archive/{user_id}")
+async def get_rehydrated(
+    user_id: str, collection: Optional[str] = None, _: Any = Depends(require_admin)
+):
+    query: Dict[str, Any] = {"user_id": user_id}
+    if collection:
+        query["collection"] = collection
+    docs = await db.archive_rehydrated.find(
+        query, {"_id": 0, "rehydrated_at": 0}
+    ).to_list(length=None)
+    return {"user_id": user_id, "count": len(docs), "documents": docs}
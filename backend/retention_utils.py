@@ -0,0 +1,161 @@
+"""Retention policies and the on-disk layout of cold archives."""
+
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+from bson import json_util
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+# Pre-split single manifest; still read, never written.
+MANIFEST_NAME = "manifest.json"
+MANIFEST_DIR = "manifests"
+
+
+def _days(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+# ``archive_after_days`` moves documents to disk; ``expire_after_days`` is a TTL
+# backstop in Mongo and must be larger so nothing expires before it is archived.
+# The TTL is only installed while periodic archival runs. A value of 0
+# disables that step.
+RETENTION_POLICIES: Dict[str, Dict[str, Any]] = {
+    "chat_history": {
+        "time_field": "timestamp",
+        "archive_after_days": _days("CHAT_ARCHIVE_AFTER_DAYS", 90),
+        "expire_after_days": _days("CHAT_EXPIRE_AFTER_DAYS", 180),
+    },
+    "mood_entries": {
+        "time_field": "date",
+        "archive_after_days": _days("TRACKER_ARCHIVE_AFTER_DAYS", 0),
+        "expire_after_days": 0,
+    },
+    "sleep_entries": {
+        "time_field": "date",
+        "archive_after_days": _days("TRACKER_ARCHIVE_AFTER_DAYS", 0),
+        "expire_after_days": 0,
+    },
+    "reflections": {
+        "time_field": "date",
+        "archive_after_days": _days("TRACKER_ARCHIVE_AFTER_DAYS", 0),
+        "expire_after_days": 0,
+    },
+}
+
+# ``search_index`` source of each collection whose text is searchable.
+SEARCH_SOURCES = {"mood_entries": "mood", "reflections": "reflection"}
+
+
+def validate_policy(collection: str, policy: Dict[str, Any]) -> None:
+    archive_after = policy["archive_after_days"]
+    expire_after = policy["expire_after_days"]
+    if archive_after and expire_after and expire_after <= archive_after:
+        raise ValueError(
+            f"{collection}: expire_after_days must exceed archive_after_days"
+        )
+
+
+def partition_path(root: str, collection: str, day: str) -> str:
+    """Return a fresh part file path inside the collection's date partition."""
+    name = f"part-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+    return os.path.join(root, collection, f"date={day}", name)
+
+
+def write_partition(path: str, docs: Iterable[Dict[str, Any]]) -> int:
+    """Write documents as gzip NDJSON (Extended JSON) and return the count."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    count = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+        for doc in docs:
+            fh.write(json_util.dumps(doc, ensure_ascii=False))
+            fh.write("\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_partition(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json_util.loads(line)
+
+
+def load_manifest(root: str) -> Dict[str, Any]:
+    """Merge every batch manifest (and a legacy ``manifest.json``) under ``root``."""
+    partitions: List[Dict[str, Any]] = []
+    legacy = os.path.join(root, MANIFEST_NAME)
+    if os.path.exists(legacy):
+        with open(legacy, encoding="utf-8") as fh:
+            partitions.extend(json.load(fh)["partitions"])
+    directory = os.path.join(root, MANIFEST_DIR)
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".json"):
+                with open(os.path.join(directory, name), encoding="utf-8") as fh:
+                    partitions.extend(json.load(fh)["partitions"])
+    return {"partitions": partitions}
+
+
+def save_batch_manifest(root: str, entries: List[Dict[str, Any]]) -> str:
+    """Write one archive batch's entries to their own manifest file.
+
+    Each batch gets a new file, so concurrent archive runs (on several
+    replicas) never overwrite each other's entries.
+    """
+    directory = os.path.join(root, MANIFEST_DIR)
+    os.makedirs(directory, exist_ok=True)
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.json"
+    path = os.path.join(directory, name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump({"partitions": entries}, fh, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+
+def manifest_entry(
+    root: str, collection: str, day: str, path: str, docs: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    return {
+        "collection": collection,
+        "date": day,
+        "path": os.path.relpath(path, root),
+        "count": len(docs),
+        "user_ids": sorted({doc.get("user_id") for doc in docs if doc.get("user_id")}),
+        "archived_at": datetime.utcnow().isoformat(),
+    }
+
+
+def partitions_for_user(
+    manifest: Dict[str, Any], user_id: str, collections: Iterable[str] = ()
+) -> List[Dict[str, Any]]:
+    wanted = set(collections)
+    return [
+        entry
+        for entry in manifest["partitions"]
+        if user_id in entry["user_ids"]
+        and (not wanted or entry["collection"] in wanted)
+    ]
+
+
+def search_index_deletes(collection: str, docs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-user ``search_index`` filters covering the archived ``docs``."""
+    source = SEARCH_SOURCES.get(collection)
+    if source is None:
+        return []
+    entry_ids: Dict[str, List[str]] = {}
+    for doc in docs:
+        if doc.get("user_id"):
+            entry_ids.setdefault(doc["user_id"], []).append(
+                doc.get("entry_id", str(doc["_id"]))
+            )
+    return [
+        {"user_id": user_id, "source": source, "entry_id": {"$in": ids}}
+        for user_id, ids in entry_ids.items()
+    ]
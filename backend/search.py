@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from auth import get_current_user
+from database import db
+from search_utils import (
+    MAX_CANDIDATES,
+    MAX_QUERY_TERMS,
+    build_search_pipeline,
+    highlight_spans,
+    tokenize,
+)
+
+router = APIRouter()
+
+
+async def index_entry(
+    user_id: str, source: str, entry_id: str, text: str, date: datetime
+) -> None:
+    """Insert or refresh the search index entry for one reflection or mood note."""
+    key = {"user_id": user_id, "source": source, "entry_id": entry_id}
+    terms = tokenize(text or "")
+    if not terms:
+        await db.search_index.delete_one(key)
+        return
+    await db.search_index.update_one(
+        key,
+        {"$set": {**key, "text": text, "terms": terms, "date": date}},
+        upsert=True,
+    )
+
+
+@router.get("/api/search")
+async def search_entries(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user=Depends(get_current_user),
+):
+    terms = tokenize(q)[:MAX_QUERY_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="عبارت جستجو معتبر نیست")
+    pipeline = build_search_pipeline(
+        current_user["user_id"], terms, (page - 1) * page_size, page_size
+    )
+    result = await db.search_index.aggregate(pipeline).to_list(length=1)
+    facet = result[0] if result else {"total": [], "items": []}
+    total = facet["total"][0]["count"] if facet["total"] else 0
+    items = facet["items"]
+    for item in items:
+        item["highlights"] = highlight_spans(item["text"], terms)
+    return {
+        "query": q,
+        "terms": terms,
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        # Older matches beyond the cap are not ranked.
+        "total_capped": total >= MAX_CANDIDATES,
+        "results": items,
+    }
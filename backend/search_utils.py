@@ -0,0 +1,107 @@
+"""Persian text normalization, tokenization and highlighting for search."""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+# Arabic code points commonly typed in Persian text, mapped to Persian forms.
+CHAR_MAP = {
+    "ك": "ک",
+    "ي": "ی",
+    "ى": "ی",
+    "ئ": "ی",
+    "ة": "ه",
+    "ۀ": "ه",
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ؤ": "و",
+}
+for _i, _digit in enumerate("۰۱۲۳۴۵۶۷۸۹"):
+    CHAR_MAP[_digit] = str(_i)
+for _i, _digit in enumerate("٠١٢٣٤٥٦٧٨٩"):
+    CHAR_MAP[_digit] = str(_i)
+
+# Diacritics, tatweel and zero-width joiners are dropped so that
+# "می‌خواهم" and "میخواهم" index to the same token.
+DROPPED_CHARS = set("ـ‌‍‎‏") | {
+    chr(c) for c in range(0x064B, 0x0660)
+} | {"ٰ"}
+
+STOPWORDS = frozenset(
+    {
+        "و", "در", "به", "از", "که", "این", "ان", "را", "با", "است", "برای",
+        "تا", "هم", "یا", "بر", "هر", "من", "تو", "او", "ما", "شما", "انها",
+        "بود", "شد", "می", "های", "ها", "یک", "نیز", "اما", "the", "a", "an",
+        "and", "or", "of", "to", "in", "is",
+    }
+)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_QUERY_TERMS = 10
+# Only the newest matching entries are ranked, so a search costs the same
+# however many entries the user has.
+MAX_CANDIDATES = 500
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """Normalize text and return, for each output char, its source index."""
+    chars: List[str] = []
+    offsets: List[int] = []
+    for i, ch in enumerate(text):
+        if ch in DROPPED_CHARS:
+            continue
+        # Lowercasing can lengthen a character, so every piece maps back to
+        # ``i``; the combining dot it adds to "İ" would split the word.
+        lowered = CHAR_MAP.get(ch, ch).lower().replace("\u0307", "")
+        chars.append(lowered)
+        offsets.extend([i] * len(lowered))
+    return "".join(chars), offsets
+
+
+def normalize_persian(text: str) -> str:
+    return normalize_with_offsets(text)[0]
+
+
+def tokenize(text: str) -> List[str]:
+    """Return the distinct normalized terms of ``text`` in first-seen order."""
+    seen: Dict[str, None] = {}
+    for token in TOKEN_RE.findall(normalize_persian(text)):
+        if token not in STOPWORDS:
+            seen.setdefault(token, None)
+    return list(seen)
+
+
+def highlight_spans(text: str, terms: List[str]) -> List[Tuple[int, int]]:
+    """Return ``(start, end)`` offsets into ``text`` of tokens matching ``terms``."""
+    wanted = set(terms)
+    normalized, offsets = normalize_with_offsets(text)
+    spans = []
+    for match in TOKEN_RE.finditer(normalized):
+        if match.group() in wanted:
+            spans.append((offsets[match.start()], offsets[match.end() - 1] + 1))
+    return spans
+
+
+def build_search_pipeline(
+    user_id: str, terms: List[str], skip: int, limit: int, candidates: int = MAX_CANDIDATES
+) -> List[Dict[str, Any]]:
+    """Rank a user's newest ``candidates`` matching entries by the number of
+    distinct matched terms; ``total`` counts at most ``candidates``."""
+    return [
+        {"$match": {"user_id": user_id, "terms": {"$in": terms}}},
+        {"$sort": {"date": -1}},
+        {"$limit": candidates},
+        {"$addFields": {"score": {"$size": {"$setIntersection": ["$terms", terms]}}}},
+        {"$sort": {"score": -1, "date": -1}},
+        {
+            "$facet": {
+                "total": [{"$count": "count"}],
+                "items": [
+                    {"$skip": skip},
+                    {"$limit": limit},
+                    {"$project": {"_id": 0, "terms": 0, "user_id": 0}},
+                ],
+            }
+        },
+    ]
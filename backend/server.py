@@ -2,9 +2,18 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from analytics import router as analytics_router
 from auth import router as auth_router
+from assessment_stats import router as assessment_stats_router
 from assessments import router as assessments_router
+from database import db
+from indexes import ensure_indexes_safely
+from research import router as research_router
+from retention import router as retention_router, start_retention
+from search import router as search_router
+from stream import router as stream_router
 from trackers import router as trackers_router
+from xp_ledger import start_xp_ledger, stop_xp_ledger
 
 load_dotenv()
 
@@ -26,6 +35,24 @@ async def health_check():
 app.include_router(auth_router)
 app.include_router(assessments_router)
 app.include_router(trackers_router)
+app.include_router(analytics_router)
+app.include_router(search_router)
+app.include_router(retention_router)
+app.include_router(research_router)
+app.include_router(assessment_stats_router)
+app.include_router(stream_router)
+
+
+@app.on_event("startup")
+async def startup():
+    await ensure_indexes_safely(db)
+    await start_xp_ledger()
+    await start_retention()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_xp_ledger()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,11 @@
 from fastapi import FastAPI
+from assessment_stats import router as assessment_stats_router
 from assessments import router as assessments_router
+from database import db
+from events import require_shared_events
+from indexes import ensure_indexes_safely
+from research import router as research_router
+from xp_ledger import start_xp_ledger, stop_xp_ledger
 
 app = FastAPI(title="Assessments Service")
 
@@ -10,6 +16,21 @@ async def health_check():
 
 
 app.include_router(assessments_router)
+app.include_router(research_router)
+app.include_router(assessment_stats_router)
+
+
+@app.on_event("startup")
+async def startup():
+    require_shared_events()
+    await ensure_indexes_safely(db)
+    await start_xp_ledger()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_xp_ledger()
+
 
 if __name__ == "__main__":
     import uvicorn
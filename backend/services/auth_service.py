@@ -1,5 +1,7 @@
 from fastapi import FastAPI
 from auth import router as auth_router
+from database import db
+from indexes import ensure_indexes_safely
 
 app = FastAPI(title="Auth Service")
 
@@ -11,6 +13,12 @@ async def health_check():
 
 app.include_router(auth_router)
 
+
+@app.on_event("startup")
+async def startup():
+    await ensure_indexes_safely(db)
+
+
 if __name__ == "__main__":
     import uvicorn
 
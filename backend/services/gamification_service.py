@@ -1,5 +1,10 @@
 from fastapi import FastAPI
 from gamification import router as gamification_router
+from database import db
+from events import require_shared_events
+from indexes import ensure_indexes_safely
+from stream import router as stream_router
+from xp_ledger import start_xp_ledger, stop_xp_ledger
 
 app = FastAPI(title="Gamification Service")
 
@@ -10,6 +15,20 @@ async def health_check():
 
 
 app.include_router(gamification_router)
+app.include_router(stream_router)
+
+
+@app.on_event("startup")
+async def startup():
+    require_shared_events()
+    await ensure_indexes_safely(db)
+    await start_xp_ledger()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_xp_ledger()
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 
+from database import db
 from idp import router as idp_router
+from indexes import ensure_indexes_safely
 
 app = FastAPI(title="IDP Service")
 
@@ -13,6 +15,11 @@ async def health_check():
 app.include_router(idp_router)
 
 
+@app.on_event("startup")
+async def startup():
+    await ensure_indexes_safely(db)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,5 +1,8 @@
 from fastapi import FastAPI
 from journeys import router as journeys_router
+from database import db
+from events import require_shared_events
+from indexes import ensure_indexes_safely
 
 app = FastAPI(title="Journeys Service")
 
@@ -11,6 +14,13 @@ async def health_check():
 
 app.include_router(journeys_router)
 
+
+@app.on_event("startup")
+async def startup():
+    require_shared_events()
+    await ensure_indexes_safely(db)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,5 +1,12 @@
 from fastapi import FastAPI
+from analytics import router as analytics_router
+from database import db
+from events import require_shared_events
+from indexes import ensure_indexes_safely
+from retention import router as retention_router, start_retention
+from search import router as search_router
 from trackers import router as trackers_router
+from xp_ledger import start_xp_ledger, stop_xp_ledger
 
 app = FastAPI(title="Trackers Service")
 
@@ -10,6 +17,23 @@ async def health_check():
 
 
 app.include_router(trackers_router)
+app.include_router(analytics_router)
+app.include_router(search_router)
+app.include_router(retention_router)
+
+
+@app.on_event("startup")
+async def startup():
+    require_shared_events()
+    await ensure_indexes_safely(db)
+    await start_xp_ledger()
+    await start_retention()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_xp_ledger()
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,126 @@
+"""Rotating refresh-token sessions.
+
+Refresh tokens are random strings stored only as SHA-256 digests, so renewing
+an access token is a single indexed lookup rather than a bcrypt check. Each
+use rotates the token; presenting an already-rotated token revokes the
+session because it means the token was copied.
+
+Tabs and reconnecting streams of one client often rotate the same token at
+once. Each successor is derived from its predecessor with a per-session key,
+so for ``REFRESH_REUSE_GRACE_SECONDS`` after a rotation the previous token
+is answered with the current one instead of being treated as reuse.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from database import db
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+REFRESH_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "30"))
+
+SESSION_PROJECTION = {
+    "_id": 0,
+    "session_id": 1,
+    "user_id": 1,
+    "token_hash": 1,
+    "previous_hash": 1,
+    "rotation_key": 1,
+    "last_used_at": 1,
+    "expires_at": 1,
+    "revoked": 1,
+}
+
+
+def generate_refresh_token() -> str:
+    return secrets.token_urlsafe(48)
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def next_refresh_token(token: str, key: str) -> str:
+    """Successor of ``token``; computing it needs both the token and the session key."""
+    digest = hmac.new(key.encode("utf-8"), token.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def _rotation_key(session: Dict[str, Any]) -> str:
+    # Sessions created before rotation keys existed fall back to their id.
+    return session.get("rotation_key") or session["session_id"]
+
+
+async def create_session(user_id: str, user_agent: Optional[str] = None) -> str:
+    token = generate_refresh_token()
+    now = datetime.utcnow()
+    await db.sessions.insert_one(
+        {
+            "session_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "token_hash": hash_token(token),
+            "previous_hash": None,
+            "rotation_key": secrets.token_hex(32),
+            "user_agent": user_agent,
+            "created_at": now,
+            "last_used_at": now,
+            "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            "revoked": False,
+        }
+    )
+    return token
+
+
+async def rotate_session(token: str) -> Optional[Tuple[str, str]]:
+    """Swap a valid refresh token for its successor; return ``(user_id, token)``."""
+    token_hash = hash_token(token)
+    now = datetime.utcnow()
+    session = await db.sessions.find_one(
+        {"$or": [{"token_hash": token_hash}, {"previous_hash": token_hash}]},
+        SESSION_PROJECTION,
+    )
+    if session is None or session["revoked"] or session["expires_at"] <= now:
+        return None
+    new_token = next_refresh_token(token, _rotation_key(session))
+    if session["token_hash"] == token_hash:
+        result = await db.sessions.update_one(
+            {"session_id": session["session_id"], "token_hash": token_hash, "revoked": False},
+            {
+                "$set": {
+                    "token_hash": hash_token(new_token),
+                    "previous_hash": token_hash,
+                    "last_used_at": now,
+                }
+            },
+        )
+        if result.modified_count:
+            return session["user_id"], new_token
+        # A concurrent request rotated this token first; answer like it did.
+        session = await db.sessions.find_one(
+            {"session_id": session["session_id"]}, SESSION_PROJECTION
+        )
+        if session is None or session["revoked"]:
+            return None
+    if session.get("previous_hash") == token_hash and now - session[
+        "last_used_at"
+    ] <= timedelta(seconds=REFRESH_REUSE_GRACE_SECONDS):
+        if session["token_hash"] == hash_token(new_token):
+            return session["user_id"], new_token
+        # Rotated before successors were derived: refuse without revoking.
+        return None
+    await db.sessions.update_one(
+        {"session_id": session["session_id"]}, {"$set": {"revoked": True}}
+    )
+    return None
+
+
+async def revoke_session(token: str) -> None:
+    await db.sessions.update_one(
+        {"token_hash": hash_token(token)}, {"$set": {"revoked": True}}
+    )
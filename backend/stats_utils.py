@@ -0,0 +1,199 @@
+"""Histogram-backed population statistics for assessment scores.
+
+Scores are small integers, so every (assessment type, metric, month,
+student level, age band) cell keeps an exact count per score. Counts are
+incremented on submission, and percentiles, means and severity
+distributions for any slice are computed by summing the matching cells'
+histograms instead of scanning assessments.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+CELL_FIELDS = ("assessment_type", "month", "student_level", "age_band")
+GROUP_BY = ("none", "month", "student_level", "age_band")
+PERCENTILES = (10, 25, 50, 75, 90)
+UNKNOWN = "unknown"
+
+
+def build_stats_updates(
+    cell: Mapping[str, str], results: Mapping[str, Any], metrics: Sequence[str]
+) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """``(filter, update)`` upserts adding one submission to its cell."""
+    updates = []
+    for metric in metrics:
+        score = results.get(metric)
+        if not isinstance(score, int):
+            continue
+        updates.append(
+            (
+                {**cell, "metric": metric},
+                {"$inc": {f"counts.{score}": 1, "n": 1, "sum": score}},
+            )
+        )
+    return updates
+
+
+def merge_counts(docs: Iterable[Mapping[str, Any]]) -> Dict[int, int]:
+    merged: Dict[int, int] = defaultdict(int)
+    for doc in docs:
+        for score, count in (doc.get("counts") or {}).items():
+            merged[int(score)] += count
+    return dict(merged)
+
+
+def histogram_percentile(counts: Mapping[int, int], q: float) -> Optional[int]:
+    """Smallest score with at least ``q`` percent of samples at or below it."""
+    total = sum(counts.values())
+    if not total:
+        return None
+    rank = max(1, -(-q * total // 100))
+    seen = 0
+    for score in sorted(counts):
+        seen += counts[score]
+        if seen >= rank:
+            return score
+    return max(counts)
+
+
+def summarize_histogram(
+    counts: Mapping[int, int],
+    bounds: Sequence[int],
+    labels: Sequence[str],
+    percentiles: Sequence[int] = PERCENTILES,
+) -> Dict[str, Any]:
+    """Count, mean, percentiles and severity distribution of one histogram.
+
+    Levels are banded with the current cut-offs, so the distribution always
+    agrees with how assessments are scored now.
+    """
+    n = sum(counts.values())
+    levels = {label: 0 for label in labels}
+    for score, count in counts.items():
+        levels[labels[bisect_left(bounds, score)]] += count
+    return {
+        "n": n,
+        "mean": round(sum(s * c for s, c in counts.items()) / n, 2) if n else None,
+        "percentiles": {f"p{q}": histogram_percentile(counts, q) for q in percentiles},
+        "levels": levels,
+    }
+
+
+def group_stats(
+    docs: Iterable[Mapping[str, Any]],
+    group_by: str,
+    bands: Mapping[str, Tuple[Sequence[int], Sequence[str]]],
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Summaries per metric and group value from stored cells."""
+    if group_by not in GROUP_BY:
+        raise ValueError(f"Unsupported grouping: {group_by}")
+    grouped: Dict[str, Dict[str, List[Mapping[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+    for doc in docs:
+        key = "all" if group_by == "none" else doc.get(group_by, UNKNOWN)
+        grouped[doc["metric"]][key].append(doc)
+    return {
+        metric: {
+            key: summarize_histogram(merge_counts(cells), *bands[metric])
+            for key, cells in sorted(groups.items())
+        }
+        for metric, groups in grouped.items()
+        if metric in bands
+    }
+
+
+def age_band_expr(field: str, age_bands: Sequence[Tuple[int, int, str]]) -> Dict[str, Any]:
+    return {
+        "$switch": {
+            "branches": [
+                {
+                    "case": {"$and": [{"$gte": [field, low]}, {"$lt": [field, high]}]},
+                    "then": label,
+                }
+                for low, high, label in age_bands
+            ],
+            "default": UNKNOWN,
+        }
+    }
+
+
+def build_rebuild_pipeline(
+    metrics: Mapping[str, Sequence[str]],
+    age_bands: Sequence[Tuple[int, int, str]],
+    out: str = "assessment_stats",
+    before: Optional[Any] = None,
+) -> List[Dict[str, Any]]:
+    """Aggregation over ``assessments`` that rewrites every histogram cell.
+
+    With ``before``, only assessments whose ``_id`` sorts below it count.
+    """
+    all_metrics = sorted({m for names in metrics.values() for m in names})
+    match: Dict[str, Any] = {"assessment_type": {"$in": list(metrics)}}
+    if before is not None:
+        match["_id"] = {"$lt": before}
+    return [
+        {"$match": match},
+        {
+            "$lookup": {
+                "from": "users",
+                "localField": "user_id",
+                "foreignField": "user_id",
+                "as": "user",
+            }
+        },
+        {"$set": {"user": {"$arrayElemAt": ["$user", 0]}}},
+        {
+            "$project": {
+                "_id": 0,
+                "assessment_type": 1,
+                "month": {
+                    "$ifNull": [
+                        {"$dateToString": {"format": "%Y-%m", "date": "$completed_at"}},
+                        UNKNOWN,
+                    ]
+                },
+                "student_level": {"$ifNull": ["$user.student_level", UNKNOWN]},
+                "age_band": age_band_expr("$user.age", age_bands),
+                "scores": {
+                    "$filter": {
+                        "input": {"$objectToArray": {"$ifNull": ["$results", {}]}},
+                        "cond": {
+                            "$and": [
+                                {"$in": ["$$this.k", all_metrics]},
+                                {"$isNumber": "$$this.v"},
+                            ]
+                        },
+                    }
+                },
+            }
+        },
+        {"$unwind": "$scores"},
+        {
+            "$group": {
+                "_id": {
+                    **{field: f"${field}" for field in CELL_FIELDS},
+                    "metric": "$scores.k",
+                    "score": "$scores.v",
+                },
+                "count": {"$sum": 1},
+            }
+        },
+        {
+            "$group": {
+                "_id": {field: f"$_id.{field}" for field in (*CELL_FIELDS, "metric")},
+                "counts": {"$push": {"k": {"$toString": "$_id.score"}, "v": "$count"}},
+                "n": {"$sum": "$count"},
+                "sum": {"$sum": {"$multiply": ["$_id.score", "$count"]}},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                **{field: f"$_id.{field}" for field in (*CELL_FIELDS, "metric")},
+                "counts": {"$arrayToObject": "$counts"},
+                "n": 1,
+                "sum": 1,
+            }
+        },
+        {"$out": out},
+    ]
@@ -0,0 +1,56 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from auth import user_from_token
+from database import db
+from events import broker
+from pubsub_utils import format_sse
+
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+router = APIRouter()
+
+
+@router.get("/api/gamification/stream")
+async def gamification_stream(request: Request, token: str):
+    """Server-Sent Events feed of the user's XP, level and badges.
+
+    ``EventSource`` cannot send headers, so the access token comes in the
+    query string. The current state is sent first, then every change.
+    """
+    user_id = (await user_from_token(token))["user_id"]
+
+    async def events():
+        # Subscribe before reading the state so no award falls in between;
+        # the state comes from MongoDB, not the possibly stale principal.
+        queue = broker.subscribe(user_id)
+        try:
+            user = await db.users.find_one(
+                {"user_id": user_id}, {"_id": 0, "xp": 1, "level": 1, "badges": 1}
+            ) or {}
+            yield format_sse(
+                "gamification",
+                {
+                    "xp": user.get("xp", 0),
+                    "level": user.get("level", 1),
+                    "badges": user.get("badges", []),
+                },
+            )
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(message["event"], message["data"])
+        finally:
+            broker.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,56 @@
+"""Access-token signing and local verification shared by all services.
+
+With the default ``HS256`` every service shares ``SECRET_KEY``. With
+``JWT_ALGORITHM=RS256`` only the issuer (auth/IDP) needs ``JWT_PRIVATE_KEY``;
+other services verify tokens locally with ``JWT_PUBLIC_KEY``, which the IDP
+also publishes at ``/.well-known/jwks.json``.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import jwt
+
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_KEY_ID = os.getenv("JWT_KEY_ID", "default")
+SECRET_KEY = os.getenv("SECRET_KEY")
+JWT_PRIVATE_KEY = os.getenv("JWT_PRIVATE_KEY")
+JWT_PUBLIC_KEY = os.getenv("JWT_PUBLIC_KEY")
+
+if JWT_ALGORITHM == "HS256":
+    if not SECRET_KEY:
+        raise RuntimeError("SECRET_KEY environment variable is required")
+    SIGNING_KEY = VERIFYING_KEY = SECRET_KEY
+elif JWT_ALGORITHM == "RS256":
+    if not JWT_PUBLIC_KEY:
+        raise RuntimeError("JWT_PUBLIC_KEY environment variable is required for RS256")
+    SIGNING_KEY, VERIFYING_KEY = JWT_PRIVATE_KEY, JWT_PUBLIC_KEY
+else:
+    raise RuntimeError(f"Unsupported JWT_ALGORITHM: {JWT_ALGORITHM}")
+
+
+def create_access_token(data: Dict[str, Any], expires_minutes: int) -> str:
+    if not SIGNING_KEY:
+        raise RuntimeError("JWT_PRIVATE_KEY is required to issue tokens")
+    to_encode = data.copy()
+    to_encode.update({"exp": datetime.utcnow() + timedelta(minutes=expires_minutes)})
+    return jwt.encode(
+        to_encode, SIGNING_KEY, algorithm=JWT_ALGORITHM, headers={"kid": JWT_KEY_ID}
+    )
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Verify a token locally; raises ``jwt.PyJWTError`` when invalid."""
+    return jwt.decode(token, VERIFYING_KEY, algorithms=[JWT_ALGORITHM])
+
+
+def public_jwks() -> Dict[str, Any]:
+    """Return the verification key set; empty for shared-secret signing."""
+    if JWT_ALGORITHM != "RS256":
+        return {"keys": []}
+    rsa = jwt.algorithms.RSAAlgorithm(jwt.algorithms.RSAAlgorithm.SHA256)
+    jwk = json.loads(rsa.to_jwk(rsa.prepare_key(VERIFYING_KEY)))
+    jwk.update({"kid": JWT_KEY_ID, "alg": JWT_ALGORITHM, "use": "sig"})
+    return {"keys": [jwk]}
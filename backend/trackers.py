@@ -1,15 +1,22 @@
+import asyncio
 from datetime import datetime, timedelta
 import random
 import uuid
 from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 
 from auth import get_current_user, award_xp
+from badges import record_daily_entry
+from concurrency_utils import run_concurrently
 from database import db
-from journeys_utils import get_default_journeys
+from journeys import catalog_response
+from journeys_utils import journey_catalog
+from memory_utils import MemoryValidationError
 from nlp_analysis import analyze_mental_state
+from search import index_entry
+from user_memory import get_user_memory, update_user_memory
 
 router = APIRouter()
 
@@ -110,23 +117,35 @@ def generate_chat_response(
 async def save_mood_entry(mood_data: MoodEntry, current_user=Depends(get_current_user)):
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     tomorrow = today + timedelta(days=1)
-    existing_entry = await db.mood_entries.find_one(
-        {"user_id": current_user["user_id"], "date": {"$gte": today, "$lt": tomorrow}}
+    # The model runs in a worker thread while today's entry is looked up.
+    existing_entry, analysis = await run_concurrently(
+        db.mood_entries.find_one(
+            {"user_id": current_user["user_id"], "date": {"$gte": today, "$lt": tomorrow}}
+        ),
+        asyncio.to_thread(analyze_mental_state, mood_data.note or ""),
     )
     mood_doc = {
         "user_id": current_user["user_id"],
         "mood_level": mood_data.mood_level,
         "note": mood_data.note,
-        "analysis": analyze_mental_state(mood_data.note or ""),
+        "analysis": analysis,
         "date": datetime.utcnow(),
     }
     if existing_entry:
         await db.mood_entries.update_one(
             {"_id": existing_entry["_id"]}, {"$set": mood_doc}
         )
+        entry_id = existing_entry.get("entry_id", str(existing_entry["_id"]))
     else:
-        mood_doc["entry_id"] = str(uuid.uuid4())
+        mood_doc["entry_id"] = entry_id = str(uuid.uuid4())
         await db.mood_entries.insert_one(mood_doc)
+    await run_concurrently(
+        index_entry(
+            current_user["user_id"], "mood", entry_id, mood_data.note or "", mood_doc["date"]
+        ),
+        record_daily_entry(current_user["user_id"]),
+        cancel_on_error=False,
+    )
     return {"message": "خلق و خو با موفقیت ذخیره شد"}
 
 
@@ -161,7 +180,7 @@ async def save_sleep_entry(
     else:
         doc["entry_id"] = str(uuid.uuid4())
         await db.sleep_entries.insert_one(doc)
-    await award_xp(current_user["user_id"], 5)
+    await award_xp(current_user["user_id"], 5, "sleep")
     return {"message": "اطلاعات خواب ذخیره شد"}
 
 
@@ -191,10 +210,17 @@ async def save_daily_reflection(
     }
     if existing:
         await db.reflections.update_one({"_id": existing["_id"]}, {"$set": doc})
+        entry_id = existing.get("entry_id", str(existing["_id"]))
     else:
-        doc["entry_id"] = str(uuid.uuid4())
+        doc["entry_id"] = entry_id = str(uuid.uuid4())
         await db.reflections.insert_one(doc)
-    await award_xp(current_user["user_id"], 5)
+    await run_concurrently(
+        index_entry(
+            current_user["user_id"], "reflection", entry_id, reflection.text, doc["date"]
+        ),
+        award_xp(current_user["user_id"], 5, "reflection"),
+        cancel_on_error=False,
+    )
     return {"message": "یادداشت روزانه ذخیره شد"}
 
 
@@ -210,13 +236,17 @@ async def get_daily_reflections(current_user=Depends(get_current_user)):
 
 @router.post("/api/chat")
 async def chat_with_bot(chat_data: ChatMessage, current_user=Depends(get_current_user)):
-    response = generate_chat_response(chat_data.message, current_user.get("memory", {}))
+    memory, analysis = await run_concurrently(
+        get_user_memory(current_user["user_id"]),
+        asyncio.to_thread(analyze_mental_state, chat_data.message),
+    )
+    response = generate_chat_response(chat_data.message, memory)
     chat_doc = {
         "chat_id": str(uuid.uuid4()),
         "user_id": current_user["user_id"],
         "user_message": chat_data.message,
         "bot_response": response,
-        "analysis": analyze_mental_state(chat_data.message),
+        "analysis": analysis,
         "timestamp": datetime.utcnow(),
     }
     await db.chat_history.insert_one(chat_doc)
@@ -243,30 +273,30 @@ async def get_mental_health_plan(current_user=Depends(get_current_user)):
 
 
 @router.get("/api/journeys")
-async def get_journeys(_: Any = Depends(get_current_user)):
-    return get_default_journeys()
+async def get_journeys(request: Request, _: Any = Depends(get_current_user)):
+    catalog = journey_catalog.current()
+    return catalog_response(request, catalog.list_body, catalog.list_etag)
 
 
 @router.get("/api/gamification")
 async def get_gamification(current_user=Depends(get_current_user)):
-    user = await db.users.find_one({"user_id": current_user["user_id"]})
     return {
-        "xp": user.get("xp", 0),
-        "level": user.get("level", 1),
-        "badges": user.get("badges", []),
+        "xp": current_user.get("xp", 0),
+        "level": current_user.get("level", 1),
+        "badges": current_user.get("badges", []),
     }
 
 
 @router.get("/api/memory")
 async def get_memory(current_user=Depends(get_current_user)):
-    return current_user.get("memory", {})
+    return await get_user_memory(current_user["user_id"])
 
 
 @router.put("/api/memory")
 async def update_memory(update: MemoryUpdate, current_user=Depends(get_current_user)):
-    memory = current_user.get("memory", {})
-    memory.update(update.memory)
-    await db.users.update_one(
-        {"user_id": current_user["user_id"]}, {"$set": {"memory": memory}}
-    )
+    """Merge the given keys into memory; a ``null`` value deletes that key."""
+    try:
+        memory = await update_user_memory(current_user["user_id"], update.memory)
+    except MemoryValidationError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     return {"memory": memory}
@@ -0,0 +1,127 @@
+"""Cache of authenticated user principals, keyed by ``user_id``.
+
+With ``REDIS_URL`` set, lookups go to Redis before falling back to MongoDB,
+so an ``invalidate`` made by any service is seen by every other one.
+Without it (a single process) an in-process LRU with a short TTL takes
+Redis's place. Code that changes cached fields must call ``invalidate``.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from cache_utils import LRUCache
+from database import db
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis tier is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Only the fields request handlers read from ``current_user``.
+PRINCIPAL_FIELDS = (
+    "user_id",
+    "email",
+    "full_name",
+    "age",
+    "student_level",
+    "xp",
+    "level",
+    "badges",
+    "is_admin",
+)
+PRINCIPAL_PROJECTION = {"_id": 0, **{field: 1 for field in PRINCIPAL_FIELDS}}
+
+
+class UserCache:
+    def __init__(self) -> None:
+        self.redis = aioredis.from_url(REDIS_URL) if aioredis and REDIS_URL else None
+        # A per-process tier would keep serving a principal that another
+        # service invalidated, so it is only used without Redis.
+        self.local = (
+            LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+            if self.redis is None
+            else None
+        )
+        self.lookups = 0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.db_reads = 0
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"user:{user_id}"
+
+    async def _redis_get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(self._key(user_id))
+        except Exception:
+            logger.warning("Redis user cache read failed", exc_info=True)
+            return None
+        return json.loads(raw) if raw else None
+
+    async def _redis_set(self, user_id: str, user: Dict[str, Any]) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(
+                self._key(user_id),
+                json.dumps(user, default=str),
+                ex=max(1, int(USER_CACHE_TTL_SECONDS)),
+            )
+        except Exception:
+            logger.warning("Redis user cache write failed", exc_info=True)
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        self.lookups += 1
+        if self.local is not None:
+            user = self.local.get(user_id)
+            if user is not None:
+                self.local_hits += 1
+                return dict(user)
+        user = await self._redis_get(user_id)
+        if user is not None:
+            self.redis_hits += 1
+            return dict(user)
+        self.db_reads += 1
+        user = await db.users.find_one({"user_id": user_id}, PRINCIPAL_PROJECTION)
+        if user is not None:
+            if self.local is not None:
+                self.local.set(user_id, user)
+            await self._redis_set(user_id, user)
+            return dict(user)
+        return None
+
+    async def invalidate(self, user_id: str) -> None:
+        if self.local is not None:
+            self.local.pop(user_id)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(self._key(user_id))
+            except Exception:
+                logger.warning("Redis user cache invalidation failed", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        saved = self.local_hits + self.redis_hits
+        return {
+            "lookups": self.lookups,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "db_reads": self.db_reads,
+            "user_reads_saved": saved,
+            "hit_ratio": saved / self.lookups if self.lookups else 0.0,
+            "size": self.local.stats()["size"] if self.local is not None else 0,
+            "redis_enabled": self.redis is not None,
+        }
+
+
+user_cache = UserCache()
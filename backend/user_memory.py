@@ -0,0 +1,51 @@
+"""Storage for per-user chatbot memory, kept outside the user document."""
+
+from typing import Any, Dict
+
+from pymongo import ReturnDocument
+
+from database import db
+from memory_utils import MemoryValidationError, build_memory_update, key_limit_expr
+
+
+async def get_user_memory(user_id: str) -> Dict[str, Any]:
+    doc = await db.user_memory.find_one(
+        {"user_id": user_id}, {"_id": 0, "memory": 1}
+    )
+    if not doc:
+        return {}
+    return doc.get("memory", {})
+
+
+async def create_user_memory(user_id: str) -> None:
+    await db.user_memory.update_one(
+        {"user_id": user_id},
+        {"$setOnInsert": {"user_id": user_id, "memory": {}}},
+        upsert=True,
+    )
+
+
+async def update_user_memory(user_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a partial update touching only the changed keys.
+
+    The key cap is part of the filter, so concurrent updates cannot push the
+    memory past ``MAX_MEMORY_KEYS``.
+    """
+    update = build_memory_update(changes)
+    if not update:
+        return await get_user_memory(user_id)
+    query = {"user_id": user_id, "$expr": key_limit_expr(changes)}
+    projection = {"_id": 0, "memory": 1}
+    doc = await db.user_memory.find_one_and_update(
+        query, update, projection=projection, return_document=ReturnDocument.AFTER
+    )
+    if doc is None:
+        if await db.user_memory.count_documents({"user_id": user_id}, limit=1):
+            raise MemoryValidationError("Memory key limit exceeded")
+        await create_user_memory(user_id)
+        doc = await db.user_memory.find_one_and_update(
+            query, update, projection=projection, return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            raise MemoryValidationError("Memory key limit exceeded")
+    return doc.get("memory", {})
@@ -0,0 +1,300 @@
+"""Append-only XP event ledger with periodic folding.
+
+``award_xp`` durably records every award here before it touches the live
+counter on the user document; awards arriving while an insert is in flight
+are written together by the next ``insert_many``. A fold claims unfolded events under a
+``batch_id`` and folds them into ``xp_totals`` and the weekly/monthly
+``xp_buckets`` (which back the period leaderboards and expire through a TTL
+index) with one bulk write per collection. Each award schedules a fold
+``XP_FOLD_DELAY_SECONDS`` later, shared by every award in between, so period
+boards trail awards by about that long; the periodic job is the backstop. Every target remembers the
+batches it has applied, so a batch whose fold failed half-way is simply
+retried after ``XP_CLAIM_TIMEOUT_SECONDS`` without double counting.
+``recompute_xp`` rebuilds everything from the ledger after rule changes.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from database import db
+from gamification_utils import (
+    Upsert,
+    build_fold_updates,
+    build_recompute_buckets_pipeline,
+    build_recompute_users_pipeline,
+    fold_xp_events,
+)
+from leaderboard import leaderboard
+
+logger = logging.getLogger(__name__)
+
+XP_AGGREGATE_INTERVAL_SECONDS = float(os.getenv("XP_AGGREGATE_INTERVAL_SECONDS", "60"))
+XP_AGGREGATE_BATCH_SIZE = int(os.getenv("XP_AGGREGATE_BATCH_SIZE", "5000"))
+XP_FOLD_DELAY_SECONDS = float(os.getenv("XP_FOLD_DELAY_SECONDS", "1"))
+# A claimed batch not marked folded after this long is folded again.
+XP_CLAIM_TIMEOUT_SECONDS = float(os.getenv("XP_CLAIM_TIMEOUT_SECONDS", "300"))
+
+_aggregate_task: Optional["asyncio.Task[None]"] = None
+_fold_task: Optional["asyncio.Task[None]"] = None
+# Events waiting for the next insert, and the insert they wait for.
+_pending: Optional[List[Dict[str, Any]]] = None
+_pending_done: Optional["asyncio.Future[None]"] = None
+_inserting: Optional["asyncio.Future[None]"] = None
+
+
+async def _insert_event(event: Dict[str, Any]) -> None:
+    """Insert ``event``, sharing one ``insert_many`` with concurrent awards.
+
+    The first award of a batch waits for the insert in flight, then writes
+    every event queued meanwhile; the others wait for that write, so each
+    award still returns only once its event is stored.
+    """
+    global _pending, _pending_done, _inserting
+    if _pending is not None:
+        _pending.append(event)
+        await asyncio.shield(_pending_done)
+        return
+    batch = [event]
+    done = asyncio.get_running_loop().create_future()
+    _pending, _pending_done = batch, done
+    previous, _inserting = _inserting, done
+    try:
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+        _pending = None
+        await db.xp_events.insert_many(batch)
+    except BaseException as exc:
+        if _pending is batch:
+            _pending = None
+        if isinstance(exc, asyncio.CancelledError):
+            done.cancel()
+        else:
+            done.set_exception(exc)
+            done.exception()  # the waiters, if any, re-raise it
+        raise
+    else:
+        done.set_result(None)
+    finally:
+        if _inserting is done:
+            _inserting = None
+
+
+async def record_xp_event(
+    user_id: str, amount: int, source: str, student_level: Optional[str] = None
+) -> None:
+    await _insert_event(
+        {
+            "user_id": user_id,
+            "amount": amount,
+            "source": source,
+            "student_level": student_level,
+            "created_at": datetime.utcnow(),
+            "batch_id": None,
+            "claimed_at": None,
+            "folded_at": None,
+        }
+    )
+    _schedule_fold()
+
+
+async def _claim_batch(batch_size: int) -> Optional[str]:
+    """Reclaim a stale batch, or claim the oldest unclaimed events as a new one."""
+    now = datetime.utcnow()
+    stale = await db.xp_events.find_one_and_update(
+        {
+            "folded_at": None,
+            "claimed_at": {"$lt": now - timedelta(seconds=XP_CLAIM_TIMEOUT_SECONDS)},
+        },
+        {"$set": {"claimed_at": now}},
+        projection={"_id": 0, "batch_id": 1},
+    )
+    if stale:
+        # The retry keeps the batch id, which is what makes it idempotent.
+        await db.xp_events.update_many(
+            {"batch_id": stale["batch_id"], "folded_at": None}, {"$set": {"claimed_at": now}}
+        )
+        return stale["batch_id"]
+    ids = [
+        doc["_id"]
+        for doc in await db.xp_events.find({"batch_id": None}, {"_id": 1})
+        .sort("_id", 1)
+        .limit(batch_size)
+        .to_list(length=batch_size)
+    ]
+    if not ids:
+        return None
+    batch_id = str(uuid.uuid4())
+    await db.xp_events.update_many(
+        {"_id": {"$in": ids}, "batch_id": None},
+        {"$set": {"batch_id": batch_id, "claimed_at": now}},
+    )
+    return batch_id
+
+
+async def _apply_once(collection, updates: List[Upsert]) -> None:
+    """Upsert ``updates``; targets that already applied the batch are skipped.
+
+    Such a target no longer matches its filter, so its upsert collides with
+    the unique index. The same collision happens when a concurrent fold
+    created the target first, so colliding updates are retried without
+    upsert: that applies them if the batch is still missing, else nothing.
+    """
+    if not updates:
+        return
+    try:
+        await collection.bulk_write(
+            [UpdateOne(query, update, upsert=True) for query, update in updates],
+            ordered=False,
+        )
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        await collection.bulk_write(
+            [UpdateOne(*updates[err["index"]]) for err in errors], ordered=False
+        )
+
+
+async def aggregate_xp_events(batch_size: int = XP_AGGREGATE_BATCH_SIZE) -> int:
+    """Fold one batch of unfolded events into totals and period buckets.
+
+    Events are claimed with a unique ``batch_id`` first, so several service
+    processes can run the job concurrently without double counting.
+    """
+    batch_id = await _claim_batch(batch_size)
+    if batch_id is None:
+        return 0
+    events = await db.xp_events.find(
+        {"batch_id": batch_id},
+        {"_id": 0, "user_id": 1, "amount": 1, "created_at": 1, "student_level": 1},
+    ).to_list(length=None)
+    if not events:
+        return 0
+    totals, buckets = fold_xp_events(events)
+    total_updates, bucket_updates = build_fold_updates(
+        totals, buckets, batch_id, datetime.utcnow()
+    )
+    await _apply_once(db.xp_totals, total_updates)
+    await _apply_once(db.xp_buckets, bucket_updates)
+    await db.xp_events.update_many(
+        {"batch_id": batch_id}, {"$set": {"folded_at": datetime.utcnow()}}
+    )
+    return len(events)
+
+
+async def aggregate_all_xp_events() -> int:
+    folded = 0
+    while True:
+        count = await aggregate_xp_events()
+        if not count:
+            return folded
+        folded += count
+
+
+async def seed_opening_balances() -> None:
+    """Record existing ``users.xp`` as an event for users with no ledger yet."""
+    await db.users.aggregate(
+        [
+            {"$match": {"xp": {"$gt": 0}}},
+            {
+                "$lookup": {
+                    "from": "xp_events",
+                    "localField": "user_id",
+                    "foreignField": "user_id",
+                    "pipeline": [{"$limit": 1}, {"$project": {"_id": 1}}],
+                    "as": "events",
+                }
+            },
+            {"$match": {"events": {"$size": 0}}},
+            {
+                "$project": {
+                    "_id": 0,
+                    "user_id": 1,
+                    "amount": "$xp",
+                    "source": {"$literal": "opening_balance"},
+                    "created_at": "$$NOW",
+                    "batch_id": None,
+                }
+            },
+            {"$merge": {"into": "xp_events", "whenNotMatched": "insert"}},
+        ]
+    ).to_list(length=None)
+
+
+async def recompute_xp() -> Dict[str, int]:
+    """Rebuild user XP, totals and buckets from the full ledger.
+
+    Run it while the aggregator is idle.
+    """
+    now = datetime.utcnow()
+    await db.xp_events.update_many(
+        {"batch_id": None}, {"$set": {"batch_id": "recompute", "folded_at": now}}
+    )
+    await db.xp_events.update_many(
+        {"folded_at": None, "claimed_at": {"$ne": None}}, {"$set": {"folded_at": now}}
+    )
+    await db.xp_events.aggregate(build_recompute_users_pipeline()).to_list(length=None)
+    await db.xp_events.aggregate(
+        [
+            {"$group": {"_id": "$user_id", "xp": {"$sum": "$amount"}}},
+            {"$project": {"_id": 0, "user_id": "$_id", "xp": 1, "updated_at": "$$NOW"}},
+            {"$out": "xp_totals"},
+        ]
+    ).to_list(length=None)
+    await db.xp_events.aggregate(build_recompute_buckets_pipeline()).to_list(length=None)
+    # Recomputed totals may be lower than the ones the board holds.
+    await leaderboard.rebuild()
+    return {
+        "events": await db.xp_events.count_documents({}),
+        "users": await db.xp_totals.count_documents({}),
+        "buckets": await db.xp_buckets.count_documents({}),
+    }
+
+
+async def _fold_soon() -> None:
+    global _fold_task
+    await asyncio.sleep(XP_FOLD_DELAY_SECONDS)
+    # Awards from here on schedule the next fold rather than join this one.
+    _fold_task = None
+    try:
+        await aggregate_all_xp_events()
+    except Exception:
+        logger.exception("Folding XP events failed")
+
+
+def _schedule_fold() -> None:
+    global _fold_task
+    if XP_FOLD_DELAY_SECONDS > 0 and _fold_task is None:
+        _fold_task = asyncio.create_task(_fold_soon())
+
+
+async def _aggregate_loop() -> None:
+    while True:
+        await asyncio.sleep(XP_AGGREGATE_INTERVAL_SECONDS)
+        try:
+            await aggregate_all_xp_events()
+        except Exception:
+            logger.exception("Folding XP events failed")
+
+
+async def start_xp_ledger() -> None:
+    global _aggregate_task
+    if XP_AGGREGATE_INTERVAL_SECONDS > 0 and _aggregate_task is None:
+        _aggregate_task = asyncio.create_task(_aggregate_loop())
+
+
+async def stop_xp_ledger() -> None:
+    """Stop the folds; a batch they leave claimed is retried later."""
+    global _aggregate_task, _fold_task
+    for task in (_aggregate_task, _fold_task):
+        if task is not None:
+            task.cancel()
+    _aggregate_task = None
+    _fold_task = None
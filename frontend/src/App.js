@@ -5,6 +5,32 @@ import AuthForm from './components/AuthForm';
 import DASS21Test from './components/DASS21Test';
 import './App.css';
 
+// One refresh at a time: concurrent 401s and stream reconnects share it
+// instead of each rotating (and so invalidating) the same refresh token.
+let refreshInFlight = null;
+
+const refreshTokens = (backendUrl) => {
+  if (!refreshInFlight) {
+    refreshInFlight = axios
+      .post(`${backendUrl}/api/token/refresh`, {
+        refresh_token: localStorage.getItem('refreshToken')
+      })
+      .then(({ data }) => {
+        localStorage.setItem('token', data.access_token);
+        localStorage.setItem('refreshToken', data.refresh_token);
+        return data.access_token;
+      })
+      .finally(() => {
+        refreshInFlight = null;
+      });
+  }
+  return refreshInFlight;
+};
+
+const authHeaders = () => ({
+  headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
+});
+
 const App = () => {
   const [currentPage, setCurrentPage] = useState('landing');
   const [user, setUser] = useState(null);
@@ -62,6 +88,30 @@ const App = () => {
   const backendUrl =
     process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001';
 
+  useEffect(() => {
+    // Renew expired access tokens with the refresh token and retry once.
+    const interceptor = axios.interceptors.response.use(
+      (response) => response,
+      async (error) => {
+        const original = error.config;
+        const refreshToken = localStorage.getItem('refreshToken');
+        if (
+          error.response?.status !== 401 ||
+          !refreshToken ||
+          original._retried ||
+          original.url.endsWith('/api/token/refresh')
+        ) {
+          return Promise.reject(error);
+        }
+        original._retried = true;
+        const accessToken = await refreshTokens(backendUrl);
+        original.headers.Authorization = `Bearer ${accessToken}`;
+        return axios(original);
+      }
+    );
+    return () => axios.interceptors.response.eject(interceptor);
+  }, []);
+
   useEffect(() => {
     const token = localStorage.getItem('token');
     if (token) {
@@ -69,6 +119,51 @@ const App = () => {
     }
   }, []);
 
+  useEffect(() => {
+    // XP, level and badges are pushed by the server instead of refetched.
+    if (!user) return undefined;
+    let source;
+    let retryTimer;
+    let retryDelay = 1000;
+    let stopped = false;
+    const fetchGamification = async () => {
+      // Catch up on changes missed while the stream was down. A 401 here
+      // renews the access token through the shared refresh.
+      try {
+        const { data } = await axios.get(`${backendUrl}/api/gamification`, authHeaders());
+        if (!stopped) setGamification(data);
+      } catch (error) {
+        // The stream sends the current state first once it reconnects.
+      }
+    };
+    const connect = () => {
+      const token = localStorage.getItem('token');
+      source = new EventSource(
+        `${backendUrl}/api/gamification/stream?token=${encodeURIComponent(token)}`
+      );
+      source.onopen = () => {
+        retryDelay = 1000;
+      };
+      source.addEventListener('gamification', (event) => {
+        setGamification(JSON.parse(event.data));
+      });
+      source.onerror = async () => {
+        source.close();
+        if (stopped) return;
+        await fetchGamification();
+        if (stopped) return;
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 60000);
+      };
+    };
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [user]);
+
   const fetchUserProfile = async (token) => {
     try {
       const response = await axios.get(`${backendUrl}/api/profile`, {
@@ -80,16 +175,14 @@ const App = () => {
       fetchUserData();
     } catch (error) {
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
     }
   };
 
   const fetchUserData = async () => {
     try {
-      const token = localStorage.getItem('token');
       // Fetch mood data
-      const moodResponse = await axios.get(`${backendUrl}/api/mood-entries`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
+      const moodResponse = await axios.get(`${backendUrl}/api/mood-entries`, authHeaders());
       setMoodHistory(moodResponse.data);
 
       // Check today's mood
@@ -103,9 +196,7 @@ const App = () => {
     }
 
       // Fetch sleep data
-      const sleepRes = await axios.get(`${backendUrl}/api/sleep-entries`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
+      const sleepRes = await axios.get(`${backendUrl}/api/sleep-entries`, authHeaders());
       setSleepHistory(sleepRes.data);
       const todaySleep = sleepRes.data.find(e => e.date.split('T')[0] === today);
       if (todaySleep) {
@@ -115,9 +206,7 @@ const App = () => {
       }
 
       // Fetch reflections
-      const reflRes = await axios.get(`${backendUrl}/api/daily-reflections`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
+      const reflRes = await axios.get(`${backendUrl}/api/daily-reflections`, authHeaders());
       setReflectionHistory(reflRes.data);
       const todayRef = reflRes.data.find(e => e.date.split('T')[0] === today);
       if (todayRef) {
@@ -125,22 +214,12 @@ const App = () => {
       }
 
       // Fetch mental health plan
-      const planResponse = await axios.get(`${backendUrl}/api/mental-health-plan`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
+      const planResponse = await axios.get(`${backendUrl}/api/mental-health-plan`, authHeaders());
       setUserPlan(planResponse.data);
 
       // Fetch recent assessments
-      const assessResponse = await axios.get(`${backendUrl}/api/assessments`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setAssessmentHistory(assessResponse.data);
-
-      // Fetch gamification data
-      const gamResponse = await axios.get(`${backendUrl}/api/gamification`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setGamification(gamResponse.data);
+      const assessResponse = await axios.get(`${backendUrl}/api/assessments`, authHeaders());
+      setAssessmentHistory(assessResponse.data.items);
     } catch (error) {
       console.log('Error fetching user data:', error);
     }
@@ -169,6 +248,7 @@ const App = () => {
       const response = await axios.post(`${backendUrl}${endpoint}`, payload);
 
       localStorage.setItem('token', response.data.access_token);
+      localStorage.setItem('refreshToken', response.data.refresh_token);
       setUser(response.data.user);
 
       setCurrentPage('dashboard');
@@ -181,7 +261,12 @@ const App = () => {
   };
 
   const handleLogout = () => {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      axios.post(`${backendUrl}/api/logout`, { refresh_token: refreshToken }).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     setUser(null);
     setCurrentPage('landing');
     setAuthData({
@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+import os
+import sys
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from retention import archive_all, ensure_retention_indexes, rehydrate_user  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Archive or rehydrate cold data")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("archive", help="Move expired documents to the archive")
+    sub.add_parser("ensure-indexes", help="Create retention TTL indexes")
+    rehydrate = sub.add_parser("rehydrate", help="Restore a user's archive")
+    rehydrate.add_argument("user_id")
+    rehydrate.add_argument("--collection", action="append")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        print(await archive_all())
+    elif args.command == "ensure-indexes":
+        await ensure_retention_indexes()
+        print("Retention indexes ensured")
+    else:
+        print(await rehydrate_user(args.user_id, args.collection))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
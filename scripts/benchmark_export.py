@@ -0,0 +1,126 @@
+"""Compare the NDJSON research export with the Parquet export.
+
+Encodes N synthetic assessments both ways, then loads each into pandas,
+reporting wall time and bytes on disk for every step.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from bson import ObjectId
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from assessments_utils import instrument_registry, score_dass_batch, score_phq9_batch  # noqa: E402
+from export_utils import stream_export  # noqa: E402
+from parquet_utils import (  # noqa: E402
+    PartitionedWriter,
+    assessment_columns,
+    assessment_row,
+    build_schemas,
+)
+
+
+def synthetic_batches(total: int, batch_size: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for offset in range(0, total, batch_size):
+        docs = []
+        for i in range(offset, min(offset + batch_size, total)):
+            dass = i % 2 == 0
+            count = 21 if dass else 9
+            docs.append(
+                {
+                    "_id": ObjectId(),
+                    "user_id": f"user-{rng.randrange(total // 10 + 1)}",
+                    "assessment_type": "DASS-21" if dass else "PHQ-9",
+                    "responses": {str(q): rng.randint(0, 3) for q in range(1, count + 1)},
+                    "completed_at": start + timedelta(minutes=i),
+                }
+            )
+        for doc_type, scorer in (("DASS-21", score_dass_batch), ("PHQ-9", score_phq9_batch)):
+            subset = [d for d in docs if d["assessment_type"] == doc_type]
+            for doc, results in zip(subset, scorer([d["responses"] for d in subset])):
+                doc["results"] = results
+        yield docs
+
+
+def write_ndjson(path: str, total: int, compress: bool) -> None:
+    async def batches():
+        for docs in synthetic_batches(total, 1000, 1):
+            yield docs
+
+    async def run():
+        with open(path, "wb") as fh:
+            async for chunk in stream_export(batches(), "ndjson", compress):
+                fh.write(chunk)
+
+    asyncio.run(run())
+
+
+def write_parquet(root: str, total: int) -> None:
+    columns = assessment_columns(instrument_registry)
+    writer = PartitionedWriter(
+        root,
+        "assessments",
+        build_schemas(columns)["assessments"],
+        "assessment_type",
+        lambda row: row["assessment_type"],
+        chunk_size=50_000,
+    )
+    for docs in synthetic_batches(total, 1000, 1):
+        for doc in docs:
+            writer.write(assessment_row(doc, doc["user_id"], columns))
+    writer.close()
+
+
+def disk_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(base, name))
+        for base, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ndjson = os.path.join(tmp, "assessments.ndjson")
+        ndjson_gz = ndjson + ".gz"
+        parquet = os.path.join(tmp, "parquet")
+        results = [
+            ("ndjson", ndjson, timed(lambda: write_ndjson(ndjson, args.rows, False)),
+             timed(lambda: pd.read_json(ndjson, lines=True))),
+            ("ndjson.gz", ndjson_gz, timed(lambda: write_ndjson(ndjson_gz, args.rows, True)),
+             timed(lambda: pd.read_json(ndjson_gz, lines=True, compression="gzip"))),
+            ("parquet", parquet, timed(lambda: write_parquet(parquet, args.rows)),
+             timed(lambda: pd.read_parquet(os.path.join(parquet, "assessments")))),
+        ]
+        print(f"{args.rows} assessments")
+        print(f"{'format':<10} {'write s':>8} {'pandas load s':>14} {'MB':>8}")
+        for name, path, write_s, load_s in results:
+            print(f"{name:<10} {write_s:>8.2f} {load_s:>14.2f} {disk_size(path) / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measure IDP service cold-start time and /token throughput.
+
+Cold start is the wall time to import ``services.idp_service`` in a fresh
+interpreter. Throughput drives the ASGI app in-process against the MongoDB
+configured by ``MONGO_URL`` with a throwaway benchmark user.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.abspath(os.path.join(current_dir, "..", "backend"))
+sys.path.append(backend_path)
+
+
+def cold_start(runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", "import services.idp_service"],
+            cwd=backend_path,
+            check=True,
+        )
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def throughput(requests: int, concurrency: int) -> float:
+    import httpx
+
+    from database import db
+    from passwords import hash_password
+    from services.idp_service import app
+
+    email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+    await db.users.insert_one(
+        {"user_id": str(uuid.uuid4()), "email": email, "password": await hash_password("password")}
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://idp") as client:
+
+            async def one():
+                async with semaphore:
+                    response = await client.post("/token", data={"username": email, "password": "password"})
+                    response.raise_for_status()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(requests)))
+            return requests / (time.perf_counter() - start)
+    finally:
+        await db.users.delete_one({"email": email})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cold-start-runs", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--skip-throughput", action="store_true")
+    args = parser.parse_args()
+    print(f"cold start: {cold_start(args.cold_start_runs) * 1000:.0f} ms")
+    if not args.skip_throughput:
+        rate = asyncio.run(throughput(args.requests, args.concurrency))
+        print(f"/token throughput: {rate:.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark the in-process leaderboard against sorting on every request.
+
+Builds a ``SortedLeaderboard`` over N synthetic users, then times rank
+lookups, paginated reads, neighbor queries and XP updates. The baseline
+re-sorts all scores per request, which is what ``find().sort("xp")`` did
+server-side, and is the only way it could answer "my rank".
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from leaderboard_utils import SortedLeaderboard  # noqa: E402
+
+
+def timed(func, repeat: int) -> float:
+    """Median wall time of ``func`` in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scores = {f"user-{i:07d}": int(rng.paretovariate(1.5) * 20) for i in range(args.users)}
+    user_ids = list(scores)
+
+    start = time.perf_counter()
+    board = SortedLeaderboard(scores.items())
+    print(f"build {args.users:,} users: {time.perf_counter() - start:.2f} s")
+
+    sample = lambda: rng.choice(user_ids)  # noqa: E731
+    results = {
+        "rank": timed(lambda: board.rank(sample()), args.ops),
+        "top page (50)": timed(lambda: board.page(rng.randrange(0, 1000) * 50, 50), args.ops),
+        "neighbors (+-5)": timed(lambda: board.around(sample(), 5), args.ops),
+    }
+
+    def award():
+        user_id = sample()
+        board.update(user_id, board.scores[user_id] + rng.choice([5, 10]))
+
+    results["update"] = timed(award, args.ops)
+    results["baseline rank (full sort)"] = timed(
+        lambda: sorted(scores.items(), key=lambda item: -item[1]), 3
+    )
+    for name, micros in results.items():
+        print(f"{name:>28}: {micros:12.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare inline bcrypt against the pooled hasher under a login burst.
+
+Runs N concurrent password verifications while a probe coroutine measures
+how late the event loop wakes it up, standing in for non-auth requests
+served by the same worker.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+import passwords  # noqa: E402
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def run(mode: str, logins: int, hashed: str) -> None:
+    async def inline_login():
+        passwords.verify_password_sync("password", hashed)
+
+    async def pooled_login():
+        await passwords.verify_password("password", hashed)
+
+    login = inline_login if mode == "inline" else pooled_login
+    lags: list = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, lags))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    rejected = sum(isinstance(r, passwords.PasswordHasherBusy) for r in results)
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{mode:>7}: {(logins - rejected) / elapsed:7.1f} logins/s, {rejected} rejected | "
+        f"probe lag p50 {statistics.median(lags_ms):7.1f} ms, "
+        f"p99 {p99:7.1f} ms, max {lags_ms[-1]:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=passwords.BCRYPT_ROUNDS)
+    args = parser.parse_args()
+    hashed = passwords.hash_password_sync("password", args.rounds)
+    print(f"bcrypt cost {args.rounds}, {passwords.PASSWORD_HASH_WORKERS} workers")
+    for mode in ("inline", "pooled"):
+        asyncio.run(run(mode, args.logins, hashed))
+
+
+if __name__ == "__main__":
+    main()
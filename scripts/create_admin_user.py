@@ -9,7 +9,8 @@ backend_path = os.path.join(current_dir, "..", "backend")
 sys.path.append(os.path.abspath(backend_path))
 
 from database import db  # noqa: E402
-from auth import hash_password  # noqa: E402
+from passwords import hash_password  # noqa: E402
+from user_memory import create_user_memory  # noqa: E402
 
 
 DEFAULT_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
@@ -25,7 +26,7 @@ async def main():
     user_doc = {
         "user_id": str(uuid.uuid4()),
         "email": DEFAULT_EMAIL,
-        "password": hash_password(DEFAULT_PASSWORD),
+        "password": await hash_password(DEFAULT_PASSWORD),
         "full_name": "Admin User",
         "age": 30,
         "student_level": "admin",
@@ -34,11 +35,11 @@ async def main():
         "last_login": datetime.utcnow(),
         "xp": 0,
         "level": 1,
-        "memory": {},
         "badges": [],
         "is_admin": True,
     }
     await db.users.insert_one(user_doc)
+    await create_user_memory(user_doc["user_id"])
     print(f"Admin user created: {DEFAULT_EMAIL}")
 
 
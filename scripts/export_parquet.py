@@ -0,0 +1,31 @@
+import argparse
+import asyncio
+import os
+import sys
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from parquet_export import PARQUET_CHUNK_ROWS, export_parquet  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Export assessments, mood, sleep and anonymized users to Parquet"
+    )
+    parser.add_argument("output", help="Directory to create; must be empty if it exists")
+    parser.add_argument("--chunk-rows", type=int, default=PARQUET_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if os.path.isdir(args.output) and os.listdir(args.output):
+        parser.error(f"{args.output} is not empty")
+    os.makedirs(args.output, exist_ok=True)
+    manifest = await export_parquet(args.output, args.chunk_rows)
+    for table, entry in manifest["tables"].items():
+        size = sum(f["bytes"] for f in entry["files"])
+        print(f"{table}: {entry['rows']} rows in {len(entry['files'])} files, {size} bytes")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+import argparse
+import asyncio
+import os
+import sys
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from database import db  # noqa: E402
+from indexes import check_query_plans, ensure_indexes  # noqa: E402
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Create or verify MongoDB indexes")
+    parser.add_argument("command", choices=["ensure", "check"])
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        for collection, names in (await ensure_indexes(db)).items():
+            print(f"{collection}: {', '.join(names)}")
+        return 0
+
+    failures = 0
+    for entry in await check_query_plans(db):
+        status = "COLLSCAN" if entry["collection_scan"] else "ok"
+        print(f"[{status:>8}] {entry['collection']}: {entry['name']} -> {' > '.join(entry['stages'])}")
+        failures += entry["collection_scan"]
+    if failures:
+        print(f"{failures} query shape(s) use a collection scan")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import os
+import sys
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from xp_ledger import (  # noqa: E402
+    aggregate_all_xp_events,
+    recompute_xp,
+    seed_opening_balances,
+)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fold or rebuild XP from the event ledger")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("aggregate", help="Fold pending events into totals and buckets")
+    sub.add_parser("seed", help="Record current users.xp for users without events")
+    recompute = sub.add_parser("recompute", help="Rebuild all XP from the ledger")
+    recompute.add_argument(
+        "--seed", action="store_true", help="Seed opening balances before rebuilding"
+    )
+    args = parser.parse_args()
+
+    if args.command == "aggregate":
+        print(f"Folded {await aggregate_all_xp_events()} events")
+    elif args.command == "seed":
+        await seed_opening_balances()
+        print("Opening balances recorded")
+    else:
+        if args.seed:
+            await seed_opening_balances()
+        print(await recompute_xp())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,32 @@
+import asyncio
+import os
+import sys
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from database import db  # noqa: E402
+
+
+async def main():
+    """Move ``memory`` from user documents into the ``user_memory`` collection."""
+    moved = 0
+    cursor = db.users.find(
+        {"memory": {"$exists": True}}, {"_id": 0, "user_id": 1, "memory": 1}
+    )
+    async for user in cursor:
+        await db.user_memory.update_one(
+            {"user_id": user["user_id"]},
+            {"$setOnInsert": {"user_id": user["user_id"], "memory": user["memory"] or {}}},
+            upsert=True,
+        )
+        await db.users.update_one(
+            {"user_id": user["user_id"]}, {"$unset": {"memory": ""}}
+        )
+        moved += 1
+    print(f"Migrated memory for {moved} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
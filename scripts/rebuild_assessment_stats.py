@@ -0,0 +1,19 @@
+import asyncio
+import os
+import sys
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from assessment_stats import rebuild_assessment_stats  # noqa: E402
+
+
+async def main():
+    """Recompute the assessment score histograms from stored assessments."""
+    cells = await rebuild_assessment_stats()
+    print(f"Rebuilt {cells} statistics cells")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,30 @@
+import asyncio
+import os
+import sys
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from database import db  # noqa: E402
+from search import index_entry  # noqa: E402
+
+
+async def main():
+    """Index all stored reflections and mood notes for search."""
+    indexed = 0
+    sources = (("reflection", db.reflections, "text"), ("mood", db.mood_entries, "note"))
+    for source, collection, field in sources:
+        cursor = collection.find(
+            {field: {"$nin": [None, ""]}},
+            {"_id": 1, "user_id": 1, "entry_id": 1, "date": 1, field: 1},
+        )
+        async for doc in cursor:
+            entry_id = doc.get("entry_id", str(doc["_id"]))
+            await index_entry(doc["user_id"], source, entry_id, doc[field], doc["date"])
+            indexed += 1
+    print(f"Indexed {indexed} entries")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
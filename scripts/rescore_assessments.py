@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+import os
+import sys
+
+current_dir = os.path.dirname(__file__)
+backend_path = os.path.join(current_dir, "..", "backend")
+sys.path.append(os.path.abspath(backend_path))
+
+from assessments import RESCORE_CHUNK_SIZE, rescore_assessments  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Re-score stored DASS-21 and PHQ-9 assessments with the current cut-offs"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=RESCORE_CHUNK_SIZE, help="Assessments per bulk write"
+    )
+    args = parser.parse_args()
+    counts = await rescore_assessments(args.chunk_size)
+    print(f"Scanned {counts['scanned']} assessments, updated {counts['updated']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
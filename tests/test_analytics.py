@@ -0,0 +1,55 @@
+import datetime
+
+import numpy as np
+
+from backend.analytics_utils import (
+    compute_trends,
+    rolling_mean,
+    signed_sentiment,
+    slope,
+    volatility,
+)
+
+
+def test_rolling_mean_matches_naive_with_gaps():
+    values = np.array([1.0, np.nan, 3.0, 4.0, np.nan, 6.0, 2.0])
+    expected = []
+    for i in range(len(values)):
+        window = values[max(0, i - 2) : i + 1]
+        window = window[~np.isnan(window)]
+        expected.append(window.mean() if len(window) else np.nan)
+    np.testing.assert_allclose(rolling_mean(values, 3), expected)
+
+
+def test_slope_of_linear_series():
+    values = np.array([1.0, 1.5, np.nan, 2.5, 3.0])
+    assert abs(slope(values) - 0.5) < 1e-9
+
+
+def test_slope_and_volatility_need_enough_points():
+    assert slope(np.array([np.nan, 2.0])) is None
+    assert volatility(np.array([1.0, 2.0])) is None
+
+
+def test_signed_sentiment():
+    result = signed_sentiment(["positive", "negative", "neutral"], [0.9, 0.8, 0.5])
+    np.testing.assert_allclose(result, [0.9, -0.8, 0.0])
+
+
+def test_compute_trends_daily_axis():
+    start = datetime.datetime(2024, 1, 1, 9)
+    mood_dates = [start, start + datetime.timedelta(days=2)]
+    sleep_dates = [start + datetime.timedelta(days=1)]
+    trends = compute_trends(
+        mood_dates, [2, 4], ["negative", "positive"], [0.5, 0.5],
+        sleep_dates, [7.5], [4],
+    )
+    assert trends["days"] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert trends["mood"]["values"] == [2.0, None, 4.0]
+    assert trends["sleep"]["hours"]["values"] == [None, 7.5, None]
+    assert trends["mood"]["slope"] == 1.0
+    assert trends["divergence"]["mean_abs"] == 0.0
+
+
+def test_compute_trends_empty():
+    assert compute_trends([], [], [], [], [], [], [])["days"] == []
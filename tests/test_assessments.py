@@ -0,0 +1,130 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from backend.assessments_utils import (
+    DASS_QUESTION_COUNT,
+    HISTORY_COMPACT_PROJECTION,
+    PHQ9_QUESTION_COUNT,
+    HISTORY_SORT,
+    attach_deltas,
+    calculate_dass_scores,
+    calculate_phq9_score,
+    history_cursor,
+    history_cursor_filter,
+    response_matrix,
+    score_dass_batch,
+    score_phq9_batch,
+)
+
+
+def _random_responses(rng, count):
+    return {q: rng.randint(0, 3) for q in range(1, count + 1)}
+
+
+def test_dass_cutoffs():
+    def levels(dep, anx, stress):
+        # Each subscale doubles the sum of its seven answers.
+        responses = {}
+        for questions, half in (
+            ((3, 5, 10, 13, 16, 17, 21), dep // 2),
+            ((2, 4, 7, 9, 15, 19, 20), anx // 2),
+            ((1, 6, 8, 11, 12, 14, 18), stress // 2),
+        ):
+            for q in questions:
+                answer = min(3, half)
+                responses[q] = answer
+                half -= answer
+        result = calculate_dass_scores(responses)
+        assert (result["depression_score"], result["anxiety_score"], result["stress_score"]) == (dep, anx, stress)
+        return result["depression_level"], result["anxiety_level"], result["stress_level"]
+
+    assert levels(8, 6, 14) == ("عادی", "عادی", "عادی")
+    assert levels(10, 8, 16) == ("خفیف", "خفیف", "خفیف")
+    assert levels(20, 14, 24) == ("متوسط", "متوسط", "متوسط")
+    assert levels(22, 16, 26) == ("شدید", "شدید", "شدید")
+    assert levels(28, 20, 34) == ("بسیار شدید", "بسیار شدید", "بسیار شدید")
+
+
+def test_phq9_cutoffs():
+    expected = ["حداقل"] * 5 + ["خفیف"] * 5 + ["متوسط"] * 5 + ["نسبتاً شدید"] * 5 + ["شدید"] * 8
+    for total, level in enumerate(expected):
+        responses = {q: 0 for q in range(1, 10)}
+        for q in range(1, 10):
+            responses[q] = min(3, total - sum(responses.values()))
+        assert calculate_phq9_score(responses)["severity_level"] == level
+
+
+def test_dass_batch_matches_scalar():
+    rng = random.Random(21)
+    batch = [_random_responses(rng, DASS_QUESTION_COUNT) for _ in range(2000)]
+    # Stored documents use string keys and may be incomplete.
+    stored = [{str(q): v for q, v in r.items() if rng.random() > 0.05} for r in batch]
+    expected = [calculate_dass_scores({int(q): v for q, v in r.items()}) for r in stored]
+    assert score_dass_batch(stored) == expected
+    assert score_dass_batch(batch) == [calculate_dass_scores(r) for r in batch]
+
+
+def test_phq9_batch_matches_scalar():
+    rng = random.Random(9)
+    batch = [_random_responses(rng, PHQ9_QUESTION_COUNT) for _ in range(2000)]
+    batch.append({"1": 3, "2": 3, "extra": 3, "12": 2})
+    assert score_phq9_batch(batch) == [calculate_phq9_score(r) for r in batch]
+
+
+def test_batch_results_are_independent():
+    results = score_dass_batch([{}, {}])
+    results[0]["recommendations"].append("x")
+    assert "x" not in results[1]["recommendations"]
+    assert score_phq9_batch([]) == []
+
+
+def test_response_matrix_columns():
+    matrix = response_matrix([{"1": 2, 3: 1, "x": 4, "10": 1}], 9)
+    assert matrix.tolist() == [[5, 2, 0, 1, 0, 0, 0, 0, 0, 0]]
+
+
+def test_attach_deltas_per_type():
+    def item(kind, **scores):
+        return {"assessment_type": kind, "results": scores}
+
+    page = [
+        item("PHQ-9", total_score=8),
+        item("DASS-21", depression_score=10, anxiety_score=4, stress_score=12),
+        item("PHQ-9", total_score=11),
+        item("DASS-21", depression_score=6, anxiety_score=4, stress_score=20),
+    ]
+    older = {"PHQ-9": item("PHQ-9", total_score=15), "DASS-21": None}
+    attach_deltas(page, older)
+    assert page[0]["delta"] == {"total_score": -3}
+    assert page[1]["delta"] == {"depression_score": 4, "anxiety_score": 0, "stress_score": -8}
+    assert page[2]["delta"] == {"total_score": -4}
+    assert page[3]["delta"] is None
+
+
+def test_compact_projection_keeps_scores():
+    assert HISTORY_COMPACT_PROJECTION["responses"] == 0
+    assert not any(key.endswith("_score") for key in HISTORY_COMPACT_PROJECTION)
+    assert HISTORY_COMPACT_PROJECTION["results.ai_analysis"] == 0
+    assert HISTORY_COMPACT_PROJECTION["results.analysis"] == 0
+
+
+def test_history_cursor_pages_through_equal_timestamps():
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.assessments
+    same = datetime(2024, 5, 1, 12)
+    collection.insert_many(
+        [{"completed_at": same, "assessment_id": f"a{i}"} for i in range(5)]
+        + [{"completed_at": datetime(2024, 4, 1), "assessment_id": "b0"}]
+    )
+    seen, query = [], {}
+    while True:
+        page = list(collection.find(query, {"_id": 0}).sort(HISTORY_SORT).limit(2))
+        if not page:
+            break
+        seen += [doc["assessment_id"] for doc in page]
+        query = history_cursor_filter(history_cursor(page[-1]))
+    assert seen == ["a4", "a3", "a2", "a1", "a0", "b0"]
+    with pytest.raises(ValueError):
+        history_cursor_filter("yesterday")
@@ -0,0 +1,38 @@
+from backend import cache_utils
+from backend.cache_utils import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_utils.time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=10, ttl=30)
+    cache.set("u1", {"xp": 5})
+    now[0] += 29
+    assert cache.get("u1") == {"xp": 5}
+    now[0] += 2
+    assert cache.get("u1") is None
+    assert len(cache) == 0
+
+
+def test_lru_stats_and_pop():
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    cache.pop("a")
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert abs(stats["hit_ratio"] - 1 / 3) < 1e-9
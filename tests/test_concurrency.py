@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.concurrency_utils import run_concurrently
+
+STEP = 0.05
+
+
+async def _step(value, delay=STEP, log=None):
+    await asyncio.sleep(delay)
+    if log is not None:
+        log.append(value)
+    return value
+
+
+def _elapsed(coro):
+    started = time.perf_counter()
+    result = asyncio.run(coro)
+    return result, time.perf_counter() - started
+
+
+def test_results_keep_argument_order():
+    async def run():
+        return await run_concurrently(_step("a", 0.03), _step("b", 0.01), _step("c", 0.02))
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+
+
+def test_latency_is_the_slowest_step_not_the_sum():
+    async def sequential():
+        return [await _step(i) for i in range(4)]
+
+    async def concurrent():
+        return await run_concurrently(*(_step(i) for i in range(4)))
+
+    serial, serial_time = _elapsed(sequential())
+    together, together_time = _elapsed(concurrent())
+    assert serial == together == [0, 1, 2, 3]
+    assert serial_time >= 4 * STEP
+    assert together_time < 2 * STEP
+
+
+def test_blocking_work_in_a_thread_overlaps_io():
+    """A handler-shaped flow: a lookup alongside CPU work, then independent writes."""
+
+    def analyze(text):
+        time.sleep(STEP)
+        return {"label": "neutral", "text": text}
+
+    async def handler():
+        existing, analysis = await run_concurrently(
+            _step(None), asyncio.to_thread(analyze, "note")
+        )
+        await run_concurrently(_step("insert"), _step("index"), _step("badges"))
+        return existing, analysis
+
+    (existing, analysis), elapsed = _elapsed(handler())
+    assert existing is None and analysis["text"] == "note"
+    # Five steps of STEP each, in two concurrent phases.
+    assert elapsed < 4 * STEP
+
+
+def test_first_error_is_raised_unwrapped_and_siblings_cancelled():
+    class NotFound(Exception):
+        pass
+
+    finished = []
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise NotFound("missing")
+
+    async def run():
+        await run_concurrently(_step("slow", 1, finished), fail())
+
+    started = time.perf_counter()
+    with pytest.raises(NotFound) as info:
+        asyncio.run(run())
+    assert time.perf_counter() - started < 0.5
+    assert finished == []
+    assert isinstance(info.value.__cause__, BaseExceptionGroup)
+
+
+def test_outer_cancellation_cancels_every_step():
+    cancelled = []
+
+    async def step(name):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+
+    async def run():
+        task = asyncio.create_task(run_concurrently(step("a"), step("b")))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert sorted(cancelled) == ["a", "b"]
+
+
+def test_accepts_futures_as_well_as_coroutines():
+    async def run():
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(3)
+        return await run_concurrently(future, _step(4, 0))
+
+    assert asyncio.run(run()) == [3, 4]
+
+
+def test_side_effects_finish_before_an_error_is_raised():
+    finished = []
+
+    async def fail():
+        raise ValueError("stats write failed")
+
+    async def run():
+        await run_concurrently(
+            fail(), _step("xp", log=finished), _step("badges", log=finished), cancel_on_error=False
+        )
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+    assert sorted(finished) == ["badges", "xp"]
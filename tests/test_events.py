@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+from backend.pubsub_utils import Subscriptions, format_sse
+
+
+def test_fanout_reaches_only_that_users_subscribers():
+    async def run():
+        subs = Subscriptions()
+        first, second = subs.subscribe("u1"), subs.subscribe("u1")
+        other = subs.subscribe("u2")
+        assert subs.fanout("u1", {"xp": 5}) == 2
+        assert first.get_nowait() == second.get_nowait() == {"xp": 5}
+        assert other.empty()
+        assert subs.fanout("nobody", {"xp": 1}) == 0
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_keeps_latest_events():
+    async def run():
+        subs = Subscriptions(queue_size=2)
+        queue = subs.subscribe("u1")
+        for xp in range(5):
+            subs.fanout("u1", {"xp": xp})
+        assert [queue.get_nowait()["xp"] for _ in range(queue.qsize())] == [3, 4]
+
+    asyncio.run(run())
+
+
+def test_unsubscribe_drops_empty_users():
+    async def run():
+        subs = Subscriptions()
+        queue = subs.subscribe("u1")
+        assert len(subs) == 1
+        subs.unsubscribe("u1", queue)
+        subs.unsubscribe("u1", queue)
+        assert len(subs) == 0
+        assert "u1" not in subs.queues
+
+    asyncio.run(run())
+
+
+def test_format_sse():
+    message = format_sse("gamification", {"xp": 10, "badges": ["Novice"]})
+    lines = message.split("\n")
+    assert lines[0] == "event: gamification"
+    assert json.loads(lines[1][len("data: "):]) == {"xp": 10, "badges": ["Novice"]}
+    assert message.endswith("\n\n")
@@ -0,0 +1,136 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import tracemalloc
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from backend.assessments_utils import InstrumentRegistry, instrument_registry
+from backend.export_utils import build_export_query, csv_columns, stream_export
+
+BASE = datetime(2024, 1, 1)
+CSV_COLUMNS = csv_columns(instrument_registry)
+GAD7 = {
+    "id": "GAD-7",
+    "item_count": 7,
+    "response_range": [0, 3],
+    "subscales": [
+        {
+            "name": "anxiety",
+            "items": "all",
+            "score_field": "gad_score",
+            "level_field": "gad_level",
+            "bands": [{"max": 9, "label": "mild"}, {"label": "severe"}],
+        }
+    ],
+    "analysis": {"field": "gad_analysis", "rules": [{"text": "monitor"}]},
+    "recommendations": {"rules": []},
+}
+
+
+def _doc(i):
+    return {
+        "_id": ObjectId.from_datetime(BASE + timedelta(seconds=i)),
+        "assessment_type": "PHQ-9",
+        "responses": {str(q): (i + q) % 4 for q in range(1, 10)},
+        "results": {"total_score": i % 28, "severity_level": "خفیف", "recommendations": ["a", "b"]},
+        "completed_at": BASE + timedelta(minutes=i),
+    }
+
+
+async def _batches(total, size):
+    for start in range(0, total, size):
+        yield [_doc(i) for i in range(start, min(start + size, total))]
+
+
+def _collect(total, fmt, compress, size=100):
+    async def run():
+        return [
+            chunk
+            async for chunk in stream_export(_batches(total, size), fmt, compress, CSV_COLUMNS)
+        ]
+
+    return b"".join(asyncio.run(run()))
+
+
+def test_ndjson_rows_and_cursor():
+    lines = _collect(250, "ndjson", False).decode("utf-8").splitlines()
+    assert len(lines) == 250
+    first = json.loads(lines[0])
+    assert first["cursor"] == str(_doc(0)["_id"])
+    assert first["completed_at"] == BASE.isoformat()
+    assert "user_id" not in first
+
+
+def test_csv_gzip_round_trip():
+    data = gzip.decompress(_collect(120, "csv", True))
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+    assert tuple(rows[0]) == CSV_COLUMNS
+    assert len(rows) == 121
+    row = dict(zip(CSV_COLUMNS, rows[2]))
+    assert row["total_score"] == "1"
+    assert json.loads(row["responses"])["1"] == 2
+
+
+def test_csv_columns_follow_the_registry():
+    assert CSV_COLUMNS == (
+        "cursor",
+        "assessment_type",
+        "completed_at",
+        "depression_score",
+        "anxiety_score",
+        "stress_score",
+        "depression_level",
+        "anxiety_level",
+        "stress_level",
+        "total_score",
+        "severity_level",
+        "responses",
+    )
+    columns = csv_columns(InstrumentRegistry([GAD7]))
+    assert columns[3:-1] == ("gad_score", "gad_level")
+
+
+def test_export_query():
+    cursor = str(_doc(5)["_id"])
+    query = build_export_query("DASS-21", BASE, None, cursor)
+    assert query == {
+        "assessment_type": "DASS-21",
+        "completed_at": {"$gte": BASE},
+        "_id": {"$gt": ObjectId(cursor)},
+    }
+    assert build_export_query() == {}
+    with pytest.raises(ValueError):
+        build_export_query(after="not-a-cursor")
+
+
+def _export_peak(total):
+    decompressor = zlib.decompressobj(31)
+    rows = 0
+
+    async def run():
+        nonlocal rows
+        async for chunk in stream_export(_batches(total, 1000), "ndjson", True):
+            rows += decompressor.decompress(chunk).count(b"\n")
+
+    tracemalloc.start()
+    try:
+        asyncio.run(run())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert rows == total
+    return peak
+
+
+def test_large_export_memory_is_flat():
+    small = _export_peak(3_000)
+    # Roughly 8 MB of NDJSON; only one batch is ever held at a time.
+    large = _export_peak(30_000)
+    assert large < 4 * 1024 * 1024
+    assert large < small + 512 * 1024
@@ -1,5 +1,24 @@
+import asyncio
 import datetime
-from backend.gamification_utils import calculate_level_and_badges, calculate_streak
+import os
+import uuid
+
+import pytest
+from pymongo import ReturnDocument
+
+from backend.gamification_utils import (
+    BUCKET_RETENTION_DAYS,
+    BadgeCatalog,
+    badge_catalog,
+    build_award_pipeline,
+    build_fold_updates,
+    build_recompute_users_pipeline,
+    calculate_level_and_badges,
+    calculate_streak,
+    fold_xp_events,
+    period_buckets,
+    period_end,
+)
 
 
 def test_level_and_badges_basic():
@@ -37,3 +56,189 @@ def test_streak_consecutive_day():
 def test_streak_reset():
     old_day = datetime.datetime.utcnow() - datetime.timedelta(days=5)
     assert calculate_streak(old_day, 10) == 1
+
+
+def _award(users, user_id, amount):
+    return users.find_one_and_update(
+        {"user_id": user_id},
+        build_award_pipeline(amount),
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+@pytest.mark.parametrize("start_xp,amount", [(0, 5), (95, 10), (490, 20), (None, 150)])
+def test_award_pipeline_matches_python(start_xp, amount):
+    mongomock = pytest.importorskip("mongomock")
+    users = mongomock.MongoClient().db.users
+    doc = {"user_id": "u1"}
+    if start_xp is not None:
+        doc["xp"] = start_xp
+    users.insert_one(doc)
+    user = _award(users, "u1", amount)
+    xp = (start_xp or 0) + amount
+    assert user["xp"] == xp
+    assert user["level"] == calculate_level_and_badges(xp)[0]
+    assert "badges" not in user
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_MONGO_URL"), reason="needs a MongoDB server (TEST_MONGO_URL)"
+)
+def test_award_pipeline_concurrent_awards_are_exact():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def run():
+        client = AsyncIOMotorClient(os.environ["TEST_MONGO_URL"])
+        users = client.test_gamification.users
+        user_id = str(uuid.uuid4())
+        await users.insert_one({"user_id": user_id, "xp": 0, "level": 1, "badges": []})
+        amounts = [5, 10] * 250
+        try:
+            await asyncio.gather(
+                *(
+                    users.find_one_and_update(
+                        {"user_id": user_id}, build_award_pipeline(amount)
+                    )
+                    for amount in amounts
+                )
+            )
+            return await users.find_one({"user_id": user_id}), sum(amounts)
+        finally:
+            await users.delete_one({"user_id": user_id})
+            client.close()
+
+    user, total = asyncio.run(run())
+    assert user["xp"] == total
+    assert user["level"] == calculate_level_and_badges(total)[0]
+
+
+def test_award_pipeline_missing_user():
+    mongomock = pytest.importorskip("mongomock")
+    users = mongomock.MongoClient().db.users
+    assert _award(users, "ghost", 10) is None
+
+
+def test_period_buckets_use_iso_weeks():
+    # 2027-01-01 falls in ISO week 53 of 2026.
+    assert period_buckets(datetime.datetime(2027, 1, 1)) == {
+        "week": "2026-W53",
+        "month": "2027-01",
+    }
+
+
+def _ledger():
+    start = datetime.datetime(2026, 3, 2, 9)
+    return [
+        {
+            "user_id": "a",
+            "amount": 10,
+            "created_at": start + datetime.timedelta(days=7),
+            "student_level": "master",
+        },
+        {"user_id": "a", "amount": 5, "created_at": start, "student_level": "bachelor"},
+        {"user_id": "b", "amount": 120, "created_at": start},
+    ]
+
+
+def test_fold_xp_events_totals_and_buckets():
+    totals, buckets = fold_xp_events(_ledger())
+    assert totals == {"a": 15, "b": 120}
+    assert buckets[("a", "week", "2026-W10")]["xp"] == 5
+    assert buckets[("a", "week", "2026-W11")]["xp"] == 10
+    assert buckets[("a", "month", "2026-03")]["xp"] == 15
+    assert buckets[("b", "month", "2026-03")]["xp"] == 120
+    # The latest event decides the cohort.
+    assert buckets[("a", "month", "2026-03")]["student_level"] == "master"
+    assert buckets[("b", "week", "2026-W10")]["student_level"] is None
+
+
+def test_fold_updates_apply_each_batch_once():
+    mongomock = pytest.importorskip("mongomock")
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+
+    totals_coll = mongomock.MongoClient().db.xp_totals
+    totals_coll.create_index("user_id", unique=True)
+    now = datetime.datetime(2026, 3, 20)
+
+    def apply(batch_id, events):
+        updates, _ = build_fold_updates(*fold_xp_events(events), batch_id, now)
+        try:
+            totals_coll.bulk_write(
+                [UpdateOne(q, u, upsert=True) for q, u in updates], ordered=False
+            )
+        except BulkWriteError as exc:
+            # Already-applied targets collide on the unique index instead.
+            assert {err["code"] for err in exc.details["writeErrors"]} == {11000}
+
+    apply("b1", _ledger())
+    apply("b1", _ledger())  # retried after a failure
+    apply("b2", _ledger()[:1])
+    xp = {doc["user_id"]: doc["xp"] for doc in totals_coll.find()}
+    assert xp == {"a": 25, "b": 120}
+    assert totals_coll.find_one({"user_id": "a"})["folded_batches"] == ["b1", "b2"]
+
+
+def test_bucket_expiry_follows_period_end():
+    monday = datetime.datetime(2026, 3, 2)
+    next_monday = monday + datetime.timedelta(days=7)
+    assert period_end(datetime.datetime(2026, 3, 8, 23, 59), "week") == next_monday
+    assert period_end(monday, "week") == next_monday
+    assert period_end(datetime.datetime(2026, 12, 31, 12), "month") == datetime.datetime(2027, 1, 1)
+    _, buckets = fold_xp_events(_ledger())
+    expected = datetime.datetime(2026, 4, 1) + datetime.timedelta(days=BUCKET_RETENTION_DAYS["month"])
+    assert buckets[("b", "month", "2026-03")]["expires_at"] == expected
+
+
+def test_recompute_users_pipeline_matches_fold():
+    mongomock = pytest.importorskip("mongomock")
+    events = mongomock.MongoClient().db.xp_events
+    events.insert_many(_ledger())
+    pipeline = build_recompute_users_pipeline()
+    assert pipeline[-1]["$merge"]["on"] == "user_id"
+    rebuilt = {doc["user_id"]: doc for doc in events.aggregate(pipeline[:-1])}
+    totals, _ = fold_xp_events(_ledger())
+    for user_id, xp in totals.items():
+        assert rebuilt[user_id]["xp"] == xp
+        level, badges = calculate_level_and_badges(xp)
+        assert (rebuilt[user_id]["level"], rebuilt[user_id]["badges"]) == (level, badges)
+
+
+def test_catalog_covers_every_trigger():
+    for trigger in ("xp", "streak", "assessment", "journey_completed"):
+        assert badge_catalog.names[trigger]
+        assert badge_catalog.thresholds[trigger] == sorted(badge_catalog.thresholds[trigger])
+
+
+def test_catalog_earned_uses_thresholds_per_trigger():
+    catalog = BadgeCatalog(
+        [
+            {"id": "b", "trigger": "streak", "threshold": 7},
+            {"id": "a", "trigger": "streak", "threshold": 3},
+            {"id": "x", "trigger": "xp", "threshold": 3},
+        ]
+    )
+    assert catalog.earned("streak", 2) == []
+    assert catalog.earned("streak", 3) == ["a"]
+    assert catalog.earned("streak", 100) == ["a", "b"]
+    assert catalog.new_badges("streak", 8, ["a", "x"]) == ["b"]
+    assert catalog.earned("assessment", 100) == []
+
+
+@pytest.mark.parametrize(
+    "rules",
+    [
+        [{"id": "a", "trigger": "unknown", "threshold": 1}],
+        [{"id": "a", "trigger": "xp", "threshold": 0}],
+        [{"id": "a", "trigger": "xp", "threshold": 1}, {"id": "a", "trigger": "streak", "threshold": 2}],
+    ],
+)
+def test_catalog_rejects_invalid_rules(rules):
+    with pytest.raises(ValueError):
+        BadgeCatalog(rules)
+
+
+def test_recompute_keeps_non_xp_badges():
+    merge = build_recompute_users_pipeline()[-1]["$merge"]
+    assert merge["whenMatched"][0]["$set"]["badges"]["$concatArrays"][0] == {"$ifNull": ["$badges", []]}
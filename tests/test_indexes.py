@@ -0,0 +1,46 @@
+from backend.indexes import INDEXES, QUERY_SHAPES, RETIRED_INDEXES, plan_stages, winning_plan
+
+
+def test_plan_stages_walks_nested_plans():
+    explain = {
+        "queryPlanner": {
+            "winningPlan": {
+                "queryPlan": {
+                    "stage": "LIMIT",
+                    "inputStage": {
+                        "stage": "FETCH",
+                        "inputStage": {"stage": "IXSCAN", "indexName": "user_date"},
+                    },
+                }
+            }
+        }
+    }
+    assert list(plan_stages(winning_plan(explain))) == ["LIMIT", "FETCH", "IXSCAN"]
+
+
+def test_plan_stages_detects_collscan_in_or_branches():
+    plan = {"stage": "SUBPLAN", "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}
+    assert "COLLSCAN" in list(plan_stages(plan))
+
+
+def test_every_query_shape_targets_an_indexed_collection():
+    assert {"users", "sessions", "assessments"} <= set(INDEXES)
+    for shape in QUERY_SHAPES:
+        assert shape["collection"] in INDEXES
+
+
+def test_users_email_is_unique():
+    email_index = next(m for m in INDEXES["users"] if m.document["name"] == "email_unique")
+    assert email_index.document["unique"] is True
+
+
+def test_retired_indexes_are_no_longer_declared():
+    for collection, names in RETIRED_INDEXES.items():
+        declared = {m.document["name"] for m in INDEXES.get(collection, [])}
+        assert not declared & set(names)
+
+
+def test_archival_scans_have_a_leading_date_index():
+    for collection in ("mood_entries", "sleep_entries", "reflections"):
+        assert any(s["name"] == f"{collection} archival" for s in QUERY_SHAPES)
+        assert any(list(m.document["key"]) == ["date"] for m in INDEXES[collection])
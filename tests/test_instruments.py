@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import random
+from itertools import product
+
+import pytest
+
+from backend.assessments_utils import (
+    InstrumentRegistry,
+    calculate_dass_scores,
+    calculate_phq9_score,
+    instrument_registry,
+)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "data", "assessment_golden.json")
+DASS_ITEMS = ((3, 5, 10, 13, 16, 17, 21), (2, 4, 7, 9, 15, 19, 20), (1, 6, 8, 11, 12, 14, 18))
+# Raw subscale sums on both sides of every DASS-21 cut-off.
+DASS_SUMS = (0, 4, 5, 7, 8, 10, 11, 13, 14, 16, 17, 21)
+
+
+def _fill(items, total):
+    answers = {}
+    for q in items:
+        answers[q] = min(3, total)
+        total -= answers[q]
+    return answers
+
+
+def golden_inputs():
+    rng = random.Random(49)
+    dass = []
+    for sums in product(DASS_SUMS, repeat=3):
+        responses = {}
+        for items, total in zip(DASS_ITEMS, sums):
+            responses.update(_fill(items, total))
+        dass.append(responses)
+    dass += [{q: rng.randint(0, 3) for q in range(1, 22)} for _ in range(200)]
+    phq9 = [_fill(range(1, 10), total) for total in range(28)]
+    phq9 += [{q: rng.randint(0, 3) for q in range(1, 10)} for _ in range(100)]
+    return dass, phq9
+
+
+def _digest(results):
+    return hashlib.sha256(json.dumps(results, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def build_golden():
+    dass, phq9 = golden_inputs()
+    dass_results = [calculate_dass_scores(r) for r in dass]
+    phq9_results = [calculate_phq9_score(r) for r in phq9]
+    return {
+        "DASS-21": {"count": len(dass), "sha256": _digest(dass_results), "example": dass_results[-1]},
+        "PHQ-9": {"count": len(phq9), "sha256": _digest(phq9_results), "example": phq9_results[-1]},
+    }
+
+
+def test_results_match_golden_bytes():
+    with open(GOLDEN_PATH, encoding="utf-8") as fh:
+        golden = json.load(fh)
+    current = build_golden()
+    for instrument in ("DASS-21", "PHQ-9"):
+        assert current[instrument]["example"] == golden[instrument]["example"]
+        assert current[instrument] == golden[instrument]
+
+
+GAD7 = {
+    "id": "GAD-7",
+    "item_count": 7,
+    "response_range": [0, 3],
+    "subscales": [
+        {
+            "name": "anxiety",
+            "items": [1, 2, 3, 4, 5, 6, 7],
+            "score_field": "total_score",
+            "level_field": "severity_level",
+            "bands": [{"max": 4, "label": "minimal"}, {"max": 9, "label": "mild"}, {"max": 14, "label": "moderate"}, {"label": "severe"}],
+        }
+    ],
+    "analysis": {
+        "field": "analysis",
+        "rules": [{"when": {"subscale": "anxiety", "in": ["severe"]}, "text": "see a clinician"}, {"text": "monitor"}],
+    },
+    "recommendations": {"mode": "all", "limit": 2, "rules": [{"items": ["breathe", "walk", "sleep"]}]},
+}
+
+
+def test_new_instrument_from_data():
+    plan = InstrumentRegistry([GAD7])["GAD-7"]
+    result = plan.score({q: 3 for q in range(1, 8)})
+    assert result == {
+        "total_score": 21,
+        "severity_level": "severe",
+        "analysis": "see a clinician",
+        "recommendations": ["breathe", "walk"],
+    }
+    batch = [{str(q): (i + q) % 4 for q in range(1, 8)} for i in range(50)]
+    assert plan.score_batch(batch) == [plan.score({int(q): v for q, v in r.items()}) for r in batch]
+    assert plan.metric_bands() == {"total_score": ((4, 9, 14), ("minimal", "mild", "moderate", "severe"))}
+
+
+def test_validation_errors():
+    plan = instrument_registry["PHQ-9"]
+    assert plan.validation_error({q: 1 for q in range(1, 10)}) is None
+    assert plan.validation_error({q: 1 for q in range(1, 9)}) == "باید به تمام 9 سوال پاسخ داده شود"
+    assert plan.validation_error({q: 1 for q in range(2, 11)}) is not None
+    assert plan.validation_error({**{q: 1 for q in range(1, 9)}, 9: 4}) is not None
+
+
+def test_registry_rejects_bad_declarations():
+    bad_bands = json.loads(json.dumps(GAD7))
+    bad_bands["subscales"][0]["bands"][1]["max"] = 2
+    with pytest.raises(ValueError):
+        InstrumentRegistry([bad_bands])
+    unknown = json.loads(json.dumps(GAD7))
+    unknown["analysis"]["rules"][0]["when"]["subscale"] = "mood"
+    with pytest.raises(ValueError):
+        InstrumentRegistry([unknown])
+    with pytest.raises(ValueError):
+        InstrumentRegistry([GAD7, GAD7])
@@ -1,4 +1,11 @@
-from backend.journeys_utils import get_default_journeys
+import json
+import os
+from types import MappingProxyType
+
+import pytest
+
+from backend import journeys_utils
+from backend.journeys_utils import CatalogHolder, JourneyCatalog, get_default_journeys
 
 
 def test_journeys_structure():
@@ -9,3 +16,100 @@ def test_journeys_structure():
         assert "name" in j
         assert "description" in j
         assert isinstance(j.get("tasks"), list)
+
+
+def _write(directory, name, journey_id, tasks=("Step one",)):
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(
+            {"id": journey_id, "name": journey_id.title(), "description": "d", "tasks": list(tasks)},
+            fh,
+        )
+    return path
+
+
+def test_catalog_indexes_by_id_and_keeps_file_order(tmp_path):
+    _write(tmp_path, "020-b.json", "b")
+    _write(tmp_path, "010-a.json", "a")
+    catalog = JourneyCatalog.from_directory(str(tmp_path))
+    assert [j["id"] for j in catalog.journeys] == ["a", "b"]
+    assert catalog.get("b")["name"] == "B"
+    assert catalog.get("missing") is None
+    assert json.loads(catalog.list_body) == catalog.as_dicts()
+    body, etag = catalog.item_responses["a"]
+    assert json.loads(body)["id"] == "a"
+    assert etag.startswith('"') and etag != catalog.list_etag
+
+
+def test_catalog_is_immutable(tmp_path):
+    _write(tmp_path, "a.json", "a")
+    catalog = JourneyCatalog.from_directory(str(tmp_path))
+    assert isinstance(catalog.get("a"), MappingProxyType)
+    with pytest.raises(TypeError):
+        catalog.get("a")["name"] = "changed"
+    assert isinstance(catalog.get("a")["tasks"], tuple)
+    catalog.as_dicts()[0]["name"] = "changed"
+    assert catalog.get("a")["name"] == "A"
+
+
+def test_catalog_rejects_bad_files(tmp_path):
+    _write(tmp_path, "a.json", "a")
+    _write(tmp_path, "b.json", "a")
+    with pytest.raises(ValueError):
+        JourneyCatalog.from_directory(str(tmp_path))
+    with pytest.raises(ValueError):
+        journeys_utils.validate_journey({"id": "x", "name": "X", "description": "d", "tasks": []})
+
+
+def test_yaml_journeys(tmp_path):
+    pytest.importorskip("yaml")
+    (tmp_path / "a.yaml").write_text(
+        "id: a\nname: A\ndescription: d\ntasks:\n  - تنفس عمیق\n", encoding="utf-8"
+    )
+    catalog = JourneyCatalog.from_directory(str(tmp_path))
+    assert catalog.get("a")["tasks"] == ("تنفس عمیق",)
+    assert "تنفس عمیق".encode("utf-8") in catalog.list_body
+
+
+def test_holder_reloads_when_files_change(tmp_path, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(journeys_utils.time, "monotonic", lambda: now[0])
+    _write(tmp_path, "a.json", "a")
+    holder = CatalogHolder(str(tmp_path))
+    etag = holder.current().list_etag
+    path = _write(tmp_path, "b.json", "b")
+    assert len(holder.current()) == 1
+    now[0] += journeys_utils.JOURNEY_CATALOG_CHECK_SECONDS + 1
+    assert len(holder.current()) == 2
+    assert holder.current().list_etag != etag
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("{broken")
+    os.utime(path, (1, 1))
+    now[0] += journeys_utils.JOURNEY_CATALOG_CHECK_SECONDS + 1
+    # A broken edit keeps serving the last good catalog.
+    assert len(holder.current()) == 2
+
+
+def test_summarize_progress_merges_catalog(tmp_path):
+    _write(tmp_path, "a.json", "a", tasks=("one", "two", "three", "four"))
+    _write(tmp_path, "b.json", "b")
+    catalog = JourneyCatalog.from_directory(str(tmp_path))
+    docs = [
+        {"journey_id": "a", "current_step": 2, "completed_steps": [3, 0], "completed_at": None},
+        {"journey_id": "retired", "current_step": 1, "completed_steps": [0]},
+    ]
+    summary = journeys_utils.summarize_progress(catalog, docs)
+    assert [s["journey_id"] for s in summary] == ["a", "b"]
+    assert summary[0]["completed_steps"] == [0, 3]
+    assert summary[0]["percent"] == 50
+    assert summary[0]["started"] is True
+    assert summary[1] == {
+        "journey_id": "b",
+        "name": "B",
+        "total_steps": 1,
+        "started": False,
+        "completed_steps": [],
+        "current_step": 0,
+        "percent": 0,
+        "completed_at": None,
+    }
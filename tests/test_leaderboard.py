@@ -0,0 +1,53 @@
+import random
+
+from backend.leaderboard_utils import SortedLeaderboard
+
+
+def _reference(scores):
+    ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [user_id for user_id, _ in ordered]
+
+
+def test_rank_and_page_order():
+    board = SortedLeaderboard([("a", 50), ("b", 200), ("c", 50), ("d", 10)])
+    assert board.rank("b") == 1
+    assert board.rank("a") == 2
+    assert board.rank("c") == 3
+    assert board.rank("missing") is None
+    assert board.page(1, 2) == [
+        {"rank": 2, "user_id": "a", "xp": 50},
+        {"rank": 3, "user_id": "c", "xp": 50},
+    ]
+    assert board.page(10, 5) == []
+
+
+def test_update_moves_user():
+    board = SortedLeaderboard([("a", 50), ("b", 200)])
+    board.update("a", 300)
+    board.update("new", 100)
+    assert [entry["user_id"] for entry in board.page(0, 10)] == ["a", "b", "new"]
+    board.remove("b")
+    assert board.rank("new") == 2
+    assert len(board) == 2
+
+
+def test_around_clamps_at_edges():
+    board = SortedLeaderboard([(f"u{i}", 100 - i) for i in range(10)])
+    assert [e["rank"] for e in board.around("u0", 2)] == [1, 2, 3]
+    assert [e["rank"] for e in board.around("u5", 2)] == [4, 5, 6, 7, 8]
+    assert [e["rank"] for e in board.around("u9", 2)] == [8, 9, 10]
+    assert board.around("missing", 2) == []
+
+
+def test_matches_full_sort_after_random_updates():
+    rng = random.Random(7)
+    scores = {f"u{i}": rng.randint(0, 500) for i in range(300)}
+    board = SortedLeaderboard(scores.items())
+    for _ in range(2000):
+        user_id = f"u{rng.randrange(400)}"
+        scores[user_id] = scores.get(user_id, 0) + rng.choice([5, 10])
+        board.update(user_id, scores[user_id])
+    expected = _reference(scores)
+    assert [entry["user_id"] for entry in board.page(0, len(expected))] == expected
+    for user_id in rng.sample(list(scores), 20):
+        assert board.rank(user_id) == expected.index(user_id) + 1
@@ -0,0 +1,44 @@
+import pytest
+
+from backend.memory_utils import (
+    MAX_MEMORY_KEYS,
+    MAX_MEMORY_VALUE_BYTES,
+    MemoryValidationError,
+    build_memory_update,
+    key_limit_expr,
+)
+
+
+def test_build_memory_update_uses_dotted_paths():
+    update = build_memory_update({"name": "سارا", "mood": None})
+    assert update == {"$set": {"memory.name": "سارا"}, "$unset": {"memory.mood": ""}}
+
+
+def test_build_memory_update_empty():
+    assert build_memory_update({}) == {}
+
+
+@pytest.mark.parametrize("key", ["", "a.b", "$where", "x" * 200])
+def test_build_memory_update_rejects_bad_keys(key):
+    with pytest.raises(MemoryValidationError):
+        build_memory_update({key: 1})
+
+
+def test_build_memory_update_rejects_large_values():
+    with pytest.raises(MemoryValidationError):
+        build_memory_update({"note": "x" * (MAX_MEMORY_VALUE_BYTES + 1)})
+
+
+def test_build_memory_update_rejects_too_many_keys():
+    changes = {f"k{i}": i for i in range(MAX_MEMORY_KEYS + 1)}
+    with pytest.raises(MemoryValidationError):
+        build_memory_update(changes)
+
+
+def test_key_limit_expr_accounts_for_set_and_unset():
+    expr = key_limit_expr({"a": 1, "b": None})
+    size_expr, limit = expr["$lte"]
+    assert limit == MAX_MEMORY_KEYS
+    union, removed = size_expr["$size"]["$setDifference"]
+    assert union["$setUnion"][1] == ["a"]
+    assert removed == ["b"]
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+
+from backend.assessments_utils import InstrumentRegistry, instrument_registry
+from backend.parquet_utils import assessment_columns, assessment_row, pseudonymize
+
+COLUMNS = assessment_columns(instrument_registry)
+
+
+def test_pseudonymize_is_keyed_and_stable():
+    assert pseudonymize("u1", b"k") == pseudonymize("u1", b"k")
+    assert pseudonymize("u1", b"k") != pseudonymize("u1", b"other")
+    assert "u1" not in pseudonymize("u1", b"k")
+
+
+def test_assessment_row_flattens_results_and_answers():
+    row = assessment_row(
+        {
+            "assessment_type": "PHQ-9",
+            "completed_at": datetime(2024, 3, 1),
+            "responses": {"1": 2, "9": "3"},
+            "results": {"total_score": 5, "severity_level": "خفیف", "recommendations": ["x"]},
+        },
+        "s1",
+        COLUMNS,
+    )
+    assert row["total_score"] == 5
+    assert row["q1"] == 2 and row["q9"] == 3 and row["q21"] is None
+    assert row["depression_score"] is None
+    assert "recommendations" not in row
+
+
+def test_columns_follow_the_registry():
+    assert COLUMNS.levels == ("depression_level", "anxiety_level", "stress_level", "severity_level")
+    assert COLUMNS.responses[-1] == "q21"
+    spec = {
+        "id": "WHO-5",
+        "item_count": 25,
+        "response_range": [0, 5],
+        "subscales": [
+            {
+                "name": "wellbeing",
+                "items": "all",
+                "weight": 4,
+                "score_field": "wellbeing_score",
+                "level_field": "wellbeing_level",
+                "bands": [{"max": 50, "label": "low"}, {"label": "good"}],
+            }
+        ],
+        "analysis": {"field": "who5_analysis", "rules": [{"text": "ok"}]},
+        "recommendations": {"rules": []},
+    }
+    columns = assessment_columns([*instrument_registry, *InstrumentRegistry([spec])])
+    assert columns.results[-2:] == ("wellbeing_score", "wellbeing_level")
+    assert columns.responses[-1] == "q25"
+    row = assessment_row(
+        {"assessment_type": "WHO-5", "responses": {"25": 5}, "results": {"wellbeing_score": 80}},
+        "s1",
+        columns,
+    )
+    assert row["wellbeing_score"] == 80 and row["q25"] == 5
+
+
+def test_partitioned_writer_round_trip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from backend.parquet_utils import PartitionedWriter, build_schemas
+
+    writer = PartitionedWriter(
+        str(tmp_path),
+        "assessments",
+        build_schemas(COLUMNS)["assessments"],
+        "assessment_type",
+        lambda row: row["assessment_type"],
+        chunk_size=7,
+    )
+    for i in range(30):
+        writer.write(
+            assessment_row(
+                {
+                    "assessment_type": "DASS-21" if i % 3 else "PHQ-9",
+                    "completed_at": datetime(2024, 1, 1, i % 24),
+                    "responses": {str(q): i % 4 for q in range(1, 22)},
+                    "results": {"depression_score": i, "depression_level": "عادی"},
+                },
+                f"s{i}",
+                COLUMNS,
+            )
+        )
+    entry = writer.close()
+    assert entry["rows"] == 30
+    assert {f["partition"]["assessment_type"]: f["rows"] for f in entry["files"]} == {
+        "DASS-21": 20,
+        "PHQ-9": 10,
+    }
+    table = pq.read_table(str(tmp_path / "assessments"))
+    assert table.num_rows == 30
+    assert str(table.schema.field("q1").type) == "int8"
+    assert str(table.schema.field("completed_at").type) == "timestamp[ms]"
+    assert sorted(set(table.column("assessment_type").to_pylist())) == ["DASS-21", "PHQ-9"]
@@ -0,0 +1,22 @@
+import asyncio
+
+from backend import passwords
+
+
+def test_hash_rounds_and_needs_rehash():
+    hashed = passwords.hash_password_sync("secret", rounds=4)
+    assert passwords.hash_rounds(hashed) == 4
+    assert passwords.needs_rehash(hashed, rounds=5)
+    assert not passwords.needs_rehash(hashed, rounds=4)
+
+
+def test_pooled_verify():
+    hashed = passwords.hash_password_sync("secret", rounds=4)
+
+    async def verify_many():
+        return await asyncio.gather(
+            passwords.verify_password("secret", hashed),
+            passwords.verify_password("wrong", hashed),
+        )
+
+    assert asyncio.run(verify_many()) == [True, False]
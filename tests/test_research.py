@@ -0,0 +1,80 @@
+import datetime
+
+import numpy as np
+
+from backend.research_utils import (
+    CorrelationAccumulator,
+    GroupedSummary,
+    ResearchAggregator,
+    age_band,
+    join_chunk,
+    month_key,
+)
+
+
+def test_age_band():
+    assert age_band(None) == "unknown"
+    assert age_band(17) == "<18"
+    assert age_band(21) == "18-21"
+    assert age_band(40) == "31+"
+
+
+def test_month_key():
+    assert month_key(datetime.datetime(2024, 3, 9)) == "2024-03"
+    assert month_key(None) == "unknown"
+
+
+def test_chunked_correlation_matches_numpy():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=1000)
+    data = np.column_stack([x, 2 * x + rng.normal(size=1000), rng.normal(size=1000)])
+    acc = CorrelationAccumulator(["a", "b", "c"])
+    for start in range(0, 1000, 128):
+        acc.update(data[start : start + 128])
+    expected = np.corrcoef(data, rowvar=False)
+    np.testing.assert_allclose(np.array(acc.result()["matrix"], dtype=float), expected, atol=1e-4)
+
+
+def test_correlation_is_pairwise_complete():
+    data = np.array([[1.0, 2.0], [2.0, np.nan], [3.0, 6.0], [4.0, 8.0], [np.nan, 1.0]])
+    acc = CorrelationAccumulator(["a", "b"])
+    acc.update(data)
+    result = acc.result()
+    assert result["n"] == [[4, 3], [3, 4]]
+    assert result["matrix"][0][1] == 1.0
+
+
+def test_grouped_summary():
+    summary = GroupedSummary(["v"])
+    summary.update(["x", "y", "x"], np.array([[1.0], [5.0], [3.0]]))
+    summary.update(["x"], np.array([[np.nan]]))
+    result = summary.result()
+    assert result["x"]["v"] == {"n": 2, "mean": 2.0, "std": 1.4142}
+    assert result["y"]["v"]["std"] is None
+
+
+def test_join_chunk_and_aggregate():
+    day = datetime.datetime(2024, 3, 1, 8)
+    users = [
+        {"user_id": "u1", "age": 20, "student_level": "bachelor"},
+        {"user_id": "u2", "age": 30, "student_level": "master"},
+    ]
+    moods = [
+        {"user_id": "u1", "date": day, "mood_level": 4, "sentiment": 0.5},
+        {"user_id": "u1", "date": day + datetime.timedelta(days=1), "mood_level": 2, "sentiment": -0.5},
+    ]
+    sleeps = [{"user_id": "u1", "date": day + datetime.timedelta(hours=2), "hours": 8, "quality": 4}]
+    assessments = [{"user_id": "u2", "assessment_type": "PHQ-9", "total_score": 12}]
+    daily, per_user = join_chunk(users, moods, sleeps, assessments)
+    assert len(daily) == 2
+    assert daily.iloc[0]["sleep_hours"] == 8
+    assert per_user.loc["u1", "mood_level"] == 3
+    assert per_user.loc["u2", "phq9_total"] == 12
+    assert per_user.loc["u2", "age_band"] == "26-30"
+
+    aggregator = ResearchAggregator()
+    aggregator.add(daily, per_user)
+    result = aggregator.result()
+    assert result["users"] == 2
+    assert result["user_days"] == 2
+    assert result["summaries"]["student_level"]["master"]["phq9_total"]["mean"] == 12.0
@@ -0,0 +1,71 @@
+import datetime
+import json
+
+import pytest
+
+from backend.retention_utils import (
+    load_manifest,
+    manifest_entry,
+    partition_path,
+    partitions_for_user,
+    read_partition,
+    save_batch_manifest,
+    search_index_deletes,
+    validate_policy,
+    write_partition,
+)
+
+
+def test_partition_round_trip(tmp_path):
+    root = str(tmp_path)
+    docs = [
+        {"user_id": "u1", "user_message": "سلام", "timestamp": datetime.datetime(2024, 1, 2, 3, 4)},
+        {"user_id": "u2", "user_message": "hi", "timestamp": datetime.datetime(2024, 1, 2, 5, 6)},
+    ]
+    path = partition_path(root, "chat_history", "2024-01-02")
+    assert "chat_history/date=2024-01-02/" in path
+    assert write_partition(path, docs) == 2
+    assert list(read_partition(path)) == docs
+
+    assert load_manifest(root) == {"partitions": []}
+    save_batch_manifest(root, [manifest_entry(root, "chat_history", "2024-01-02", path, docs)])
+
+    reloaded = load_manifest(root)
+    assert reloaded["partitions"][0]["count"] == 2
+    assert [p["path"] for p in partitions_for_user(reloaded, "u1")] == [
+        reloaded["partitions"][0]["path"]
+    ]
+    assert partitions_for_user(reloaded, "u3") == []
+    assert partitions_for_user(reloaded, "u1", ["mood_entries"]) == []
+
+
+def test_validate_policy_requires_ttl_after_archive():
+    validate_policy("c", {"archive_after_days": 30, "expire_after_days": 0})
+    with pytest.raises(ValueError):
+        validate_policy("c", {"archive_after_days": 30, "expire_after_days": 30})
+
+
+def test_batch_manifests_merge_with_legacy_manifest(tmp_path):
+    root = str(tmp_path)
+    legacy = {"partitions": [{"collection": "chat_history", "path": "old", "user_ids": ["u1"]}]}
+    (tmp_path / "manifest.json").write_text(json.dumps(legacy), encoding="utf-8")
+    # Two concurrent runs each write their own file instead of rewriting one.
+    save_batch_manifest(root, [{"collection": "reflections", "path": "a", "user_ids": ["u1"]}])
+    save_batch_manifest(root, [{"collection": "reflections", "path": "b", "user_ids": ["u2"]}])
+    manifest = load_manifest(root)
+    assert sorted(p["path"] for p in manifest["partitions"]) == ["a", "b", "old"]
+    assert [p["path"] for p in partitions_for_user(manifest, "u1", ["reflections"])] == ["a"]
+
+
+def test_search_index_deletes_group_by_user():
+    docs = [
+        {"_id": 1, "user_id": "u1", "entry_id": "e1"},
+        {"_id": 2, "user_id": "u1"},
+        {"_id": 3, "user_id": "u2", "entry_id": "e3"},
+    ]
+    assert search_index_deletes("reflections", docs) == [
+        {"user_id": "u1", "source": "reflection", "entry_id": {"$in": ["e1", "2"]}},
+        {"user_id": "u2", "source": "reflection", "entry_id": {"$in": ["e3"]}},
+    ]
+    assert search_index_deletes("mood_entries", docs[:1])[0]["source"] == "mood"
+    assert search_index_deletes("chat_history", docs) == []
@@ -0,0 +1,50 @@
+from backend.search_utils import (
+    MAX_CANDIDATES,
+    build_search_pipeline,
+    highlight_spans,
+    normalize_persian,
+    tokenize,
+)
+
+
+def test_normalize_arabic_forms_and_digits():
+    assert normalize_persian("كتاب علي ۱۲") == "کتاب علی 12"
+
+
+def test_normalize_drops_zwnj_and_diacritics():
+    assert normalize_persian("می‌خواهم") == normalize_persian("میخواهم")
+    assert normalize_persian("کِتاب") == "کتاب"
+
+
+def test_tokenize_removes_stopwords_and_duplicates():
+    assert tokenize("امروز در دانشگاه امتحان داشتم و امتحان سخت بود") == [
+        "امروز",
+        "دانشگاه",
+        "امتحان",
+        "داشتم",
+        "سخت",
+    ]
+
+
+def test_highlight_spans_map_to_original_text():
+    text = "امروز می‌خواهم بخوابم"
+    spans = highlight_spans(text, tokenize("میخواهم"))
+    assert [text[s:e] for s, e in spans] == ["می‌خواهم"]
+
+
+def test_highlight_spans_survive_lowercase_that_changes_length():
+    text = "İstanbul سفر İİ خواب"
+    spans = highlight_spans(text, ["سفر", "خواب"])
+    assert [text[s:e] for s, e in spans] == ["سفر", "خواب"]
+    istanbul = highlight_spans(text, tokenize("İstanbul"))
+    assert [text[s:e] for s, e in istanbul] == ["İstanbul"]
+
+
+def test_build_search_pipeline_paginates():
+    pipeline = build_search_pipeline("u1", ["خواب"], 20, 10)
+    assert pipeline[0]["$match"] == {"user_id": "u1", "terms": {"$in": ["خواب"]}}
+    # The candidate set is capped before any document is scored.
+    assert pipeline[1:3] == [{"$sort": {"date": -1}}, {"$limit": MAX_CANDIDATES}]
+    items = pipeline[-1]["$facet"]["items"]
+    assert items[0] == {"$skip": 20}
+    assert items[1] == {"$limit": 10}
@@ -0,0 +1,101 @@
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+from bson import ObjectId
+
+from backend.research_utils import AGE_BANDS, age_band
+from backend.stats_utils import (
+    build_rebuild_pipeline,
+    build_stats_updates,
+    group_stats,
+    histogram_percentile,
+    summarize_histogram,
+)
+
+PHQ9_BANDS = ((4, 9, 14, 19), ("a", "b", "c", "d", "e"))
+METRICS = {"DASS-21": ("depression_score", "anxiety_score", "stress_score"), "PHQ-9": ("total_score",)}
+
+
+def test_histogram_percentiles_match_numpy():
+    rng = random.Random(47)
+    scores = [rng.randint(0, 27) for _ in range(999)]
+    counts = {}
+    for score in scores:
+        counts[score] = counts.get(score, 0) + 1
+    for q in (1, 10, 25, 50, 75, 90, 99, 100):
+        expected = np.percentile(scores, q, method="inverted_cdf")
+        assert histogram_percentile(counts, q) == expected
+    assert histogram_percentile({}, 50) is None
+
+
+def test_summary_bands_with_current_cutoffs():
+    summary = summarize_histogram({4: 2, 5: 1, 27: 1}, *PHQ9_BANDS)
+    assert summary["n"] == 4
+    assert summary["mean"] == 10.0
+    assert summary["levels"] == {"a": 2, "b": 1, "c": 0, "d": 0, "e": 1}
+    assert summary["percentiles"]["p50"] == 4
+
+
+def test_group_stats_sums_cells():
+    cells = [
+        {"metric": "total_score", "month": "2024-01", "counts": {"3": 2}},
+        {"metric": "total_score", "month": "2024-02", "counts": {"3": 1, "20": 1}},
+        {"metric": "ignored", "month": "2024-02", "counts": {"1": 1}},
+    ]
+    bands = {"total_score": PHQ9_BANDS}
+    overall = group_stats(cells, "none", bands)
+    assert list(overall) == ["total_score"]
+    assert overall["total_score"]["all"]["n"] == 4
+    by_month = group_stats(cells, "month", bands)["total_score"]
+    assert by_month["2024-02"]["levels"]["e"] == 1
+    with pytest.raises(ValueError):
+        group_stats(cells, "email", bands)
+
+
+def test_incremental_updates_match_rebuild():
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    rng = random.Random(3)
+    users = [{"user_id": f"u{i}", "age": rng.choice([None, 17, 20, 24, 35]), "student_level": rng.choice(["bachelor", "master", None])} for i in range(20)]
+    db.users.insert_many([dict(u) for u in users])
+    for i in range(300):
+        user = rng.choice(users)
+        kind = rng.choice(list(METRICS))
+        results = {metric: rng.randint(0, 42) for metric in METRICS[kind]}
+        completed_at = datetime(2024, rng.randint(1, 12), 1)
+        db.assessments.insert_one({"user_id": user["user_id"], "assessment_type": kind, "results": results, "completed_at": completed_at})
+        cell = {
+            "assessment_type": kind,
+            "month": completed_at.strftime("%Y-%m"),
+            "student_level": user["student_level"] or "unknown",
+            "age_band": age_band(user["age"]),
+        }
+        for query, update in build_stats_updates(cell, results, METRICS[kind]):
+            db.incremental.update_one(query, update, upsert=True)
+
+    list(db.assessments.aggregate(build_rebuild_pipeline(METRICS, AGE_BANDS, out="rebuilt")))
+
+    def cells(collection):
+        return sorted(
+            (
+                tuple(doc[f] for f in ("assessment_type", "metric", "month", "student_level", "age_band", "n", "sum")),
+                sorted(doc["counts"].items()),
+            )
+            for doc in collection.find()
+        )
+
+    assert cells(db.rebuilt) == cells(db.incremental)
+    assert db.rebuilt.count_documents({}) > 0
+
+
+def test_rebuild_can_stop_at_a_snapshot_boundary():
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    ids = [ObjectId.from_datetime(datetime(2024, 1, day)) for day in (1, 2, 3)]
+    for oid, score in zip(ids, (1, 2, 4)):
+        db.assessments.insert_one({"_id": oid, "user_id": "u", "assessment_type": "PHQ-9", "results": {"total_score": score}, "completed_at": datetime(2024, 1, 1)})
+    list(db.assessments.aggregate(build_rebuild_pipeline({"PHQ-9": ("total_score",)}, AGE_BANDS, out="cells", before=ids[2])))
+    (cell,) = db.cells.find()
+    assert (cell["n"], cell["sum"]) == (2, 3)